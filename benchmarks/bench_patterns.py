@@ -0,0 +1,207 @@
+"""Looks for regular expressions in the patterns module that backtrack catastrophically.
+
+Each pattern is fuzzed with adversarial lines: a random prefix, a random fragment
+repeated many times, and a random last character, all made of the characters that
+markdown syntax uses. For each line, the fragment is repeated more and more times until
+the line has ``--max-chars`` characters or matching it takes longer than ``--budget``
+seconds. A pattern that runs in linear time takes only milliseconds for even the
+longest lines, so any line that runs out of time shows that the pattern backtracks
+catastrophically. The worst line for each pattern is reported with its time, its time
+per megabyte, and roughly how fast its time grew with its length.
+
+Full-line patterns are timed with ``match`` on one line, the way the lexer uses them.
+Inline patterns are timed with ``findall`` on the line repeated as a whole note, the
+way they are used on notes' contents::
+
+    python benchmarks/bench_patterns.py
+    python benchmarks/bench_patterns.py --pattern table_divider --fragments 2000
+
+The exit code is 1 if any line ran out of time.
+"""
+# flake8: noqa: E402
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import types
+from dataclasses import dataclass
+from typing import Any
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCHMARKS_FOLDER), "src"))
+
+from note_splitter import patterns
+
+
+ALPHABET = " \t\n#-*_:|[]()^.!/\\`~$>+a1x@"
+INLINE_PATTERN_NAMES = ("file_path_in_link", "tag")
+INLINE_LINE_COUNT = 4
+GROWTH = 1.25
+
+
+@dataclass
+class WorstCase:
+    """The slowest adversarial line found for one pattern."""
+
+    pattern_name: str
+    line: str = ""
+    seconds: float = 0.0
+    exponent: float = 0.0
+    out_of_time: bool = False
+
+    @property
+    def seconds_per_mb(self) -> float:
+        return self.seconds / max(len(self.line), 1) * 1024 * 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--pattern",
+        action="append",
+        help="the name of a pattern to fuzz. Can be repeated. Defaults to all.",
+    )
+    parser.add_argument(
+        "--fragments", type=int, default=300, help="random fragments per pattern"
+    )
+    parser.add_argument("--max-chars", type=int, default=20_000, help="line length")
+    parser.add_argument(
+        "--budget", type=float, default=0.05, help="seconds per match before stopping"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pattern_names: list[str] = args.pattern or get_pattern_names()
+    worst_cases: list[WorstCase] = []
+    for name in pattern_names:
+        worst_case = fuzz(
+            name, args.fragments, args.max_chars, args.budget, random.Random(args.seed)
+        )
+        worst_cases.append(worst_case)
+        print_worst_case(worst_case)
+    if any(w.out_of_time for w in worst_cases):
+        sys.exit(1)
+
+
+def get_pattern_names() -> list[str]:
+    """Returns the names of all the patterns in the patterns module."""
+    return sorted(
+        name
+        for name, value in vars(patterns).items()
+        if hasattr(value, "findall") and not isinstance(value, (type, types.ModuleType))
+    )
+
+
+def fuzz(
+    pattern_name: str,
+    fragment_count: int,
+    max_chars: int,
+    budget: float,
+    rng: random.Random,
+) -> WorstCase:
+    """Finds the adversarial line that a pattern takes the longest to match.
+
+    Parameters
+    ----------
+    pattern_name : str
+        The name of the pattern in the patterns module.
+    fragment_count : int
+        The number of random fragments to try.
+    max_chars : int
+        The most characters to grow each line to.
+    budget : float
+        The most seconds to let one match take before the line stops growing.
+    rng : random.Random
+        The random number generator to create the lines with.
+
+    Returns
+    -------
+    WorstCase
+        The line that took the most seconds per character.
+    """
+    pattern: Any = getattr(patterns, pattern_name)
+    inline: bool = pattern_name in INLINE_PATTERN_NAMES
+    # Full-line patterns are only matched to text without line breaks.
+    alphabet: str = ALPHABET if inline else ALPHABET.replace("\n", "")
+    worst_case = WorstCase(pattern_name)
+    for _ in range(fragment_count):
+        prefix: str = random_string(rng, alphabet, 0, 3)
+        fragment: str = random_string(rng, alphabet, 1, 4)
+        suffix: str = random_string(rng, alphabet, 1, 1)
+        samples: list[tuple[int, float]] = []
+        repeat_count = 1
+        while True:
+            line: str = prefix + fragment * repeat_count + suffix
+            seconds: float = time_pattern(pattern, line, inline)
+            samples.append((len(line), seconds))
+            if seconds > budget or len(line) >= max_chars:
+                break
+            repeat_count = max(repeat_count + 1, math.ceil(repeat_count * GROWTH))
+        case = WorstCase(
+            pattern_name,
+            line,
+            seconds,
+            estimate_exponent(samples),
+            seconds > budget and len(line) < max_chars,
+        )
+        if case.seconds_per_mb > worst_case.seconds_per_mb:
+            worst_case = case
+    return worst_case
+
+
+def random_string(
+    rng: random.Random, alphabet: str, min_length: int, max_length: int
+) -> str:
+    return "".join(rng.choices(alphabet, k=rng.randint(min_length, max_length)))
+
+
+def time_pattern(pattern: Any, line: str, inline: bool) -> float:
+    """Returns the fewest seconds matching a pattern to a line took in a few tries."""
+    best: float = math.inf
+    text: str = "\n".join([line] * INLINE_LINE_COUNT) if inline else line
+    for _ in range(3):
+        start: float = time.perf_counter()
+        if inline:
+            pattern.findall(text)
+        else:
+            pattern.match(line)
+        best = min(best, time.perf_counter() - start)
+        if best > 0.01:
+            break
+    return best
+
+
+def estimate_exponent(samples: list[tuple[int, float]]) -> float:
+    """Estimates k where the seconds grow like the length to the power of k.
+
+    The last sample is compared with the longest sample that is at most a quarter as
+    long, unless that sample was too fast to time accurately.
+    """
+    length, seconds = samples[-1]
+    for previous_length, previous_seconds in reversed(samples[:-1]):
+        if previous_length * 4 <= length:
+            if previous_seconds < 1e-4:
+                return 0.0
+            return math.log(seconds / previous_seconds) / math.log(
+                length / previous_length
+            )
+    return 0.0
+
+
+def print_worst_case(worst_case: WorstCase) -> None:
+    flag: str = "  OUT OF TIME" if worst_case.out_of_time else ""
+    shown_line: str = worst_case.line
+    if len(shown_line) > 60:
+        shown_line = shown_line[:57] + "..."
+    print(
+        f"{worst_case.pattern_name:>20s} | {worst_case.seconds:>9.4f} s"
+        f" | {len(worst_case.line):>7,} chars | {worst_case.seconds_per_mb:>9.2f} s/MB"
+        f" | exponent {worst_case.exponent:>5.2f}{flag}"
+    )
+    print(f"{'':>20s} | {shown_line!r}")
+
+
+if __name__ == "__main__":
+    main()
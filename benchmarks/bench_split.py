@@ -0,0 +1,307 @@
+"""Measures the throughput of each stage of the splitting pipeline.
+
+A synthetic corpus is generated (see corpus.py), and then each note is put through the
+same steps the split tab uses: lexing, parsing, splitting, formatting, naming, and
+saving. Each stage is timed separately and the whole pipeline is timed end to end. A
+second pass measures each stage's peak memory with tracemalloc so that the memory
+tracing does not distort the timings.
+
+The results are saved as JSON so that they can be compared across commits::
+
+    python benchmarks/bench_split.py --notes 200 --lines 400
+    python benchmarks/bench_split.py --compare benchmarks/results/abc1234.json
+"""
+# flake8: noqa: E402
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCHMARKS_FOLDER), "src"))
+
+from corpus import generate_corpus
+from corpus import parse_features
+from note_splitter import tokens
+from note_splitter.formatter_ import Formatter
+from note_splitter.lexer import Lexer
+from note_splitter.note import create_file_names
+from note_splitter.note import FileNameRegistry
+from note_splitter.note import Note
+from note_splitter.output_writer import OutputWriter
+from note_splitter.parser_ import SyntaxTree
+from note_splitter.pipeline import save_split_notes
+from note_splitter.pipeline import SplitConfig
+from note_splitter.splitter import Splitter
+
+
+STAGES = ("lex", "parse", "split", "format", "name", "save")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--notes", type=int, default=100, help="number of notes")
+    parser.add_argument("--lines", type=int, default=300, help="lines per note")
+    parser.add_argument(
+        "--features",
+        default="all",
+        help="feature mix, e.g. 'all' or 'headers=3,text=10,tables,code'",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="timing passes")
+    parser.add_argument("--split-level", type=int, default=2, help="header level")
+    parser.add_argument("--output", help="path of the JSON file to save results to")
+    parser.add_argument("--compare", help="path of a previous JSON result file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown ratio reported as a regression by --compare",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as source_folder_path:
+        paths = generate_corpus(
+            source_folder_path,
+            args.notes,
+            args.lines,
+            parse_features(args.features),
+            args.seed,
+        )
+        contents: list[bytes] = []
+        for path in paths:
+            with open(path, "rb") as file:  # The pipeline lexes the files' bytes.
+                contents.append(file.read())
+        line_count = sum(c.count(b"\n") for c in contents)
+        byte_count = sum(os.path.getsize(p) for p in paths)
+        split_attrs = {"level": args.split_level}
+
+        best: dict[str, float] = {}
+        for _ in range(max(args.repeat, 1)):
+            seconds = run_pipeline(paths, contents, split_attrs)
+            for stage, value in seconds.items():
+                best[stage] = min(value, best.get(stage, value))
+        peaks = run_pipeline(paths, contents, split_attrs, trace_memory=True)
+
+    results: dict[str, Any] = {
+        "commit": get_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": vars(args),
+        "corpus": {"notes": len(paths), "lines": line_count, "bytes": byte_count},
+        "stages": {},
+    }
+    for stage in (*STAGES, "end_to_end"):
+        results["stages"][stage] = {
+            "seconds": best[stage],
+            "lines_per_second": line_count / best[stage] if best[stage] else None,
+            "peak_memory_bytes": peaks[stage],
+        }
+    print_results(results)
+
+    output_path = args.output
+    if not output_path:
+        output_path = os.path.join(
+            BENCHMARKS_FOLDER, "results", f"{results['commit']}.json"
+        )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf8") as file:
+        json.dump(results, file, indent=4)
+    print(f"\nSaved results to {output_path}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf8") as file:
+            previous = json.load(file)
+        if compare_results(previous, results, args.threshold):
+            sys.exit(1)
+
+
+def run_pipeline(
+    paths: list[str],
+    contents: list[bytes],
+    split_attrs: dict,
+    trace_memory: bool = False,
+) -> dict[str, float]:
+    """Puts every note through the pipeline once.
+
+    Parameters
+    ----------
+    paths : list[str]
+        The absolute paths of the source notes.
+    contents : list[bytes]
+        The UTF-8 contents of the source notes, parallel to ``paths``.
+    split_attrs : dict
+        The attributes of the headers to split by.
+    trace_memory : bool, optional
+        If True, each stage's peak memory in bytes is returned instead of its time in
+        seconds.
+
+    Returns
+    -------
+    dict[str, float]
+        Each stage's total time or peak memory, plus ``end_to_end``.
+    """
+    results = {stage: 0.0 for stage in (*STAGES, "end_to_end")}
+    tokenize = Lexer()
+    split = Splitter()
+    format_ = Formatter()
+
+    def measure(stage: str, start: float) -> None:
+        if trace_memory:
+            results[stage] = max(results[stage], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        else:
+            results[stage] += time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as destination_folder_path:
+        config = create_config(destination_folder_path, split_attrs)
+        writer = OutputWriter(FileNameRegistry(destination_folder_path))
+        if trace_memory:
+            tracemalloc.start()
+        total_start = time.perf_counter()
+        for path, content in zip(paths, contents):
+            source_note = Note(path)
+
+            start = time.perf_counter()
+            tokens_ = tokenize(content)
+            measure("lex", start)
+
+            start = time.perf_counter()
+            syntax_tree = SyntaxTree(tokens_, True)
+            measure("parse", start)
+
+            start = time.perf_counter()
+            sections, global_tags = split(
+                syntax_tree.content, tokens.Header, split_attrs, True, False, "#split"
+            )
+            measure("split", start)
+
+            start = time.perf_counter()
+            split_contents = format_(
+                sections=sections,
+                global_tags=global_tags,
+                copy_global_tags=True,
+                copy_frontmatter=True,
+                move_footnotes=True,
+                frontmatter=syntax_tree.frontmatter,
+                footnotes=syntax_tree.footnotes,
+            )
+            measure("format", start)
+
+            start = time.perf_counter()
+            file_names = create_file_names(
+                ".md", r"%Y%M%D%h%m%s", r"%id", split_contents
+            )
+            measure("name", start)
+
+            start = time.perf_counter()
+            save_split_notes(source_note, split_contents, file_names, config, writer)
+            measure("save", start)
+        start = time.perf_counter()
+        writer.close()
+        measure("save", start)
+        if trace_memory:
+            results["end_to_end"] = max(results[s] for s in STAGES)
+            tracemalloc.stop()
+        else:
+            results["end_to_end"] = time.perf_counter() - total_start
+    return results
+
+
+def create_config(destination_folder_path: str, split_attrs: dict) -> SplitConfig:
+    """Creates settings like the split tab's that create index files and backlinks."""
+    return SplitConfig(
+        split_keyword="#split",
+        file_id_format=r"%Y%M%D%h%m%s",
+        file_name_format=r"%id",
+        split_type=tokens.Header,
+        split_attrs=split_attrs,
+        using_split_keyword=True,
+        remove_split_keyword=False,
+        parse_blocks=True,
+        copy_global_tags=True,
+        copy_frontmatter=True,
+        move_footnotes=True,
+        create_index_file=True,
+        create_backlinks=True,
+        source_folder_path=None,
+        destination_folder_path=destination_folder_path,
+        use_split_cache=False,
+        incremental_split=False,
+    )
+
+
+def compare_results(
+    previous: dict[str, Any], current: dict[str, Any], threshold: float
+) -> bool:
+    """Prints how each stage's time changed and returns whether any regressed.
+
+    Parameters
+    ----------
+    previous : dict[str, Any]
+        Results loaded from an earlier run.
+    current : dict[str, Any]
+        Results from this run.
+    threshold : float
+        The minimum slowdown ratio to report as a regression, e.g. 0.1 for 10%.
+    """
+    print(f"\nComparison with {previous['commit']} (lines/sec, higher is better):")
+    regressed = False
+    for stage, stats in current["stages"].items():
+        old_stats = previous["stages"].get(stage)
+        if not old_stats or not old_stats["lines_per_second"]:
+            continue
+        old_rate = old_stats["lines_per_second"]
+        new_rate = stats["lines_per_second"] or 0.0
+        change = new_rate / old_rate - 1
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(
+            f"{stage:>12s} | {old_rate:>12,.0f} -> {new_rate:>12,.0f}"
+            f" ({change:+.1%}){flag}"
+        )
+    return regressed
+
+
+def print_results(results: dict[str, Any]) -> None:
+    corpus = results["corpus"]
+    print(
+        f"{corpus['notes']} notes, {corpus['lines']:,} lines, {corpus['bytes']:,} bytes"
+    )
+    print(
+        f"{'stage':>12s} | {'seconds':>9s} | {'lines/sec':>12s} | {'peak memory':>12s}"
+    )
+    for stage, stats in results["stages"].items():
+        print(
+            f"{stage:>12s} | {stats['seconds']:>9.4f} | "
+            f"{stats['lines_per_second'] or 0:>12,.0f} | "
+            f"{stats['peak_memory_bytes'] / 1024 / 1024:>9.2f} MB"
+        )
+
+
+def get_commit() -> str:
+    """Returns the short hash of the current commit, or "unknown"."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=BENCHMARKS_FOLDER,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""For generating synthetic markdown notes to benchmark the splitting pipeline with.
+
+Each generated note is built from randomly chosen markdown elements. The mix of
+elements is controlled with a dictionary of feature weights, so a corpus can be made
+mostly of prose, mostly of lists, etc. The same seed always creates the same corpus.
+
+Attributes
+----------
+FEATURES : tuple[str, ...]
+    The names of all the markdown features the generator can create.
+DEFAULT_WEIGHTS : dict[str, int]
+    The relative frequency of each feature in a note's body.
+"""
+import os
+import random
+from typing import Callable
+
+
+FEATURES = (
+    "headers",
+    "text",
+    "lists",
+    "tables",
+    "code",
+    "math",
+    "frontmatter",
+    "footnotes",
+    "tags",
+    "links",
+)
+DEFAULT_WEIGHTS = {
+    "headers": 3,
+    "text": 10,
+    "lists": 4,
+    "tables": 1,
+    "code": 2,
+    "math": 1,
+    "frontmatter": 1,
+    "footnotes": 1,
+    "tags": 2,
+    "links": 2,
+}
+WORDS = (
+    "note split markdown section header token lexer parser tree vault folder file "
+    "link index backlink footnote table list item code math block quote tag title "
+    "idea draft research paper chapter summary detail example result method value"
+).split()
+
+
+def parse_features(text: str) -> dict[str, int]:
+    """Parses a feature mix from a command line argument.
+
+    Parameters
+    ----------
+    text : str
+        Either ``all``, or comma-separated feature names that may each be followed by
+        ``=`` and an integer weight, like ``headers=3,text=10,tables``. Features that
+        are not listed are not generated.
+    """
+    if text == "all":
+        return dict(DEFAULT_WEIGHTS)
+    weights: dict[str, int] = {}
+    for item in text.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in FEATURES:
+            raise ValueError(f'Unknown feature "{name}". Choose from {FEATURES}.')
+        weights[name] = int(weight) if weight else DEFAULT_WEIGHTS[name]
+    return weights
+
+
+def generate_corpus(
+    folder_path: str,
+    note_count: int,
+    lines_per_note: int,
+    weights: dict[str, int] | None = None,
+    seed: int = 0,
+    split_keyword: str = "#split",
+) -> list[str]:
+    """Creates a folder of synthetic markdown notes.
+
+    Parameters
+    ----------
+    folder_path : str
+        The absolute path to an existing folder to save the notes in.
+    note_count : int
+        The number of notes to create.
+    lines_per_note : int
+        The approximate number of lines in each note.
+    weights : dict[str, int] | None, optional
+        The relative frequency of each feature. Defaults to ``DEFAULT_WEIGHTS``.
+    seed : int, optional
+        The seed for the random number generator.
+    split_keyword : str, optional
+        The keyword to put near the top of each note.
+
+    Returns
+    -------
+    list[str]
+        The absolute paths of the new notes.
+    """
+    rng = random.Random(seed)
+    paths: list[str] = []
+    for i in range(note_count):
+        path = os.path.join(folder_path, f"note {i:05d}.md")
+        content = generate_note(rng, lines_per_note, weights, split_keyword)
+        with open(path, "w", encoding="utf8") as file:
+            file.write(content)
+        paths.append(path)
+    return paths
+
+
+def generate_note(
+    rng: random.Random,
+    line_count: int,
+    weights: dict[str, int] | None = None,
+    split_keyword: str = "#split",
+) -> str:
+    """Creates the content of one synthetic markdown note.
+
+    Parameters
+    ----------
+    rng : random.Random
+        The random number generator to use.
+    line_count : int
+        The approximate number of lines in the note.
+    weights : dict[str, int] | None, optional
+        The relative frequency of each feature. Defaults to ``DEFAULT_WEIGHTS``.
+    split_keyword : str, optional
+        The keyword to put near the top of the note.
+    """
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
+    lines: list[str] = []
+    if weights.get("frontmatter"):
+        lines.extend(_frontmatter(rng))
+    lines.append(f"# {_sentence(rng, 2, 5)}")
+    lines.append(split_keyword)
+    if weights.get("tags"):
+        lines.append(" ".join(f"#{rng.choice(WORDS)}" for _ in range(3)))
+    lines.append("")
+    body_generators: dict[str, Callable[[random.Random], list[str]]] = {
+        "headers": _header,
+        "text": _text,
+        "lists": _nested_list,
+        "tables": _table,
+        "code": _code_block,
+        "math": _math_block,
+        "footnotes": _footnote_reference,
+        "tags": _tags,
+        "links": _links,
+    }
+    names = [n for n in body_generators if weights.get(n)]
+    if not names:
+        names = ["text"]
+    name_weights = [weights.get(n, 1) for n in names]
+    footnote_count = 0
+    while len(lines) < line_count:
+        name = rng.choices(names, name_weights)[0]
+        if name == "footnotes":
+            footnote_count += 1
+            lines.extend(_footnote_reference(rng, footnote_count))
+        else:
+            lines.extend(body_generators[name](rng))
+        lines.append("")
+    for i in range(1, footnote_count + 1):
+        lines.append(f"[^{i}]: {_sentence(rng, 4, 12)}")
+    return "\n".join(lines) + "\n"
+
+
+def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def _frontmatter(rng: random.Random) -> list[str]:
+    return [
+        "---",
+        f"title: {_sentence(rng, 2, 4)}",
+        f"date: 2022-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        f"tags: [{rng.choice(WORDS)}, {rng.choice(WORDS)}]",
+        "---",
+        "",
+    ]
+
+
+def _header(rng: random.Random) -> list[str]:
+    return [f"{'#' * rng.choice((2, 2, 2, 3, 4))} {_sentence(rng, 1, 6)}"]
+
+
+def _text(rng: random.Random) -> list[str]:
+    return [_sentence(rng, 6, 30) + "." for _ in range(rng.randint(1, 4))]
+
+
+def _nested_list(rng: random.Random) -> list[str]:
+    lines = []
+    for i in range(rng.randint(2, 8)):
+        level = rng.choice((0, 0, 1, 2))
+        indent = "    " * level
+        marker = rng.choice(("*", "-", "+", f"{i + 1}.", "- [ ]", "- [x]"))
+        lines.append(f"{indent}{marker} {_sentence(rng, 2, 10)}")
+    return lines
+
+
+def _table(rng: random.Random) -> list[str]:
+    column_count = rng.randint(2, 5)
+    titles = (_sentence(rng, 1, 2) for _ in range(column_count))
+    lines = ["| " + " | ".join(titles) + " |"]
+    lines.append("|" + "|".join("---" for _ in range(column_count)) + "|")
+    for _ in range(rng.randint(1, 10)):
+        cells = (_sentence(rng, 1, 4) for _ in range(column_count))
+        lines.append("| " + " | ".join(cells) + " |")
+    return lines
+
+
+def _code_block(rng: random.Random) -> list[str]:
+    lines = ["```" + rng.choice(("python", "cpp", "", "bash"))]
+    for _ in range(rng.randint(1, 12)):
+        line = rng.choice(
+            (
+                f"# {_sentence(rng, 2, 5)}",
+                f"print('{_sentence(rng, 1, 4)}')",
+                f"    x = {rng.randint(0, 999)}",
+                "",
+            )
+        )
+        lines.append(line)
+    lines.append("```")
+    return lines
+
+
+def _math_block(rng: random.Random) -> list[str]:
+    lines = ["$$"]
+    for _ in range(rng.randint(1, 4)):
+        lines.append(f"x_{rng.randint(0, 9)} = \\frac{{{rng.randint(1, 99)}}}{{y}}")
+    lines.append("$$")
+    return lines
+
+
+def _footnote_reference(rng: random.Random, number: int = 1) -> list[str]:
+    return [f"{_sentence(rng, 4, 12)}[^{number}] {_sentence(rng, 2, 6)}."]
+
+
+def _tags(rng: random.Random) -> list[str]:
+    return [f"{_sentence(rng, 3, 8)} #{rng.choice(WORDS)}-{rng.choice(WORDS)}"]
+
+
+def _links(rng: random.Random) -> list[str]:
+    return [
+        f"See [{_sentence(rng, 1, 3)}](note {rng.randint(0, 99999):05d}.md) and "
+        f"[{rng.choice(WORDS)}](https://example.com/{rng.choice(WORDS)})."
+    ]
@@ -1,7 +1,31 @@
+import argparse
+import multiprocessing
+import os
 import sys
 from importlib import metadata as importlib_metadata
 
+from note_splitter import profiling
+from note_splitter.daemon import get_default_address
+from note_splitter.daemon import serve
+from note_splitter.daemon import SplitDaemon
+from note_splitter.journal import FolderLockedError
 from note_splitter.main_window import MainWindow
+from note_splitter.note import create_notes
+from note_splitter.note import Note
+from note_splitter.pipeline import execute_plan
+from note_splitter.pipeline import find_notes_with_keyword
+from note_splitter.pipeline import get_notes_in_folder
+from note_splitter.pipeline import open_split_cache
+from note_splitter.pipeline import plan_split
+from note_splitter.pipeline import split_files
+from note_splitter.pipeline import SplitConfig
+from note_splitter.plan import SplitPlan
+from note_splitter.settings import DEFAULT_SETTINGS
+from note_splitter.settings import get_app_data_folder_path
+from note_splitter.watcher import DEFAULT_DEBOUNCE_SECONDS
+from note_splitter.watcher import DEFAULT_INTERVAL_SECONDS
+from note_splitter.watcher import watch
+from PySide6 import QtCore
 from PySide6 import QtWidgets
 
 
@@ -15,6 +39,10 @@ def main():
     # property set to match the value set in app's desktop file. For PySide2
     # this is set with setApplicationName().
 
+    # Lexing huge files in multiple processes starts new copies of the app, which
+    # must not open windows when the app is frozen.
+    multiprocessing.freeze_support()
+
     # Find the name of the module that was used to start the app
     app_module = sys.modules["__main__"].__package__
     # Retrieve the app's metadata
@@ -26,9 +54,35 @@ def main():
     )
     QtWidgets.QApplication.setOrganizationName("Note Splitter")
 
+    args, qt_args = parse_args(sys.argv[1:])
+    if args.profile:
+        profile_folder_path: str = args.profile_folder or get_app_data_folder_path(
+            "profiles"
+        )
+        profiling.enable_profiling(
+            os.path.abspath(profile_folder_path), args.profile_sample_interval
+        )
+        print(f"Saving profiling reports in {profile_folder_path}")
+    if args.daemon is not None:
+        sys.exit(run_daemon(args.daemon or get_default_address()))
+    if args.watch:
+        sys.exit(run_watch(args.destination, args.watch_interval, args.watch_debounce))
+    if args.execute_plan is not None:
+        sys.exit(run_plan(args.execute_plan, not args.roll_back))
+    if args.batch is not None:
+        sys.exit(
+            run_batch(
+                args.batch,
+                args.destination,
+                args.io_concurrency,
+                not args.roll_back,
+                args.plan,
+            )
+        )
+
     QtWidgets.QApplication.setStyle("Fusion")
-    sys.argv += ["-platform", "windows:darkmode=1"]
-    app = QtWidgets.QApplication(sys.argv)
+    qt_args = [sys.argv[0], *qt_args, "-platform", "windows:darkmode=1"]
+    app = QtWidgets.QApplication(qt_args)
     app.setStyleSheet(
         """
         QWidget {
@@ -47,3 +101,302 @@ def main():
     )
     main_window = MainWindow()  # noqa: F841
     sys.exit(app.exec())
+
+
+def parse_args(argv: list[str]) -> tuple[argparse.Namespace, list[str]]:
+    """Parses the app's command line arguments.
+
+    Parameters
+    ----------
+    argv : list[str]
+        The command line arguments, not including the program's name.
+
+    Returns
+    -------
+    args : argparse.Namespace
+        The arguments for Note Splitter.
+    qt_args : list[str]
+        Any other arguments, which are passed on to Qt.
+    """
+    parser = argparse.ArgumentParser(
+        prog="note_splitter", description="Split markdown files into smaller files."
+    )
+    parser.add_argument(
+        "--batch",
+        nargs="*",
+        metavar="FILE",
+        help="split files without opening a window. If no files are given, the files"
+        " in the source folder that have the split keyword are split.",
+    )
+    parser.add_argument(
+        "--destination",
+        help="the folder to save new files in when using --batch. Defaults to the"
+        " destination folder in settings.",
+    )
+    parser.add_argument(
+        "--roll-back",
+        action="store_true",
+        help="when using --batch, undo an earlier split into the destination folder"
+        " that did not finish instead of resuming it",
+    )
+    parser.add_argument(
+        "--io-concurrency",
+        type=int,
+        metavar="N",
+        help="the number of files to read or write at the same time when using"
+        " --batch. Defaults to the setting.",
+    )
+    parser.add_argument(
+        "--plan",
+        metavar="FILE",
+        help="when using --batch, save a plan of the split to FILE and show what it"
+        " will do instead of splitting",
+    )
+    parser.add_argument(
+        "--execute-plan",
+        metavar="FILE",
+        help="split files as planned in FILE without opening a window",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="without opening a window, watch the source folder and split files when"
+        " they gain the split keyword",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=DEFAULT_INTERVAL_SECONDS,
+        metavar="SECONDS",
+        help="how often to scan the source folder when using --watch",
+    )
+    parser.add_argument(
+        "--watch-debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE_SECONDS,
+        metavar="SECONDS",
+        help="how long a file must go without changing before it is read when using"
+        " --watch",
+    )
+    parser.add_argument(
+        "--daemon",
+        nargs="?",
+        const="",
+        metavar="ADDRESS",
+        help="without opening a window, answer split, scan, and move requests sent as"
+        " JSON lines to ADDRESS, which is a Unix domain socket's path or"
+        " localhost:PORT. Defaults to a socket in the app's data folder.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="save cProfile and tracemalloc reports for each split",
+    )
+    parser.add_argument(
+        "--profile-folder",
+        help="the folder to save profiling reports in. Defaults to a folder in the"
+        " app's data folder.",
+    )
+    parser.add_argument(
+        "--profile-sample-interval",
+        type=float,
+        metavar="SECONDS",
+        help="sample the call stack at this interval instead of using cProfile,"
+        " which has less overhead",
+    )
+    return parser.parse_known_args(argv)
+
+
+def run_batch(
+    file_paths: list[str],
+    destination_folder_path: str | None,
+    io_concurrency: int | None = None,
+    resume: bool = True,
+    plan_file_path: str | None = None,
+) -> int:
+    """Splits files using the saved settings without showing any windows.
+
+    Parameters
+    ----------
+    file_paths : list[str]
+        The paths of the files to split. If empty, the files in the source folder that
+        have the split keyword are split.
+    destination_folder_path : str | None
+        The folder to save new files in. If None, the destination folder in settings is
+        used.
+    io_concurrency : int | None, optional
+        The number of files to read or write at the same time. If None, the setting is
+        used.
+    resume : bool, optional
+        Whether to resume an earlier split into the destination folder that did not
+        finish, instead of undoing it first.
+    plan_file_path : str | None, optional
+        If given, the split is planned and the plan is saved here instead of splitting.
+
+    Returns
+    -------
+    int
+        The exit code: 0 if successful, or 1 if there was an error.
+    """
+    config = SplitConfig.from_settings()
+    if destination_folder_path:
+        config.destination_folder_path = os.path.abspath(destination_folder_path)
+    if io_concurrency is not None:
+        config.io_concurrency = io_concurrency
+    if not config.destination_folder_path or not os.path.isdir(
+        config.destination_folder_path
+    ):
+        print("Error: choose an existing destination folder.", file=sys.stderr)
+        return 1
+    notes: list[Note]
+    if file_paths:
+        config.using_split_keyword = False
+        notes = create_notes([os.path.abspath(p) for p in file_paths])
+    else:
+        if not config.source_folder_path:
+            print("Error: choose a source folder in settings.", file=sys.stderr)
+            return 1
+        config.using_split_keyword = True
+        notes = find_notes_with_keyword(
+            config.split_keyword, get_notes_in_folder(config.source_folder_path)
+        )
+    if not notes:
+        print("No files to split.")
+        return 0
+    if plan_file_path:
+        plan: SplitPlan = plan_split(
+            notes,
+            config,
+            cache=open_split_cache(config),
+            trace_folder_path=get_app_data_folder_path("traces"),
+        )
+        plan.save(plan_file_path)
+        for file_path in plan.file_paths:
+            print(file_path)
+        print(plan.summary())
+        print(f"Saved the plan to {plan_file_path}")
+        return 0
+    try:
+        with profiling.profile_run("split"):
+            new_notes: list[Note] = split_files(
+                notes, config, cache=open_split_cache(config), resume=resume
+            )
+    except FolderLockedError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Created {len(new_notes)} files in total.")
+    return 0
+
+
+def run_plan(plan_file_path: str, resume: bool = True) -> int:
+    """Splits files as planned by ``run_batch`` without showing any windows.
+
+    Parameters
+    ----------
+    plan_file_path : str
+        The path to the saved plan.
+    resume : bool, optional
+        Whether to resume an earlier split into the destination folder that did not
+        finish, instead of undoing it first.
+
+    Returns
+    -------
+    int
+        The exit code: 0 if successful, or 1 if there was an error.
+    """
+    try:
+        plan = SplitPlan.load(plan_file_path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Error: could not load the plan: {e}", file=sys.stderr)
+        return 1
+    if not os.path.isdir(plan.config["destination_folder_path"]):
+        print("Error: the plan's destination folder does not exist.", file=sys.stderr)
+        return 1
+    try:
+        with profiling.profile_run("split"):
+            new_notes: list[Note] = execute_plan(plan, resume=resume)
+    except FolderLockedError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Created {len(new_notes)} files in total.")
+    return 0
+
+
+def run_watch(
+    destination_folder_path: str | None,
+    interval_seconds: float,
+    debounce_seconds: float,
+) -> int:
+    """Watches the source folder and splits files that gain the split keyword.
+
+    This runs until it is interrupted, such as with ctrl+c.
+
+    Parameters
+    ----------
+    destination_folder_path : str | None
+        The folder to save new files in. If None, the destination folder in settings is
+        used.
+    interval_seconds : float
+        How often to scan the source folder.
+    debounce_seconds : float
+        How long a file must go without changing before it is read.
+
+    Returns
+    -------
+    int
+        The exit code: 0 if interrupted, or 1 if there was an error.
+    """
+    config = SplitConfig.from_settings()
+    if destination_folder_path:
+        config.destination_folder_path = os.path.abspath(destination_folder_path)
+    if not config.source_folder_path or not os.path.isdir(config.source_folder_path):
+        print("Error: choose an existing source folder in settings.", file=sys.stderr)
+        return 1
+    if not config.destination_folder_path or not os.path.isdir(
+        config.destination_folder_path
+    ):
+        print("Error: choose an existing destination folder.", file=sys.stderr)
+        return 1
+    note_types: list[str] = QtCore.QSettings().value(
+        "note_types", DEFAULT_SETTINGS["note_types"]
+    )
+    print(f"Watching {config.source_folder_path}. Press ctrl+c to stop.")
+    try:
+        watch(
+            config,
+            note_types,
+            interval_seconds,
+            debounce_seconds,
+            open_split_cache(config),
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run_daemon(address: str) -> int:
+    """Answers requests from other programs until a shutdown request or ctrl+c.
+
+    Parameters
+    ----------
+    address : str
+        The Unix domain socket's path or ``localhost:PORT`` to listen at.
+
+    Returns
+    -------
+    int
+        The exit code: 0 if stopped, or 1 if there was an error.
+    """
+    note_types: list[str] = QtCore.QSettings().value(
+        "note_types", DEFAULT_SETTINGS["note_types"]
+    )
+    split_daemon = SplitDaemon(note_types)
+    print(f"Listening at {address}. Press ctrl+c to stop.")
+    try:
+        serve(split_daemon, address)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,289 @@
+"""For finding the notes in the user's notes folder by path, title, or file ID.
+
+A ``NoteCatalog`` holds each note along with its file's modification time and file ID,
+and keeps indexes so that finding a note takes the same time no matter how many notes
+there are. The catalog is updated as notes are created, moved, or deleted, and scanning
+the folder again only creates notes for files that are new or changed.
+
+Each note's file size, modification time, and any title and tags that were read can be
+saved to a cache file in the app's data folder. When the folder is scanned after the
+cache is loaded, notes whose files have the same size and modification time as when
+they were saved get their title and tags from the cache instead of from their files.
+"""
+import hashlib
+import json
+import os
+import re
+from typing import Any
+from typing import Iterator
+
+from note_splitter.note import Note
+from note_splitter.note import write_text_atomically
+from note_splitter.settings import get_app_data_folder_path
+
+
+CACHE_VERSION = 1
+
+
+class NoteCatalog:
+    """The notes in a folder, indexed by path, title, and file ID.
+
+    The title index is only made the first time a note is found by title, because
+    that needs every note's title, which may need every note's file to be read.
+
+    Parameters
+    ----------
+    notes : list[Note], optional
+        The notes to add.
+    file_id_regex : str, optional
+        The uncompiled regular expression to find file IDs in file names with. If
+        empty, notes do not have file IDs.
+    """
+
+    def __init__(self, notes: list[Note] | None = None, file_id_regex: str = ""):
+        self.__notes: dict[str, Note] = {}
+        self.__mtimes: dict[str, float] = {}
+        self.__sizes: dict[str, int] = {}
+        self.__file_ids: dict[str, str] = {}
+        self.__paths_by_id: dict[str, dict[str, None]] = {}
+        self.__paths_by_title: dict[str, dict[str, None]] | None = None
+        self.__file_id_regex: str | None = None
+        self.__file_id_pattern: re.Pattern | None = None
+        self.__saved: dict[str, dict[str, Any]] = {}
+        self.set_file_id_regex(file_id_regex)
+        for note in notes or []:
+            self.add(note)
+
+    def __len__(self) -> int:
+        return len(self.__notes)
+
+    def __iter__(self) -> Iterator[Note]:
+        return iter(list(self.__notes.values()))
+
+    def __contains__(self, file_path: str) -> bool:
+        return _normalize(file_path) in self.__notes
+
+    @property
+    def notes(self) -> list[Note]:
+        """All the notes, in the order they were added."""
+        return list(self.__notes.values())
+
+    def set_file_id_regex(self, file_id_regex: str) -> None:
+        """Changes how file IDs are found and finds every note's file ID again.
+
+        Parameters
+        ----------
+        file_id_regex : str
+            The uncompiled regular expression to find file IDs in file names with. If
+            empty, notes do not have file IDs.
+        """
+        if file_id_regex == self.__file_id_regex:
+            return
+        self.__file_id_regex = file_id_regex
+        self.__file_id_pattern = re.compile(file_id_regex) if file_id_regex else None
+        self.__file_ids = {}
+        self.__paths_by_id = {}
+        for path, note in self.__notes.items():
+            self.__index_file_id(path, note)
+
+    def add(self, note: Note, stat: os.stat_result | None = None) -> None:
+        """Adds a note, or replaces the note that has the same path.
+
+        Parameters
+        ----------
+        note : Note
+            The note to add. Its file must exist.
+        stat : os.stat_result | None, optional
+            The result of ``os.stat`` for the note's file, if it is already known.
+        """
+        path: str = _normalize(note.path)
+        if path in self.__notes:
+            self.remove(path)
+        if stat is None:
+            stat = os.stat(path)
+        self.__notes[path] = note
+        self.__mtimes[path] = stat.st_mtime
+        self.__sizes[path] = stat.st_size
+        self.__index_file_id(path, note)
+        if self.__paths_by_title is not None:
+            self.__paths_by_title.setdefault(note.title, {})[path] = None
+
+    def remove(self, file_path: str) -> Note | None:
+        """Removes a note and returns it, or returns None if it is not in the catalog.
+
+        Parameters
+        ----------
+        file_path : str
+            The absolute path to the note's file.
+        """
+        path: str = _normalize(file_path)
+        note: Note | None = self.__notes.pop(path, None)
+        if note is None:
+            return None
+        del self.__mtimes[path]
+        del self.__sizes[path]
+        file_id: str | None = self.__file_ids.pop(path, None)
+        if file_id is not None:
+            _remove_from_index(self.__paths_by_id, file_id, path)
+        if self.__paths_by_title is not None:
+            _remove_from_index(self.__paths_by_title, note.title, path)
+        return note
+
+    def move(self, old_file_path: str, note: Note) -> None:
+        """Updates the catalog after a note's file was moved or renamed.
+
+        Parameters
+        ----------
+        old_file_path : str
+            The absolute path the note's file had before it was moved.
+        note : Note
+            The note, with its new path.
+        """
+        self.remove(old_file_path)
+        self.add(note)
+
+    def scan_folder(self, folder_path: str, note_types: list[str]) -> None:
+        """Updates the catalog to have the notes in a folder, not including subfolders.
+
+        Notes whose files have not changed since they were added are kept, notes whose
+        files no longer exist are removed, and new notes are created for the other
+        files. Notes that are not in the folder are removed.
+
+        Parameters
+        ----------
+        folder_path : str
+            The absolute path to the folder.
+        note_types : list[str]
+            The file extensions note files can have, each including the period.
+        """
+        found_paths: set[str] = set()
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1] not in note_types:
+                    continue
+                if not entry.is_file():
+                    continue
+                path: str = _normalize(os.path.join(folder_path, entry.name))
+                found_paths.add(path)
+                stat: os.stat_result = entry.stat()
+                if (
+                    self.__mtimes.get(path) == stat.st_mtime
+                    and self.__sizes.get(path) == stat.st_size
+                ):
+                    continue
+                saved: dict[str, Any] | None = self.__saved.pop(path, None)
+                if (
+                    saved is not None
+                    and saved["mtime"] == stat.st_mtime
+                    and saved["size"] == stat.st_size
+                ):
+                    note = Note(
+                        path, folder_path, entry.name, saved["title"], saved["tags"]
+                    )
+                else:
+                    note = Note(path, folder_path, entry.name)
+                self.add(note, stat)
+        for path in [p for p in self.__notes if p not in found_paths]:
+            self.remove(path)
+
+    def load(self, file_path: str) -> None:
+        """Loads note metadata saved by ``save`` to use in later scans.
+
+        A cache file that is missing, damaged, or from another version is ignored.
+
+        Parameters
+        ----------
+        file_path : str
+            The absolute path to the cache file.
+        """
+        try:
+            with open(file_path, "r", encoding="utf8") as file:
+                data: dict[str, Any] = json.load(file)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+            self.__saved = data["notes"]
+
+    def save(self, file_path: str) -> None:
+        """Saves the notes' metadata to a cache file.
+
+        Only titles and tags that are already known are saved, so no files are read.
+
+        Parameters
+        ----------
+        file_path : str
+            The absolute path to the cache file.
+        """
+        notes: dict[str, dict[str, Any]] = {
+            path: {
+                "size": self.__sizes[path],
+                "mtime": self.__mtimes[path],
+                "title": note.known_title,
+                "tags": note.known_tags,
+            }
+            for path, note in self.__notes.items()
+        }
+        write_text_atomically(
+            file_path, json.dumps({"version": CACHE_VERSION, "notes": notes})
+        )
+
+    def get_by_path(self, file_path: str) -> Note | None:
+        """Gets a note by its file's absolute path, or None if there is none."""
+        return self.__notes.get(_normalize(file_path))
+
+    def get_by_title(self, title: str) -> list[Note]:
+        """Gets the notes that have a title, in the order they were added."""
+        if self.__paths_by_title is None:
+            self.__paths_by_title = {}
+            for path, note in self.__notes.items():
+                self.__paths_by_title.setdefault(note.title, {})[path] = None
+        return [self.__notes[p] for p in self.__paths_by_title.get(title, {})]
+
+    def get_by_id(self, file_id: str) -> Note | None:
+        """Gets the note with a file ID, or None if there is none.
+
+        If more than one note has the file ID, the one added first is returned.
+        """
+        for path in self.__paths_by_id.get(file_id, {}):
+            return self.__notes[path]
+        return None
+
+    def get_mtime(self, file_path: str) -> float:
+        """Gets the modification time a note's file had when the note was added."""
+        return self.__mtimes[_normalize(file_path)]
+
+    def get_file_id(self, file_path: str) -> str | None:
+        """Gets a note's file ID, or None if its file name does not have one."""
+        return self.__file_ids.get(_normalize(file_path))
+
+    def __index_file_id(self, path: str, note: Note) -> None:
+        if self.__file_id_pattern is None:
+            return
+        match = self.__file_id_pattern.search(note.name)
+        if match:
+            self.__file_ids[path] = match[0]
+            self.__paths_by_id.setdefault(match[0], {})[path] = None
+
+
+def _normalize(file_path: str) -> str:
+    return os.path.normpath(file_path).replace("\\", "/")
+
+
+def _remove_from_index(index: dict[str, dict[str, None]], key: str, path: str) -> None:
+    paths: dict[str, None] | None = index.get(key)
+    if paths is not None:
+        paths.pop(path, None)
+        if not paths:
+            del index[key]
+
+
+def get_cache_file_path(folder_path: str) -> str:
+    """Gets the path to the cache file of a notes folder's metadata.
+
+    Parameters
+    ----------
+    folder_path : str
+        The absolute path to the notes folder.
+    """
+    folder_hash: str = hashlib.sha256(_normalize(folder_path).encode()).hexdigest()
+    return os.path.join(get_app_data_folder_path("note_catalog"), f"{folder_hash}.json")
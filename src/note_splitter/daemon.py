@@ -0,0 +1,408 @@
+"""For splitting, scanning, and moving notes through a long-running process.
+
+Starting Note Splitter imports PySide6, compiles the patterns, and finds the notes in
+the source folder, which can take seconds. The daemon (``python -m note_splitter
+--daemon``) does that once and then answers requests from other programs, such as
+editor plugins, so each request only does the work it asks for. It keeps the source
+folder's ``NoteCatalog``, an index of the links between its notes, and the split cache
+open between requests.
+
+Requests and responses are JSON objects, one per line, sent over a Unix domain socket,
+or over a TCP socket on localhost where Unix domain sockets are not available. Each
+request has a ``"command"``:
+
+``{"command": "ping"}``
+    Checks that the daemon is running.
+``{"command": "scan", "keyword": "#split"}``
+    Updates the catalog of the source folder and rebuilds the link index. If a keyword
+    is given, the paths of the notes that have it are returned as ``"file_paths"``.
+``{"command": "split", "files": [...], "destination": "...", "resume": true}``
+    Splits files. If ``"files"`` is missing, the notes in the source folder that have
+    the split keyword are split. ``"destination"`` and ``"resume"`` are optional. The
+    paths of the new files are returned as ``"new_files"``.
+``{"command": "move", "files": [...], "destination": "..."}``
+    Moves notes and updates the links to them. The new path of each moved file is
+    returned in ``"moved"``, and why any other file was not moved in ``"skipped"``.
+``{"command": "shutdown"}``
+    Stops the daemon after answering.
+
+Every response has ``"ok"``, which is false if the request failed, in which case
+``"error"`` says why. A request's ``"id"``, if it has one, is copied to its response.
+Settings are read for each request, so changes made in the app are used right away.
+"""
+import json
+import os
+import re
+import socket
+import socketserver
+import time
+from typing import Any
+from typing import Callable
+
+from note_splitter.catalog import get_cache_file_path
+from note_splitter.catalog import NoteCatalog
+from note_splitter.note import create_notes
+from note_splitter.note import LinkIndex
+from note_splitter.note import move_files
+from note_splitter.note import Note
+from note_splitter.pipeline import find_notes_with_keyword
+from note_splitter.pipeline import open_split_cache
+from note_splitter.pipeline import split_files
+from note_splitter.pipeline import SplitConfig
+from note_splitter.settings import get_app_data_folder_path
+from note_splitter.split_cache import SplitCache
+
+
+DEFAULT_PORT = 47823
+TCP_ADDRESS_PATTERN = re.compile(r"^(?:localhost|127\.0\.0\.1):(\d+)$")
+
+
+class SplitDaemon:
+    """Answers split, scan, and move requests, keeping what it loads between them.
+
+    The link index is kept up to date as notes are moved. Before each move, the notes
+    that changed since the index was last updated are indexed again, so only they are
+    read. Links to files that did not exist when a note was indexed are found after a
+    scan request.
+
+    Parameters
+    ----------
+    note_types : list[str]
+        The file extensions note files can have, each including the period.
+    get_config : Callable[[], SplitConfig], optional
+        A function that returns the settings to use for a request.
+
+    Attributes
+    ----------
+    catalog : NoteCatalog
+        The notes in the source folder.
+    stopped : bool
+        Whether a shutdown request was answered.
+    """
+
+    def __init__(
+        self,
+        note_types: list[str],
+        get_config: Callable[[], SplitConfig] = SplitConfig.from_settings,
+    ):
+        self.note_types = note_types
+        self.get_config = get_config
+        self.catalog = NoteCatalog()
+        self.stopped = False
+        self.__catalog_folder_path: str | None = None
+        self.__link_index: LinkIndex | None = None
+        self.__indexed_mtimes: dict[str, float] = {}
+        self.__split_cache: SplitCache | None = None
+
+    def handle_line(self, line: str) -> str:
+        """Answers a request that is a line of JSON with a line of JSON.
+
+        Parameters
+        ----------
+        line : str
+            The request, with or without a trailing newline.
+
+        Returns
+        -------
+        str
+            The response, without a trailing newline.
+        """
+        try:
+            request: Any = json.loads(line)
+        except ValueError as e:
+            return json.dumps({"ok": False, "error": f"invalid JSON: {e}"})
+        if not isinstance(request, dict):
+            return json.dumps({"ok": False, "error": "a request must be an object"})
+        return json.dumps(self.handle(request))
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Answers a request.
+
+        Parameters
+        ----------
+        request : dict[str, Any]
+            The request. See the module's description for the commands.
+
+        Returns
+        -------
+        dict[str, Any]
+            The response.
+        """
+        start: float = time.perf_counter()
+        handlers: dict[str, Callable[[dict[str, Any]], dict[str, Any]]] = {
+            "ping": lambda _: {},
+            "scan": self.__scan,
+            "split": self.__split,
+            "move": self.__move,
+            "shutdown": self.__shutdown,
+        }
+        command: Any = request.get("command")
+        response: dict[str, Any]
+        if command not in handlers:
+            response = {"ok": False, "error": f"unknown command: {command!r}"}
+        else:
+            try:
+                response = {"ok": True, **handlers[command](request)}
+            except (OSError, ValueError, TypeError, KeyError) as e:
+                response = {"ok": False, "error": str(e)}
+        if "id" in request:
+            response["id"] = request["id"]
+        response["seconds"] = time.perf_counter() - start
+        return response
+
+    def __scan(self, request: dict[str, Any]) -> dict[str, Any]:
+        config: SplitConfig = self.get_config()
+        self.__scan_source_folder(config)
+        self.__link_index = None
+        response: dict[str, Any] = {"note_count": len(self.catalog)}
+        keyword: Any = request.get("keyword")
+        if keyword:
+            notes: list[Note] = find_notes_with_keyword(
+                str(keyword), self.catalog.notes
+            )
+            response["file_paths"] = [n.path for n in notes]
+        return response
+
+    def __split(self, request: dict[str, Any]) -> dict[str, Any]:
+        config: SplitConfig = self.get_config()
+        if request.get("destination"):
+            config.destination_folder_path = os.path.abspath(request["destination"])
+        if not os.path.isdir(config.destination_folder_path or ""):
+            raise ValueError("the destination folder does not exist")
+        notes: list[Note]
+        if "files" in request:
+            config.using_split_keyword = False
+            notes = create_notes(_get_paths(request, "files"))
+        else:
+            config.using_split_keyword = True
+            self.__scan_source_folder(config)
+            notes = find_notes_with_keyword(config.split_keyword, self.catalog.notes)
+        new_notes: list[Note] = split_files(
+            notes,
+            config,
+            cache=self.__get_split_cache(config),
+            resume=bool(request.get("resume", True)),
+        )
+        return {"new_files": [n.path for n in new_notes]}
+
+    def __move(self, request: dict[str, Any]) -> dict[str, Any]:
+        config: SplitConfig = self.get_config()
+        file_paths: list[str] = _get_paths(request, "files")
+        if not request.get("destination"):
+            raise ValueError("a destination folder is required")
+        destination: str = os.path.abspath(request["destination"])
+        if not os.path.isdir(destination):
+            raise ValueError("the destination folder does not exist")
+        self.__scan_source_folder(config)
+        link_index: LinkIndex = self.__update_link_index()
+        skipped: dict[str, str] = {}
+        moved: dict[str, str] = {}
+        new_paths: set[str] = set()
+        for path in file_paths:
+            new_path = os.path.join(destination, os.path.basename(path))
+            if not os.path.isfile(path):
+                skipped[path] = "file not found"
+            elif os.path.exists(new_path):
+                skipped[path] = f"file already exists: {new_path}"
+            elif new_path in new_paths:
+                skipped[path] = f"another file is already being moved to {new_path}"
+            else:
+                new_paths.add(new_path)
+                moved[path] = new_path
+        changes: dict[str, str] = {}
+        if moved:
+            changes = move_files(
+                list(moved),
+                destination,
+                self.catalog.notes,
+                self.note_types,
+                link_index,
+            )
+        assert self.__catalog_folder_path is not None
+        self.catalog.scan_folder(self.__catalog_folder_path, self.note_types)
+        self.__indexed_mtimes = {
+            n.path: self.catalog.get_mtime(n.path) for n in self.catalog
+        }
+        return {"moved": moved, "skipped": skipped, "notes_rewritten": len(changes)}
+
+    def __shutdown(self, request: dict[str, Any]) -> dict[str, Any]:
+        self.stopped = True
+        return {}
+
+    def __scan_source_folder(self, config: SplitConfig) -> None:
+        """Updates the catalog to have the notes in the source folder."""
+        folder_path: str | None = config.source_folder_path
+        if not folder_path or not os.path.isdir(folder_path):
+            raise ValueError("choose an existing source folder in settings")
+        if folder_path != self.__catalog_folder_path:
+            self.catalog = NoteCatalog()
+            self.catalog.load(get_cache_file_path(folder_path))
+            self.__catalog_folder_path = folder_path
+            self.__link_index = None
+        self.catalog.scan_folder(folder_path, self.note_types)
+        self.catalog.save(get_cache_file_path(folder_path))
+
+    def __update_link_index(self) -> LinkIndex:
+        """Indexes the links in the notes that changed since they were last indexed."""
+        mtimes: dict[str, float] = {
+            n.path: self.catalog.get_mtime(n.path) for n in self.catalog
+        }
+        if self.__link_index is None:
+            self.__link_index = LinkIndex(self.catalog.notes)
+        else:
+            for path in self.__indexed_mtimes.keys() - mtimes.keys():
+                self.__link_index.remove_note(path)
+                self.__link_index.path_cache.invalidate(path)
+            for path, mtime in mtimes.items():
+                if self.__indexed_mtimes.get(path) == mtime:
+                    continue
+                self.__link_index.path_cache.invalidate(path)
+                try:
+                    with open(path, "r", encoding="utf8") as file:
+                        self.__link_index.update_note(path, file.read())
+                except FileNotFoundError:
+                    self.__link_index.remove_note(path)
+        self.__indexed_mtimes = mtimes
+        return self.__link_index
+
+    def __get_split_cache(self, config: SplitConfig) -> SplitCache | None:
+        """Gets the split cache, opening it the first time it is needed."""
+        if not config.use_split_cache:
+            return None
+        if self.__split_cache is None:
+            self.__split_cache = open_split_cache(config)
+        return self.__split_cache
+
+
+class _TCPServer(socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+def _get_paths(request: dict[str, Any], key: str) -> list[str]:
+    paths: Any = request.get(key)
+    if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+        raise ValueError(f'"{key}" must be a list of file paths')
+    return [os.path.abspath(p) for p in paths]
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answers each line a client sends until it disconnects or the daemon stops."""
+
+    def handle(self) -> None:
+        split_daemon: SplitDaemon = self.server.split_daemon  # type: ignore
+        for line in self.rfile:
+            response: str = split_daemon.handle_line(line.decode("utf8"))
+            self.wfile.write(response.encode("utf8") + b"\n")
+            self.wfile.flush()
+            if split_daemon.stopped:
+                return
+
+
+def get_default_address() -> str:
+    """Gets the address the daemon listens at if no address is chosen.
+
+    This is a Unix domain socket in the app's data folder, or port ``DEFAULT_PORT`` on
+    localhost where Unix domain sockets are not available.
+    """
+    if hasattr(socketserver, "UnixStreamServer"):
+        return os.path.join(get_app_data_folder_path(), "daemon.sock")
+    return f"localhost:{DEFAULT_PORT}"
+
+
+def create_server(split_daemon: SplitDaemon, address: str) -> socketserver.BaseServer:
+    """Creates a server that passes requests to a daemon, one connection at a time.
+
+    Parameters
+    ----------
+    split_daemon : SplitDaemon
+        The daemon to answer the requests.
+    address : str
+        Either ``localhost:PORT`` to listen on a TCP port that only this computer can
+        connect to, or the path of a Unix domain socket to create. Only the current
+        user can connect to the socket.
+
+    Raises
+    ------
+    OSError
+        If the address is in use, such as by another daemon.
+    """
+    server: socketserver.BaseServer
+    match = TCP_ADDRESS_PATTERN.match(address)
+    if match:
+        server = _TCPServer(("127.0.0.1", int(match[1])), _RequestHandler)
+    else:
+        if os.path.exists(address):
+            if _is_listening(address):
+                raise OSError(f"a daemon is already listening at {address}")
+            os.remove(address)  # Left behind by a daemon that did not stop cleanly.
+        # The socket must never be accessible to other users, even briefly.
+        old_umask: int = os.umask(0o077)
+        try:
+            server = socketserver.UnixStreamServer(address, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+    server.split_daemon = split_daemon  # type: ignore
+    return server
+
+
+def serve(split_daemon: SplitDaemon, address: str) -> None:
+    """Answers requests until a shutdown request is answered.
+
+    Parameters
+    ----------
+    split_daemon : SplitDaemon
+        The daemon to answer the requests.
+    address : str
+        The address to listen at (see ``create_server``).
+    """
+    server: socketserver.BaseServer = create_server(split_daemon, address)
+    try:
+        while not split_daemon.stopped:
+            server.handle_request()
+    finally:
+        server.server_close()
+        if not TCP_ADDRESS_PATTERN.match(address) and os.path.exists(address):
+            os.remove(address)
+
+
+def send_request(
+    address: str, request: dict[str, Any], timeout: float | None = None
+) -> dict[str, Any]:
+    """Sends a request to a daemon and returns its response.
+
+    Parameters
+    ----------
+    address : str
+        The address the daemon listens at (see ``create_server``).
+    request : dict[str, Any]
+        The request.
+    timeout : float | None, optional
+        How many seconds to wait for the response. If None, this waits until the
+        response comes.
+    """
+    with _connect(address, timeout) as client:
+        client.sendall(json.dumps(request).encode("utf8") + b"\n")
+        with client.makefile("rb") as file:
+            return json.loads(file.readline())
+
+
+def _connect(address: str, timeout: float | None) -> socket.socket:
+    match = TCP_ADDRESS_PATTERN.match(address)
+    if match:
+        return socket.create_connection(("127.0.0.1", int(match[1])), timeout)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(address)
+    except OSError:
+        client.close()
+        raise
+    return client
+
+
+def _is_listening(socket_path: str) -> bool:
+    try:
+        _connect(socket_path, 1.0).close()
+    except OSError:
+        return False
+    return True
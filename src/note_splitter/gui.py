@@ -1,5 +1,9 @@
 """Various functions for building the graphical user interface."""
+from note_splitter.catalog import NoteCatalog
+from note_splitter.instrumentation import Trace
 from note_splitter.note import create_notes
+from note_splitter.note import LinkIndex
+from note_splitter.note import move_notes
 from note_splitter.note import Note
 from note_splitter.settings import DEFAULT_SETTINGS
 from note_splitter.settings import show_message
@@ -108,26 +112,115 @@ def request_folder_path(folder_description: str) -> str | None:
     return folder_path
 
 
+class NoteListModel(QtCore.QAbstractListModel):
+    """A list of notes for a view, with each note addressed by its row.
+
+    A row's text is only made when a view shows the row, so a note's file is only read
+    to get its title if the note is shown.
+
+    Parameters
+    ----------
+    notes : list[Note]
+        The notes to list. The list is changed when notes are removed.
+    parent : QtCore.QObject | None, optional
+        The model's parent.
+    """
+
+    MAX_REMOVED_RANGES = 100
+
+    def __init__(self, notes: list[Note], parent: QtCore.QObject | None = None):
+        super().__init__(parent)
+        self.notes = notes
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.notes)
+
+    def data(
+        self,
+        index: QtCore.QModelIndex,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ) -> str | None:
+        if not index.isValid() or not 0 <= index.row() < len(self.notes):
+            return None
+        note: Note = self.notes[index.row()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return f"[[{note.name}]] {note.title}"
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole:
+            return note.path
+        return None
+
+    def get_notes(self, indexes: list[QtCore.QModelIndex]) -> list[Note]:
+        """Gets the notes of some rows in the order of their rows.
+
+        Parameters
+        ----------
+        indexes : list[QtCore.QModelIndex]
+            The indexes of the rows, such as a view's selected rows.
+        """
+        rows: list[int] = sorted({index.row() for index in indexes})
+        return [self.notes[row] for row in rows]
+
+    def remove_notes(self, notes: list[Note]) -> None:
+        """Removes notes from the list.
+
+        Each group of neighboring rows is removed at once. If there are very many
+        groups, the whole list is reset instead, which is faster.
+
+        Parameters
+        ----------
+        notes : list[Note]
+            The notes to remove. Notes that are not in the list are ignored.
+        """
+        removed_ids: set[int] = {id(note) for note in notes}
+        ranges: list[list[int]] = []  # Each range's start and stop, like a slice's.
+        for row, note in enumerate(self.notes):
+            if id(note) in removed_ids:
+                if ranges and ranges[-1][1] == row:
+                    ranges[-1][1] = row + 1
+                else:
+                    ranges.append([row, row + 1])
+        if not ranges:
+            return
+        if len(ranges) > self.MAX_REMOVED_RANGES:
+            self.beginResetModel()
+            self.notes[:] = [n for n in self.notes if id(n) not in removed_ids]
+            self.endResetModel()
+            return
+        for start, stop in reversed(ranges):
+            self.beginRemoveRows(QtCore.QModelIndex(), start, stop - 1)
+            del self.notes[start:stop]
+            self.endRemoveRows()
+
+
 class SplitSummaryDialog(QtWidgets.QDialog):
     def __init__(
-        self, new_notes: list[Note], all_notes: list[Note], parent: QtWidgets.QWidget
+        self,
+        new_notes: list[Note],
+        catalog: NoteCatalog,
+        parent: QtWidgets.QWidget,
+        trace: Trace | None = None,
     ):
         super().__init__(parent, QtCore.Qt.WindowType.Window)
         self.new_notes = new_notes
-        self.all_notes = all_notes
+        self.catalog = catalog
+        self.link_index: LinkIndex | None = None
         self.layout = QtWidgets.QVBoxLayout(self)
         self.note_count_label = QtWidgets.QLabel(f"{len(self.new_notes)} files created")
         self.layout.addWidget(self.note_count_label)
-        self.notes_list_widget = QtWidgets.QListWidget()
-        self.notes_list_widget.addItems(
-            f"[[{n.name}]] {n.title}" for n in self.new_notes
-        )
-        self.notes_list_widget.setMinimumWidth(600)
-        self.notes_list_widget.setSelectionMode(
+        self.notes_model = NoteListModel(self.new_notes, self)
+        self.notes_list_view = QtWidgets.QListView()
+        # With uniform item sizes, the view only asks for the text of the rows it
+        # shows instead of measuring every row.
+        self.notes_list_view.setUniformItemSizes(True)
+        self.notes_list_view.setModel(self.notes_model)
+        self.notes_list_view.setMinimumWidth(600)
+        self.notes_list_view.setSelectionMode(
             QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection
         )
         group_box_layout = QtWidgets.QVBoxLayout()
-        group_box_layout.addWidget(self.notes_list_widget)
+        group_box_layout.addWidget(self.notes_list_view)
         notes_buttons_layout = QtWidgets.QHBoxLayout()
         group_box_layout.addLayout(notes_buttons_layout)
         self.open_button = QtWidgets.QPushButton("open")
@@ -145,94 +238,80 @@ class SplitSummaryDialog(QtWidgets.QDialog):
         group_box = QtWidgets.QGroupBox()
         group_box.setLayout(group_box_layout)
         self.layout.addWidget(group_box)
+        if trace is not None:
+            trace_layout = QtWidgets.QVBoxLayout()
+            trace_text_browser = QtWidgets.QTextBrowser()
+            trace_text_browser.setPlainText(trace.summary())
+            trace_layout.addWidget(trace_text_browser)
+            trace_group_box = QtWidgets.QGroupBox("performance trace")
+            trace_group_box.setLayout(trace_layout)
+            self.layout.addWidget(trace_group_box)
         self.ok_button = QtWidgets.QPushButton("ok")
         self.ok_button.clicked.connect(self.accept)
         self.layout.addWidget(self.ok_button)
 
     def __open_notes(self) -> None:
         """Opens the selected notes for the user to view."""
-        selected_items: list[
-            QtWidgets.QListWidgetItem
-        ] = self.notes_list_widget.selectedItems()
-        if not selected_items:
+        selected_notes: list[Note] = self.__get_selected_notes()
+        if not selected_notes:
             show_message("No notes selected.")
             return
-        for note_list_widget_item in selected_items:
-            note_title: str = "]]".join(
-                note_list_widget_item.text().split("]]", 1)[1:]
-            )[1:]
-            note: Note
-            for note in self.new_notes:
-                if note.title == note_title:
-                    break
+        for note in selected_notes:
             note.open()
 
     def __delete_notes(self) -> None:
         """Moves the selected notes to the trash."""
-        selected_items: list[
-            QtWidgets.QListWidgetItem
-        ] = self.notes_list_widget.selectedItems()
-        if not selected_items:
+        selected_notes: list[Note] = self.__get_selected_notes()
+        if not selected_notes:
             show_message("No notes selected.")
             return
         if not request_confirmation(
             "Are you sure you want to delete the selected notes?"
         ):
             return
-        for note_list_widget_item in selected_items:
-            note_title: str = "]]".join(
-                note_list_widget_item.text().split("]]", 1)[1:]
-            )[1:]
-            note: Note
-            for note in self.new_notes:
-                if note.title == note_title:
-                    break
+        for note in selected_notes:
             note.delete()
-            self.new_notes.remove(note)
-            self.notes_list_widget.takeItem(
-                self.notes_list_widget.row(note_list_widget_item)
-            )
+            self.catalog.remove(note.path)
+            if self.link_index is not None:
+                self.link_index.remove_note(note.path)
+                self.link_index.path_cache.invalidate(note.path)
+        self.notes_model.remove_notes(selected_notes)
 
     def __move_notes(self) -> None:
-        """Moves the selected notes and updates internal links to them."""
-        selected_items: list[
-            QtWidgets.QListWidgetItem
-        ] = self.notes_list_widget.selectedItems()
-        if not selected_items:
+        """Moves the selected notes and updates internal links to them.
+
+        The index of links is created the first time notes are moved and then reused.
+        """
+        selected_notes: list[Note] = self.__get_selected_notes()
+        if not selected_notes:
             show_message("No notes selected.")
             return
         if destination := request_folder_path("destination"):
             note_types: list[str] = QtCore.QSettings().value(
                 "note_types", DEFAULT_SETTINGS["note_types"]
             )
-            for note_list_widget_item in selected_items:
-                note_title: str = "]]".join(
-                    note_list_widget_item.text().split("]]", 1)[1:]
-                )[1:]
-                note: Note
-                for note in self.new_notes:
-                    if note.title == note_title:
-                        break
-                note.move(destination, self.all_notes, note_types)
-                self.new_notes.remove(note)
-                self.notes_list_widget.takeItem(
-                    self.notes_list_widget.row(note_list_widget_item)
-                )
+            all_notes: list[Note] = self.catalog.notes
+            if self.link_index is None:
+                self.link_index = LinkIndex(all_notes)
+            old_paths: dict[int, str] = {id(n): n.path for n in selected_notes}
+            moved_notes: list[Note] = move_notes(
+                selected_notes, destination, all_notes, note_types, self.link_index
+            )
+            for note in moved_notes:
+                self.catalog.move(old_paths[id(note)], note)
+            self.notes_model.remove_notes(moved_notes)
 
     def __show_notes(self) -> None:
         """Shows the selected notes in the file browser."""
-        selected_items: list[
-            QtWidgets.QListWidgetItem
-        ] = self.notes_list_widget.selectedItems()
-        if not selected_items:
+        selected_notes: list[Note] = self.__get_selected_notes()
+        if not selected_notes:
             show_message("No notes selected.")
             return
-        for note_list_widget_item in selected_items:
-            note_title: str = "]]".join(
-                note_list_widget_item.text().split("]]", 1)[1:]
-            )[1:]
-            note: Note
-            for note in self.new_notes:
-                if note.title == note_title:
-                    break
+        for note in selected_notes:
             note.show()
+
+    def __get_selected_notes(self) -> list[Note]:
+        """Gets the selected notes in the order they are listed."""
+        return self.notes_model.get_notes(
+            self.notes_list_view.selectionModel().selectedRows()
+        )
@@ -0,0 +1,175 @@
+"""Opt-in timers and counters for finding out which part of a split is slow.
+
+Instrumentation is off until ``start_trace`` is called. While it is off, ``stage``
+returns a context manager that does nothing and ``count`` returns immediately, so the
+instrumented code runs at full speed. While it is on, every stage's total time and
+number of calls are recorded along with counters such as the number of tokens created
+and bytes written.
+
+Example::
+
+    trace = instrumentation.start_trace()
+    with instrumentation.stage("lex"):
+        tokens_ = tokenize(content)
+    instrumentation.count("tokens", len(tokens_))
+    instrumentation.stop_trace()
+    trace.save(folder_path)
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any
+from typing import ContextManager
+from typing import Iterator
+
+
+class Trace:
+    """The timings and counts recorded during one split run.
+
+    Stages and counters may be recorded from more than one thread at a time.
+
+    Attributes
+    ----------
+    started_at : datetime
+        When the trace was created.
+    stages : dict[str, float]
+        The total number of seconds spent in each stage. Stages may be nested, so the
+        times do not necessarily add up to the total time.
+    calls : dict[str, int]
+        The number of times each stage was entered.
+    counters : dict[str, int]
+        The totals of the counters, such as ``tokens`` and ``bytes_written``.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.stages: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+        self.counters: dict[str, int] = {}
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Times the code in the ``with`` block and adds it to the stage's total.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage, such as ``lex`` or ``save``.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.__lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+                self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Adds to a counter.
+
+        Parameters
+        ----------
+        name : str
+            The name of the counter, such as ``tokens`` or ``stat_calls``.
+        amount : int, optional
+            The amount to add to the counter.
+        """
+        with self.__lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns the trace as a JSON-serializable dictionary."""
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "stages": {
+                name: {"seconds": seconds, "calls": self.calls[name]}
+                for name, seconds in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def save(self, folder_path: str) -> str:
+        """Saves the trace as a JSON file and returns the file's path.
+
+        Parameters
+        ----------
+        folder_path : str
+            The absolute path to the folder to save the trace in. The folder is created
+            if it does not exist.
+        """
+        os.makedirs(folder_path, exist_ok=True)
+        file_name = f"trace {self.started_at.strftime('%Y-%m-%d %H-%M-%S')}.json"
+        file_path = os.path.join(folder_path, file_name)
+        with open(file_path, "w", encoding="utf8") as file:
+            json.dump(self.to_dict(), file, indent=4)
+        return file_path
+
+    def summary(self) -> str:
+        """Returns a human-readable summary of the trace."""
+        lines = []
+        for name, seconds in sorted(
+            self.stages.items(), key=lambda item: item[1], reverse=True
+        ):
+            lines.append(f"{name}: {seconds:.3f} s ({self.calls[name]} calls)")
+        for name, amount in sorted(self.counters.items()):
+            lines.append(f"{name}: {amount:,}")
+        return "\n".join(lines)
+
+
+__trace: Trace | None = None
+
+
+def start_trace() -> Trace:
+    """Turns instrumentation on and returns the new trace that will be recorded."""
+    global __trace
+    __trace = Trace()
+    return __trace
+
+
+def stop_trace() -> Trace | None:
+    """Turns instrumentation off and returns the trace that was being recorded."""
+    global __trace
+    trace, __trace = __trace, None
+    return trace
+
+
+def enabled() -> bool:
+    """Returns whether a trace is being recorded.
+
+    Use this to skip work that is only needed for a counter, such as measuring a file's
+    size.
+    """
+    return __trace is not None
+
+
+def stage(name: str) -> ContextManager:
+    """Times the code in a ``with`` block if a trace is being recorded.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage, such as ``lex`` or ``save``.
+    """
+    if __trace is None:
+        return nullcontext()
+    return __trace.stage(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Adds to a counter if a trace is being recorded.
+
+    Parameters
+    ----------
+    name : str
+        The name of the counter, such as ``tokens`` or ``stat_calls``.
+    amount : int, optional
+        The amount to add to the counter.
+    """
+    if __trace is not None:
+        __trace.count(name, amount)
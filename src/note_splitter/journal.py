@@ -0,0 +1,455 @@
+"""A write-ahead journal for undoing or resuming a split run that did not finish.
+
+Before a file is created, rewritten, or deleted in the destination folder, a line
+describing the change is added to a hidden journal file there. Rewritten and deleted
+files have their previous content saved in the journal. When a source file's sections
+are all saved, that is added too, along with the source file's manifest records. When
+the whole run finishes, the journal is deleted.
+
+If the app crashes or an error stops a split run, the journal is left behind. The next
+run into the same folder can either resume, skipping the source files that were
+finished and undoing the one that was not, or roll back every change the run made.
+Files are only deleted or restored if they still have the content the run gave them,
+so files that were edited since are left alone.
+
+Each run holds a ``SplitLock`` on the destination folder from before it opens the
+journal until it finishes, so a journal is only resumed or rolled back after the run
+that wrote it stopped, even if the split tab, watch mode, and the daemon all split into
+the same folder.
+"""
+import json
+import os
+from typing import Any
+
+from note_splitter.manifest import hash_text
+from note_splitter.manifest import SplitManifest
+from note_splitter.note import write_text_atomically
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+JOURNAL_FILE_NAME = ".note_splitter_journal.jsonl"
+LOCK_FILE_NAME = ".note_splitter.lock"
+
+
+class FolderLockedError(OSError):
+    """Raised when another split run is using the destination folder."""
+
+
+class SplitLock:
+    """An exclusive lock on a destination folder for the length of one split run.
+
+    The lock file holds the ID of the process that owns the lock. The operating system
+    releases the lock when that process ends, so a lock file left behind by a crash
+    does not stop later runs. The lock file is deleted when the lock is released.
+
+    Parameters
+    ----------
+    folder_path : str
+        The absolute path to the destination folder.
+
+    Attributes
+    ----------
+    file_path : str
+        The absolute path to the lock file.
+    """
+
+    def __init__(self, folder_path: str):
+        self.file_path = os.path.join(folder_path, LOCK_FILE_NAME)
+        self.__fd: int | None = None
+
+    def __enter__(self) -> "SplitLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+    def acquire(self) -> None:
+        """Takes the lock without waiting.
+
+        Raises
+        ------
+        FolderLockedError
+            If another run, in this process or another one, holds the lock.
+        """
+        while True:
+            fd: int = os.open(self.file_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                _lock(fd)
+            except OSError:
+                os.close(fd)
+                owner: str = _read_text_or_none(self.file_path) or "unknown"
+                raise FolderLockedError(
+                    "Another split into"
+                    f" {os.path.dirname(self.file_path)} is running (process {owner})."
+                )
+            if _is_same_file(fd, self.file_path):
+                break
+            # The last owner deleted the file after it was opened here.
+            _unlock(fd)
+            os.close(fd)
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode("utf8"))
+        self.__fd = fd
+
+    def release(self) -> None:
+        """Releases the lock and deletes the lock file, if the lock is held."""
+        if self.__fd is None:
+            return
+        fd, self.__fd = self.__fd, None
+        if os.name == "nt":  # Open files cannot be deleted on Windows.
+            _unlock(fd)
+            os.close(fd)
+        try:
+            os.remove(self.file_path)
+        except OSError:  # Another run opened the file to take the lock.
+            pass
+        if os.name != "nt":
+            _unlock(fd)
+            os.close(fd)
+
+    def is_locked(self) -> bool:
+        """Determines whether another run holds the lock."""
+        if self.__fd is not None:
+            return False
+        try:
+            self.acquire()
+        except FolderLockedError:
+            return True
+        self.release()
+        return False
+
+
+class SplitJournal:
+    """The journal of the changes made by a split run in one destination folder.
+
+    Attributes
+    ----------
+    file_path : str
+        The absolute path to the journal file.
+    sync : bool
+        Whether to wait for each entry to be saved to the disk before the change it
+        describes is made.
+    """
+
+    def __init__(self, file_path: str, sync: bool = False):
+        self.file_path = file_path
+        self.sync = sync
+        self.__entries: list[dict[str, Any]] = []
+        self.__file = None
+        self.__source_path: str | None = None
+        try:
+            with open(file_path, "r", encoding="utf8") as file:
+                for line in file:
+                    try:
+                        self.__entries.append(json.loads(line))
+                    except ValueError:  # The last line may be cut off by a crash.
+                        break
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def in_folder(cls, folder_path: str, sync: bool = False) -> "SplitJournal":
+        """Opens the journal in a destination folder.
+
+        Parameters
+        ----------
+        folder_path : str
+            The absolute path to the destination folder.
+        sync : bool, optional
+            Whether to wait for each entry to be saved to the disk.
+        """
+        return cls(os.path.join(folder_path, JOURNAL_FILE_NAME), sync)
+
+    def is_unfinished(self) -> bool:
+        """Determines whether the journal has changes from a run that did not finish."""
+        return bool(self.__entries) or os.path.exists(self.file_path)
+
+    def get_finished_sources(self) -> dict[str, str]:
+        """Gets the source files whose sections were all saved.
+
+        Returns
+        -------
+        dict[str, str]
+            The hash of each finished source file's content, keyed by its path.
+        """
+        return {
+            entry["source"]: entry["hash"]
+            for entry in self.__entries
+            if entry["op"] == "finish"
+        }
+
+    def get_created_files(self, source_path: str) -> list[str]:
+        """Gets the files that were created for a finished source file and still exist.
+
+        Parameters
+        ----------
+        source_path : str
+            The absolute path to the source file.
+        """
+        return [
+            entry["path"]
+            for entry in self.__entries
+            if entry["op"] == "create"
+            and entry["source"] == source_path
+            and _has_hash(entry["path"], entry["hash"])
+        ]
+
+    def restore_manifest(self, manifest: SplitManifest) -> None:
+        """Puts the finished source files' records back into a manifest.
+
+        Parameters
+        ----------
+        manifest : SplitManifest
+            The manifest of the destination folder, which was not saved by the run.
+        """
+        for entry in self.__entries:
+            if entry["op"] == "finish" and entry.get("outputs") is not None:
+                manifest.restore_outputs(entry["source"], entry["outputs"])
+
+    def start_source(self, source_path: str) -> None:
+        """Marks the start of saving a source file's sections.
+
+        Parameters
+        ----------
+        source_path : str
+            The absolute path to the source file.
+        """
+        self.__source_path = source_path
+
+    def finish_source(
+        self,
+        source_path: str,
+        content: str | bytes,
+        manifest: SplitManifest | None = None,
+    ) -> None:
+        """Records that all of a source file's sections were saved.
+
+        Parameters
+        ----------
+        source_path : str
+            The absolute path to the source file.
+        content : str | bytes
+            The source file's content when it was split, or its bytes.
+        manifest : SplitManifest | None, optional
+            The manifest with the source file's new records, if there is one.
+        """
+        outputs = None
+        if manifest is not None:
+            outputs = manifest.get_outputs(source_path)
+        self.__append(
+            {
+                "op": "finish",
+                "source": source_path,
+                "hash": hash_text(content),
+                "outputs": outputs,
+            }
+        )
+        self.__source_path = None
+
+    def before_create(self, file_path: str, content: str) -> None:
+        """Records that a file is about to be created.
+
+        Parameters
+        ----------
+        file_path : str
+            The absolute path the file will have.
+        content : str
+            The file's content.
+        """
+        self.__append(
+            {
+                "op": "create",
+                "source": self.__source_path,
+                "path": file_path,
+                "hash": hash_text(content),
+            }
+        )
+
+    def before_replace(self, file_path: str, content: str) -> None:
+        """Records that a file is about to be rewritten, along with its current content.
+
+        Parameters
+        ----------
+        file_path : str
+            The absolute path to the file.
+        content : str
+            The file's new content.
+        """
+        self.__append(
+            {
+                "op": "replace",
+                "source": self.__source_path,
+                "path": file_path,
+                "hash": hash_text(content),
+                "previous": _read_text_or_none(file_path),
+            }
+        )
+
+    def before_delete(self, file_path: str) -> None:
+        """Records that a file is about to be deleted, along with its content.
+
+        Parameters
+        ----------
+        file_path : str
+            The absolute path to the file.
+        """
+        self.__append(
+            {
+                "op": "delete",
+                "source": self.__source_path,
+                "path": file_path,
+                "previous": _read_text_or_none(file_path),
+            }
+        )
+
+    def commit(self) -> None:
+        """Deletes the journal after the run finished."""
+        self.__close()
+        self.__entries = []
+        try:
+            os.remove(self.file_path)
+        except FileNotFoundError:
+            pass
+
+    def roll_back(self, unfinished_only: bool = False) -> int:
+        """Undoes the changes in the journal, newest first.
+
+        Parameters
+        ----------
+        unfinished_only : bool, optional
+            If True, only the changes for the source file that was not finished are
+            undone, and the journal is kept so the run can be resumed. Otherwise, all
+            the changes are undone and the journal is deleted.
+
+        Returns
+        -------
+        int
+            The number of changes that were undone.
+        """
+        self.__close()
+        finished: set[str] = set(self.get_finished_sources())
+        kept_entries: list[dict[str, Any]] = []
+        undone_count = 0
+        for entry in reversed(self.__entries):
+            if unfinished_only and (
+                entry["op"] == "finish" or entry.get("source") in finished
+            ):
+                kept_entries.append(entry)
+                continue
+            if _undo(entry):
+                undone_count += 1
+        if not unfinished_only:
+            self.commit()
+            return undone_count
+        self.__replace_entries(list(reversed(kept_entries)))
+        return undone_count
+
+    def roll_back_source(self, source_path: str) -> int:
+        """Undoes the changes for one source file, newest first.
+
+        This is for finished source files that changed since the unfinished run split
+        them, so that splitting them again does not leave the run's files behind. The
+        source file's entries are removed from the journal.
+
+        Parameters
+        ----------
+        source_path : str
+            The absolute path to the source file.
+
+        Returns
+        -------
+        int
+            The number of changes that were undone.
+        """
+        self.__close()
+        kept_entries: list[dict[str, Any]] = []
+        undone_count = 0
+        for entry in reversed(self.__entries):
+            if entry.get("source") != source_path:
+                kept_entries.append(entry)
+            elif _undo(entry):
+                undone_count += 1
+        self.__replace_entries(list(reversed(kept_entries)))
+        return undone_count
+
+    def __replace_entries(self, entries: list[dict[str, Any]]) -> None:
+        """Replaces the journal's entries and saves them all at once."""
+        self.__entries = entries
+        write_text_atomically(
+            self.file_path, "".join(json.dumps(e) + "\n" for e in self.__entries)
+        )
+
+    def __append(self, entry: dict[str, Any]) -> None:
+        """Adds an entry to the journal file before the change it describes is made."""
+        if self.__file is None:
+            self.__file = open(self.file_path, "a", encoding="utf8")
+        self.__file.write(json.dumps(entry) + "\n")
+        self.__file.flush()
+        if self.sync:
+            os.fsync(self.__file.fileno())
+        self.__entries.append(entry)
+
+    def __close(self) -> None:
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+def _lock(fd: int) -> None:
+    """Locks an open file without waiting, or raises OSError if it is locked."""
+    if os.name == "nt":
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _unlock(fd: int) -> None:
+    if os.name == "nt":
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _is_same_file(fd: int, file_path: str) -> bool:
+    """Determines whether an open file is still the file at a path."""
+    try:
+        return os.path.samestat(os.fstat(fd), os.stat(file_path))
+    except FileNotFoundError:
+        return False
+
+
+def _undo(entry: dict[str, Any]) -> bool:
+    """Undoes one change if the file still has the content the change gave it."""
+    file_path: str = entry.get("path", "")
+    if entry["op"] == "create":
+        if _has_hash(file_path, entry["hash"]):
+            os.remove(file_path)
+            return True
+    elif entry["op"] == "replace":
+        if entry["previous"] is not None and _has_hash(file_path, entry["hash"]):
+            write_text_atomically(file_path, entry["previous"])
+            return True
+    elif entry["op"] == "delete":
+        if entry["previous"] is not None and not os.path.exists(file_path):
+            write_text_atomically(file_path, entry["previous"])
+            return True
+    return False
+
+
+def _has_hash(file_path: str, content_hash: str) -> bool:
+    content = _read_text_or_none(file_path)
+    return content is not None and hash_text(content) == content_hash
+
+
+def _read_text_or_none(file_path: str) -> str | None:
+    try:
+        with open(file_path, "r", encoding="utf8") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
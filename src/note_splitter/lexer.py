@@ -5,77 +5,562 @@ a markdown codeblock will become two code fence tokens surrounding one or more t
 any type, possibly "incorrect" types such as header. Then the lexer makes a quick pass
 over the token list while looking at each token's context to ensure they have the
 correct type.
+
+Long texts can be lexed in multiple processes. The text is split into chunks at line
+breaks, each process categorizes the lines of a chunk without their context and returns
+the ID of each line's token type, and then one pass over the chunks creates the tokens
+while checking their context. Chunks that have no fences are handled in bulk, because
+the fences before a chunk decide the types of all its lines.
+
+Text can also be lexed from its UTF-8 bytes, such as a file's bytes or a memory-mapped
+file, so that it is never decoded all at once. The line breaks are found in the bytes
+and read the same way as in files opened in text mode. Lines that only have ASCII
+characters are categorized with bytes versions of the patterns, other lines are decoded
+to be categorized, and each line is decoded once, for its token.
+
+If NumPy is installed, long texts are first scanned with it to find the first character
+of each line that is not whitespace. Each built-in pattern can only match lines that
+start with certain characters, so only the patterns that could match each line are
+tried, and most lines of prose are not matched against any patterns.
 """
+import mmap
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+from typing import Iterator
+
+from note_splitter import instrumentation
 from note_splitter import patterns
-from note_splitter import settings
 from note_splitter import tokens
 
+try:
+    import numpy
+except ImportError:  # NumPy is optional.
+    numpy = None  # type: ignore
+
+
+PARALLEL_MIN_CHARS = 4 * 1024 * 1024
+CHUNK_CHARS = 1024 * 1024
+# The line breaks that text mode reads as ``\n``.
+BYTES_LINE_BREAK = re.compile(rb"\r\n?|\n")
+LONE_CARRIAGE_RETURN = re.compile(rb"\r(?!\n)")
+# Lines with these bytes are decoded before they are categorized. Besides non-ASCII
+# characters, ``\s`` in a str pattern matches the ASCII separators \x1c-\x1f, which it
+# does not match in a bytes pattern.
+UNDECODED_LINE_EXCLUSIONS = re.compile(rb"[\x1c-\x1f\x80-\xff]")
+NUMPY_MIN_CHARS = 256 * 1024
+NUMPY_BLOCK_BYTES = 1024 * 1024
+# The keys of lines' candidate patterns. See ``_get_line_keys``.
+ALL_WHITESPACE = 256
+INDENTED = 257
+# The first bytes of UTF-8 characters that \s matches, such as U+3000.
+UNICODE_WHITESPACE_FIRST_BYTES = frozenset(b"\xc2\xe1\xe2\xe3")
+# The first characters that are not whitespace of the lines each built-in pattern can
+# match, and whether the pattern only matches lines that do not start with whitespace.
+# ``\d`` matches digits of other scripts, so lines that start with any non-ASCII
+# character might be ordered list items.
+FIRST_BYTES: dict[tuple[str, int], tuple[frozenset[int], bool]] = {
+    (pattern.pattern, pattern.flags): (frozenset(first_bytes), unindented)
+    for pattern, first_bytes, unindented in [
+        (patterns.blockquote, b">", True),
+        (patterns.code_fence, b"`~", False),
+        (patterns.empty_line, [ALL_WHITESPACE], False),
+        (patterns.footnote, b"[", True),
+        (patterns.header, b"#", True),
+        (patterns.horizontal_rule, b"-*_", False),
+        (patterns.math_fence, b"$", False),
+        (patterns.ordered_list_item, b"0123456789" + bytes(range(128, 256)), False),
+        (patterns.table_divider, b"|-:", False),
+        (patterns.table_row, b"|", True),
+        (patterns.task, b"*+-", False),
+        (patterns.unordered_list_item, b"*+-", False),
+    ]
+}
+
 
 class Lexer:
-    """Creates a Callable that converts raw text to a list of tokens."""
+    """Creates a Callable that converts raw text to a list of tokens.
 
-    def __call__(self, text: str) -> list[tokens.Token]:
+    Parameters
+    ----------
+    process_count : int, optional
+        The number of processes to lex long texts in. If more than 1, texts that have
+        at least ``PARALLEL_MIN_CHARS`` characters are lexed in parallel. The tokens
+        are the same either way.
+
+    Attributes
+    ----------
+    use_numpy : bool
+        Whether texts that have at least ``NUMPY_MIN_CHARS`` characters are scanned
+        with NumPy to skip patterns that cannot match. This is True by default if NumPy
+        is installed. The tokens are the same either way.
+    """
+
+    def __init__(self, process_count: int = 1):
+        self.process_count = process_count
+        self.use_numpy: bool = numpy is not None
+
+    def __call__(self, text: str | bytes | mmap.mmap) -> list[tokens.Token]:
         """Converts raw text to a list of tokens.
 
         Parameters
         ----------
-        text : str
-            The raw text to convert to a list of tokens.
+        text : str | bytes | mmap.mmap
+            The raw text to convert to a list of tokens, or the text encoded as UTF-8.
+
+        Raises
+        ------
+        UnicodeDecodeError
+            If the encoded text is not valid UTF-8.
         """
+        if self.process_count > 1 and len(text) >= PARALLEL_MIN_CHARS:
+            return self.__lex_in_parallel(text)
         self.__tokens: list[tokens.Token] = []
-        all_token_types = tokens.get_all_token_types(tokens)
-        for line in text.split("\n"):
-            self.__tokens.append(self.__create_token(line, all_token_types))
-        self.__check_token_types()
+        bindings = tokens.registry.get_patterns()
+        regex_call_count: int | None = None
+        if (
+            self.use_numpy
+            and len(text) >= NUMPY_MIN_CHARS
+            # The line keys are found by splitting at \n, which old Mac line breaks
+            # do not have.
+            and (isinstance(text, str) or not LONE_CARRIAGE_RETURN.search(text))
+        ):
+            regex_call_count = self.__lex_with_numpy(text, bindings)
+        elif isinstance(text, str):
+            for line in text.split("\n"):
+                self.__tokens.append(_create_token(line, bindings))
+        else:
+            self.__lex_bytes(text, bindings)
+        if instrumentation.enabled():
+            if regex_call_count is None:
+                regex_call_count = self.__count_regex_calls(bindings)
+            instrumentation.count("regex_calls", regex_call_count)
+        _check_token_types(self.__tokens)
         return self.__tokens
 
-    def __create_token(
-        self, line: str, all_token_types: list[type[tokens.Token]]
-    ) -> tokens.Token:
-        """Lexes the text, creates a token, and returns it.
+    def __count_regex_calls(
+        self, bindings: list[tuple[type[tokens.Token], re.Pattern]]
+    ) -> int:
+        """Counts the patterns that were tried while creating this class' tokens.
+
+        Each line is checked against the patterns in order until one matches, so the
+        count can be found from the tokens' types instead of slowing down every match.
 
         Parameters
         ----------
-        line : str
-            The line of text to parse.
-        all_token_types : list[type[tokens.Token]]
-            A list of all token types.
+        bindings : list[tuple[type[tokens.Token], re.Pattern]]
+            The token types that have patterns and their patterns, in the order they
+            were tried.
         """
-        for type_ in all_token_types:
-            if type_.HAS_PATTERN and self.__matches(line, type_):
-                return type_(line)  # type: ignore
-        return tokens.Text(line)
+        tries = {type_: i + 1 for i, (type_, _) in enumerate(bindings)}
+        return sum(tries.get(type(t), len(bindings)) for t in self.__tokens)
 
-    def __matches(self, line: str, type_: type[tokens.Token]) -> bool:
-        """Determines if the line matches the given type's pattern.
+    def __lex_bytes(
+        self,
+        data: bytes | mmap.mmap,
+        bindings: list[tuple[type[tokens.Token], re.Pattern]],
+    ) -> None:
+        """Converts UTF-8 text to tokens, decoding it one line at a time.
 
         Parameters
         ----------
-        line : str
-            The line of text to check.
-        type_ : type[tokens.Token]
-            The token type to check the pattern of.
+        data : bytes | mmap.mmap
+            The text encoded as UTF-8.
+        bindings : list[tuple[type[tokens.Token], re.Pattern]]
+            The token types that have patterns and their patterns, in the order to try
+            them.
         """
-        type_name = settings.get_token_type_name(type_).replace(" ", "_")
-        if patterns.__dict__[type_name].match(line):
-            return True
-        return False
+        bytes_bindings = _get_bytes_patterns(bindings)
+        for line in _split_byte_lines(data):
+            if bytes_bindings is None or UNDECODED_LINE_EXCLUSIONS.search(line):
+                self.__tokens.append(_create_token(line.decode("utf8"), bindings))
+                continue
+            for type_, pattern in bytes_bindings:
+                if pattern.match(line):
+                    self.__tokens.append(type_(line.decode("ascii")))  # type: ignore
+                    break
+            else:
+                self.__tokens.append(tokens.Text(line.decode("ascii")))
 
-    def __check_token_types(self) -> None:
-        """Changes the type of some tokens based on their context.
+    def __lex_with_numpy(
+        self,
+        text: str | bytes | mmap.mmap,
+        bindings: list[tuple[type[tokens.Token], re.Pattern]],
+    ) -> int:
+        """Converts text to tokens, only trying the patterns that could match each line.
 
-        Changes are made to this class' token list. This function assumes the tokens to
-        change have a ``content`` attribute that is of type ``str``.
+        Parameters
+        ----------
+        text : str | bytes | mmap.mmap
+            The raw text, or the text encoded as UTF-8. Encoded text must not have any
+            ``\\r`` line breaks that are not followed by ``\\n``.
+        bindings : list[tuple[type[tokens.Token], re.Pattern]]
+            The token types that have patterns and their patterns, in the order to try
+            them.
+
+        Returns
+        -------
+        int
+            The number of patterns that were tried.
+        """
+        candidate_bindings = _get_candidate_bindings(bindings)
+        regex_call_count = 0
+        for line, key in zip(_decode_lines(text), _get_line_keys(text)):
+            candidates = candidate_bindings[key]
+            for i, (type_, pattern) in enumerate(candidates):
+                if pattern.match(line):
+                    self.__tokens.append(type_(line))  # type: ignore
+                    regex_call_count += i + 1
+                    break
+            else:
+                self.__tokens.append(tokens.Text(line))
+                regex_call_count += len(candidates)
+        return regex_call_count
+
+    def __lex_in_parallel(self, text: str | bytes | mmap.mmap) -> list[tokens.Token]:
+        """Converts raw text to a list of tokens using a process pool.
+
+        Parameters
+        ----------
+        text : str | bytes | mmap.mmap
+            The raw text to convert to a list of tokens, or the text encoded as UTF-8.
+        """
+        chunks: list[str] | list[bytes] = _split_into_chunks(text, CHUNK_CHARS)
+        with ProcessPoolExecutor(self.process_count) as executor:
+            chunk_type_ids: list[bytes] = list(executor.map(_categorize_lines, chunks))
+        if instrumentation.enabled():
+            bindings = tokens.registry.get_patterns()
+            regex_call_count = 0
+            for i, (type_, _) in enumerate(bindings):
+                type_id: int = tokens.registry.get_id(type_)
+                regex_call_count += (i + 1) * sum(
+                    ids.count(type_id) for ids in chunk_type_ids
+                )
+            text_id: int = tokens.registry.get_id(tokens.Text)
+            regex_call_count += len(bindings) * sum(
+                ids.count(text_id) for ids in chunk_type_ids
+            )
+            instrumentation.count("regex_calls", regex_call_count)
+        return _create_tokens(chunks, chunk_type_ids)
+
+
+class IncrementalLexer:
+    """Creates a Callable that converts raw text to tokens, reusing its last result.
+
+    Each call compares the text with the text of the last call, and only the lines
+    between the lines they start and end with in common are categorized again. Then
+    the types of all the tokens are checked in context, which is fast because it does
+    not use any patterns, so lines whose fences were added or removed get the right
+    types. The tokens are the same as the ones ``Lexer`` creates.
+
+    Most of the tokens are kept for later calls, so they must not be changed. Copy them
+    before splitting them.
+
+    Attributes
+    ----------
+    lexed_line_count : int
+        The number of lines categorized by the last call.
+    """
+
+    def __init__(self):
+        self.lexed_line_count = 0
+        self.__lines: list[str] = []
+        self.__line_tokens: list[tokens.Token] = []
+
+    def __call__(self, text: str) -> list[tokens.Token]:
+        """Converts raw text to a list of tokens.
+
+        Parameters
+        ----------
+        text : str
+            The raw text to convert to a list of tokens.
         """
-        type_tuples = [
-            (tokens.Code, tokens.CodeFence),
-            (tokens.Math, tokens.MathFence),
+        lines: list[str] = text.split("\n")
+        old_lines: list[str] = self.__lines
+        common_count: int = min(len(lines), len(old_lines))
+        start = 0
+        while start < common_count and lines[start] == old_lines[start]:
+            start += 1
+        end_count = 0
+        while (
+            end_count < common_count - start
+            and lines[-1 - end_count] == old_lines[-1 - end_count]
+        ):
+            end_count += 1
+        end: int = len(lines) - end_count
+        old_end: int = len(old_lines) - end_count
+        bindings = tokens.registry.get_patterns()
+        self.__line_tokens[start:old_end] = [
+            _create_token(line, bindings) for line in lines[start:end]
         ]
-        for fenced_type, fence_type in type_tuples:
-            between_fences = False
-            for i, token_ in enumerate(self.__tokens):
-                if isinstance(token_, fence_type):
-                    between_fences = not between_fences
-                elif between_fences:
-                    assert isinstance(token_.content, str)
-                    self.__tokens[i] = fenced_type(token_.content)
+        self.__lines = lines
+        self.lexed_line_count = end - start
+        tokens_: list[tokens.Token] = list(self.__line_tokens)
+        _check_token_types(tokens_)
+        return tokens_
+
+
+def _create_token(
+    line: str, bindings: list[tuple[type[tokens.Token], re.Pattern]]
+) -> tokens.Token:
+    """Creates a token of the first type whose pattern matches a line.
+
+    Parameters
+    ----------
+    line : str
+        The line of text to categorize.
+    bindings : list[tuple[type[tokens.Token], re.Pattern]]
+        The token types that have patterns and their patterns, in the order to try
+        them.
+    """
+    for type_, pattern in bindings:
+        if pattern.match(line):
+            return type_(line)  # type: ignore
+    return tokens.Text(line)
+
+
+def _check_token_types(tokens_: list[tokens.Token]) -> None:
+    """Changes the type of some tokens based on their context.
+
+    Changes are made to the given list. This function assumes the tokens to change
+    have a ``content`` attribute that is of type ``str``.
+    """
+    type_tuples = [
+        (tokens.Code, tokens.CodeFence),
+        (tokens.Math, tokens.MathFence),
+    ]
+    for fenced_type, fence_type in type_tuples:
+        between_fences = False
+        for i, token_ in enumerate(tokens_):
+            if isinstance(token_, fence_type):
+                between_fences = not between_fences
+            elif between_fences:
+                assert isinstance(token_.content, str)
+                tokens_[i] = fenced_type(token_.content)
+
+
+def _get_bytes_patterns(
+    bindings: list[tuple[type[tokens.Token], re.Pattern]]
+) -> list[tuple[type[tokens.Token], re.Pattern]] | None:
+    """Compiles bytes versions of patterns, or returns None if any are not ASCII.
+
+    The bytes versions match the same ASCII lines as the originals, except lines with
+    the characters in ``UNDECODED_LINE_EXCLUSIONS``.
+    """
+    try:
+        return [
+            (type_, re.compile(pattern.pattern.encode("ascii"), pattern.flags & ~re.U))
+            for type_, pattern in bindings
+        ]
+    except UnicodeEncodeError:
+        return None
+
+
+def _split_byte_lines(data: bytes | mmap.mmap) -> Iterator[bytes]:
+    """Splits UTF-8 text into lines the same way text mode reads line breaks.
+
+    Only one line is copied at a time.
+    """
+    start = 0
+    for match in BYTES_LINE_BREAK.finditer(data):
+        end: int = match.start()
+        yield data[start:end]
+        start = match.end()
+    yield data[start:]
+
+
+def _decode_lines(text: str | bytes | mmap.mmap) -> Iterable[str]:
+    """Splits text into lines, decoding encoded text one line at a time."""
+    if isinstance(text, str):
+        return text.split("\n")
+    return (line.decode("utf8") for line in _split_byte_lines(text))
+
+
+def _get_candidate_bindings(
+    bindings: list[tuple[type[tokens.Token], re.Pattern]]
+) -> list[list[tuple[type[tokens.Token], re.Pattern]]]:
+    """Finds the patterns that could match the lines with each key.
+
+    Patterns that are not in ``FIRST_BYTES``, such as custom patterns, are always
+    tried.
+
+    Parameters
+    ----------
+    bindings : list[tuple[type[tokens.Token], re.Pattern]]
+        The token types that have patterns and their patterns, in the order to try
+        them.
+
+    Returns
+    -------
+    list[list[tuple[type[tokens.Token], re.Pattern]]]
+        The bindings to try for each key (see ``_get_line_keys``), in the same order.
+    """
+    candidate_bindings: list[list[tuple[type[tokens.Token], re.Pattern]]] = []
+    for key in range(2 * INDENTED):
+        first_byte: int = key % INDENTED
+        indented: bool = key >= INDENTED
+        candidate_bindings.append([])
+        for type_, pattern in bindings:
+            first_bytes = FIRST_BYTES.get((pattern.pattern, pattern.flags))
+            if (
+                first_bytes is None
+                or first_byte in UNICODE_WHITESPACE_FIRST_BYTES
+                or (first_byte in first_bytes[0] and not (indented and first_bytes[1]))
+            ):
+                candidate_bindings[-1].append((type_, pattern))
+    return candidate_bindings
+
+
+def _get_line_keys(text: str | bytes | mmap.mmap) -> Iterator[int]:
+    """Finds the key of each line of text for ``_get_candidate_bindings``.
+
+    A line's key is the first byte of its UTF-8 encoding that is not ASCII whitespace,
+    plus ``INDENTED`` if that byte is not the line's first byte, or ``ALL_WHITESPACE``
+    if there is no such byte. Lines end at each ``\\n``, so the ``\\r`` of a ``\\r\\n``
+    line break is whitespace at the end of a line. The text is scanned in blocks of
+    about ``NUMPY_BLOCK_BYTES`` characters or bytes so that the arrays stay small, and
+    str text is encoded one block at a time.
+    """
+    line_break = "\n" if isinstance(text, str) else b"\n"
+    start = 0
+    while True:
+        end: int = -1
+        if start + NUMPY_BLOCK_BYTES < len(text):
+            end = text.find(line_break, start + NUMPY_BLOCK_BYTES)  # type: ignore
+        block_end: int = len(text) if end == -1 else end
+        if block_end == start:
+            yield ALL_WHITESPACE
+        else:
+            if isinstance(text, str):
+                block = text[start:block_end].encode("utf8", "surrogatepass")
+                buffer = numpy.frombuffer(block, dtype=numpy.uint8)
+            else:
+                buffer = numpy.frombuffer(
+                    text, dtype=numpy.uint8, count=block_end - start, offset=start
+                )
+            yield from _get_block_line_keys(buffer).tolist()
+        if end == -1:
+            return
+        start = end + 1
+
+
+def _get_block_line_keys(buffer: "numpy.ndarray") -> "numpy.ndarray":
+    """Finds the key of each line in a nonempty array of UTF-8 text's bytes."""
+    is_ascii_whitespace = numpy.zeros(256, dtype=bool)
+    is_ascii_whitespace[list(b"\t\n\v\f\r\x1c\x1d\x1e\x1f ")] = True
+    line_starts = numpy.concatenate(([0], numpy.flatnonzero(buffer == 10) + 1))
+    line_ends = numpy.append(line_starts[1:] - 1, len(buffer))
+    non_whitespace = numpy.append(
+        numpy.flatnonzero(~is_ascii_whitespace[buffer]), len(buffer)
+    )
+    first_non_whitespace = non_whitespace[
+        numpy.searchsorted(non_whitespace, line_starts)
+    ]
+    first_bytes = buffer[numpy.minimum(first_non_whitespace, len(buffer) - 1)]
+    keys = first_bytes.astype(numpy.int64)
+    keys[first_non_whitespace > line_starts] += INDENTED
+    keys[first_non_whitespace >= line_ends] = ALL_WHITESPACE
+    return keys
+
+
+def _split_into_chunks(
+    text: str | bytes | mmap.mmap, chunk_chars: int
+) -> list[str] | list[bytes]:
+    """Splits text at line breaks into chunks of about the same length.
+
+    The line breaks between the chunks are removed, so splitting each chunk into lines
+    gives the same lines as splitting the text into lines. Encoded text is split into
+    chunks of bytes.
+    """
+    if isinstance(text, str):
+        chunks: list = []
+        start = 0
+        while True:
+            end: int = text.find("\n", start + chunk_chars)
+            if end == -1:
+                chunks.append(text[start:])
+                return chunks
+            chunks.append(text[start:end])
+            start = end + 1
+    chunks = []
+    start = 0
+    while True:
+        end = text.find(b"\n", start + chunk_chars)
+        if end == -1:
+            chunks.append(text[start:])
+            return chunks
+        line_end: int = end - 1 if end > start and text[end - 1] == ord("\r") else end
+        chunks.append(text[start:line_end])
+        start = end + 1
+
+
+def _categorize_lines(chunk: str | bytes) -> bytes:
+    """Finds the type of each line's token without the line's context.
+
+    This runs in the lexer's worker processes.
+
+    Returns
+    -------
+    bytes
+        The ID of each line's token type (see ``TokenTypeRegistry.get_id``).
+    """
+    bindings = [
+        (tokens.registry.get_id(type_), pattern)
+        for type_, pattern in tokens.registry.get_patterns()
+    ]
+    text_id: int = tokens.registry.get_id(tokens.Text)
+    type_ids = bytearray()
+    for line in _decode_lines(chunk):
+        for type_id, pattern in bindings:
+            if pattern.match(line):
+                type_ids.append(type_id)
+                break
+        else:
+            type_ids.append(text_id)
+    return bytes(type_ids)
+
+
+def _create_tokens(
+    chunks: list[str] | list[bytes], chunk_type_ids: list[bytes]
+) -> list[tokens.Token]:
+    """Creates the tokens of chunks of lines, checking the types in context.
+
+    The types are changed the same way ``_check_token_types`` changes them.
+
+    Parameters
+    ----------
+    chunks : list[str] | list[bytes]
+        The chunks of text or of UTF-8 text, in order.
+    chunk_type_ids : list[bytes]
+        The ID of the context-free token type of each line in each chunk.
+    """
+    types: list[type[tokens.Token]] = [
+        tokens.registry.get_type_by_id(i) for i in range(len(tokens.registry.types))
+    ]
+    code_fence_id: int = tokens.registry.get_id(tokens.CodeFence)
+    math_fence_id: int = tokens.registry.get_id(tokens.MathFence)
+    between_code_fences = False
+    between_math_fences = False
+    tokens_: list[tokens.Token] = []
+    for chunk, type_ids in zip(chunks, chunk_type_ids):
+        lines: Iterable[str] = _decode_lines(chunk)
+        if code_fence_id not in type_ids and math_fence_id not in type_ids:
+            if between_math_fences:
+                tokens_.extend(tokens.Math(line) for line in lines)
+            elif between_code_fences:
+                tokens_.extend(tokens.Code(line) for line in lines)
+            else:
+                tokens_.extend(types[i](line) for i, line in zip(type_ids, lines))
+            continue
+        for type_id, line in zip(type_ids, lines):
+            type_: type[tokens.Token] = types[type_id]
+            if type_ is tokens.CodeFence:
+                between_code_fences = not between_code_fences
+            elif between_code_fences:
+                type_ = tokens.Code
+            if type_ is tokens.MathFence:
+                between_math_fences = not between_math_fences
+            elif between_math_fences:
+                type_ = tokens.Math
+            tokens_.append(type_(line))  # type: ignore
+    return tokens_
@@ -0,0 +1,203 @@
+"""For remembering which files were created from which sections of each source file.
+
+When a file is split again, the manifest lets unchanged sections keep their files,
+changed sections be rewritten in place, and files of sections that no longer exist be
+deleted, instead of every section getting a new file.
+
+The manifest is saved as a hidden JSON file in the destination folder. For each source
+file it has a record of the file created from each of its sections, and of its index
+file if there is one. Each record has the size and modification time the file had right
+after it was created, so files that were edited or deleted since are left alone.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from dataclasses import dataclass
+
+from note_splitter.note import write_text_atomically
+
+
+MANIFEST_FILE_NAME = ".note_splitter_manifest.json"
+
+
+@dataclass
+class OutputRecord:
+    """A record of a file created while splitting.
+
+    Attributes
+    ----------
+    path : str
+        The absolute path to the file.
+    content_hash : str
+        The hash of the section the file was created from, with its backlink if it has
+        one.
+    size : int
+        The file's size in bytes after it was created.
+    mtime_ns : int
+        The file's modification time in nanoseconds after it was created.
+    """
+
+    path: str
+    content_hash: str
+    size: int = 0
+    mtime_ns: int = 0
+
+    def is_unmodified(self) -> bool:
+        """Determines whether the file still exists and has not been changed."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def update_stat(self) -> None:
+        """Records the file's current size and modification time."""
+        stat = os.stat(self.path)
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+
+
+class SplitManifest:
+    """The records of the files created from each source file.
+
+    Attributes
+    ----------
+    file_path : str
+        The absolute path to the manifest file.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.__sources: dict[str, dict] = {}
+        try:
+            with open(file_path, "r", encoding="utf8") as file:
+                self.__sources = json.load(file)["sources"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError):
+            print(f"Ignoring the invalid manifest at {file_path}")
+
+    @classmethod
+    def in_folder(cls, folder_path: str) -> "SplitManifest":
+        """Opens the manifest in a destination folder.
+
+        Parameters
+        ----------
+        folder_path : str
+            The absolute path to the destination folder.
+        """
+        return cls(os.path.join(folder_path, MANIFEST_FILE_NAME))
+
+    def get_sections(self, source_path: str) -> dict[str, OutputRecord]:
+        """Gets the records of the files created from a source file's sections.
+
+        Parameters
+        ----------
+        source_path : str
+            The absolute path to the source file.
+
+        Returns
+        -------
+        dict[str, OutputRecord]
+            The records keyed by section ID (see ``create_section_ids``).
+        """
+        entry: dict = self.__sources.get(source_path, {})
+        return {
+            section_id: OutputRecord(**record)
+            for section_id, record in entry.get("sections", {}).items()
+        }
+
+    def get_index(self, source_path: str) -> OutputRecord | None:
+        """Gets the record of a source file's index file, if it has one.
+
+        Parameters
+        ----------
+        source_path : str
+            The absolute path to the source file.
+        """
+        record: dict | None = self.__sources.get(source_path, {}).get("index")
+        if record is None:
+            return None
+        return OutputRecord(**record)
+
+    def set_outputs(
+        self,
+        source_path: str,
+        sections: dict[str, OutputRecord],
+        index: OutputRecord | None,
+    ) -> None:
+        """Replaces the records of the files created from a source file.
+
+        Parameters
+        ----------
+        source_path : str
+            The absolute path to the source file.
+        sections : dict[str, OutputRecord]
+            The records keyed by section ID.
+        index : OutputRecord | None
+            The record of the source file's index file, if it has one.
+        """
+        self.__sources[source_path] = {
+            "sections": {
+                section_id: asdict(record) for section_id, record in sections.items()
+            },
+            "index": asdict(index) if index is not None else None,
+        }
+
+    def get_outputs(self, source_path: str) -> dict | None:
+        """Gets all the records of a source file in the form they are saved in.
+
+        Parameters
+        ----------
+        source_path : str
+            The absolute path to the source file.
+        """
+        return self.__sources.get(source_path)
+
+    def restore_outputs(self, source_path: str, outputs: dict) -> None:
+        """Replaces the records of a source file with ones from ``get_outputs``.
+
+        Parameters
+        ----------
+        source_path : str
+            The absolute path to the source file.
+        outputs : dict
+            The records returned by ``get_outputs``.
+        """
+        self.__sources[source_path] = outputs
+
+    def save(self) -> None:
+        """Saves the manifest, replacing the previous file all at once."""
+        write_text_atomically(
+            self.file_path,
+            json.dumps({"version": 1, "sources": self.__sources}, indent=1),
+        )
+
+
+def create_section_ids(titles: list[str]) -> list[str]:
+    """Creates an ID for each section that stays the same when the section is edited.
+
+    Each ID is the section's title, followed by a new line and a number if an earlier
+    section has the same title.
+
+    Parameters
+    ----------
+    titles : list[str]
+        The titles of a source file's sections (see ``note.get_title``).
+    """
+    section_ids: list[str] = []
+    title_counts: dict[str, int] = {}
+    for title in titles:
+        count = title_counts.get(title, 0)
+        title_counts[title] = count + 1
+        section_ids.append(f"{title}\n{count}" if count else title)
+    return section_ids
+
+
+def hash_text(text: str | bytes) -> str:
+    """Returns a hash of a string, which is the same as the hash of its UTF-8 bytes."""
+    if isinstance(text, str):
+        text = text.encode("utf8")
+    return hashlib.sha256(text).hexdigest()
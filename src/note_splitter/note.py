@@ -1,19 +1,30 @@
 """Manages info about the user's files."""
+import copy
+import itertools
+import mmap
 import os
 import platform
 import re
+import shutil
 import subprocess
 import uuid
 import webbrowser
 from datetime import datetime
 from datetime import timedelta
+from typing import Iterator
 
+from note_splitter import instrumentation
 from note_splitter import patterns
 from note_splitter.settings import DEFAULT_SETTINGS
 from PySide6 import QtCore
 from PySide6 import QtWidgets
 
 
+MMAP_MIN_BYTES = 1024 * 1024
+# Numbers the temporary files of ``write_text_atomically`` to make their names unique.
+__temp_file_ids: Iterator[int] = itertools.count()
+
+
 def show_message(text: str) -> None:
     """Shows the user a message dialog and waits for the user to close it."""
     QtWidgets.QMessageBox(text=text).exec()
@@ -32,12 +43,20 @@ class Note:
     name : str, optional
         The name of the file, including the file extension. If not provided, it will be
         retrieved from the path.
+    title : str, optional
+        The title of the note. If not provided, the file is read to get it the first
+        time it is needed.
+    tags : list[str], optional
+        The tags in the note. If not provided, the file is read to get them the first
+        time they are needed.
 
     Attributes
     ----------
     title : str
         The title of the note. This is the body of the first header, or the first line
         of the file if there is no header, or an empty string if the file is empty.
+    tags : list[str]
+        The tags in the note, each once, in the order they first appear.
     name : str
         The name of the file, including the file extension.
     ext : str
@@ -48,7 +67,14 @@ class Note:
         The absolute path to the folder that the file is in.
     """
 
-    def __init__(self, path: str, folder_path: str = None, name: str = None):
+    def __init__(
+        self,
+        path: str,
+        folder_path: str = None,
+        name: str = None,
+        title: str = None,
+        tags: list[str] = None,
+    ):
         self.path = path
         if folder_path is None:
             self.folder_path = os.path.dirname(path)
@@ -59,9 +85,47 @@ class Note:
         else:
             self.name = name
         self.ext = os.path.splitext(self.path)[1]
+        self.__title: str | None = title
+        self.__tags: list[str] | None = tags
+
+    @property
+    def title(self) -> str:
+        """The title of the note, which is read from the file the first time."""
+        if self.__title is None:
+            self.__read_metadata()
+        assert self.__title is not None
+        return self.__title
+
+    @title.setter
+    def title(self, title: str) -> None:
+        self.__title = title
+
+    @property
+    def tags(self) -> list[str]:
+        """The tags in the note, which are read from the file the first time."""
+        if self.__tags is None:
+            self.__read_metadata()
+        assert self.__tags is not None
+        return self.__tags
+
+    @property
+    def known_title(self) -> str | None:
+        """The title if it was given or already read from the file, or else None."""
+        return self.__title
+
+    @property
+    def known_tags(self) -> list[str] | None:
+        """The tags if they were given or already read from the file, or else None."""
+        return self.__tags
+
+    def __read_metadata(self) -> None:
+        """Reads the file to get whichever of the title and tags are not known yet."""
         with open(self.path, "r", encoding="utf8") as file:
             contents = file.read()
-        self.title = get_title(contents)
+        if self.__title is None:
+            self.__title = get_title(contents)
+        if self.__tags is None:
+            self.__tags = get_tags(contents)
 
     def open(self) -> bool | None:
         """Opens the note in the device's default editor.
@@ -98,7 +162,11 @@ class Note:
         return True
 
     def move(
-        self, new_folder_path: str, all_notes: list["Note"], note_types: list[str]
+        self,
+        new_folder_path: str,
+        all_notes: list["Note"],
+        note_types: list[str],
+        link_index: "LinkIndex | None" = None,
     ) -> bool | None:
         """Moves the note file to a new folder and updates internal links to them.
 
@@ -111,6 +179,8 @@ class Note:
         note_types : list[str]
             A list of all the file extensions note files can have. Each file extension
             includes the period.
+        link_index : LinkIndex | None, optional
+            An index of the links in all_notes to reuse. If None, one is created.
 
         Returns
         -------
@@ -125,7 +195,7 @@ class Note:
         if os.path.exists(new_path):
             show_message(f"File already exists: {new_path}")
             return False
-        move_files([self.path], new_folder_path, all_notes, note_types)
+        move_files([self.path], new_folder_path, all_notes, note_types, link_index)
         self.path = new_path
         self.folder_path = new_folder_path
         return True
@@ -158,6 +228,7 @@ def create_notes(file_paths: list[str]) -> list[Note]:
     note_types: list[str] = QtCore.QSettings().value(
         "note_types", DEFAULT_SETTINGS["note_types"]
     )
+    instrumentation.count("stat_calls", len(file_paths))
     for file_path in file_paths:
         if os.path.isfile(file_path):
             _, file_ext = os.path.splitext(file_path)
@@ -166,8 +237,38 @@ def create_notes(file_paths: list[str]) -> list[Note]:
     return notes
 
 
+def file_contains(file_path: str, text: str) -> bool:
+    """Determines whether a file has some text without decoding the file.
+
+    The file is searched for the text encoded as UTF-8, which finds the same text as
+    searching the decoded file. Files of at least ``MMAP_MIN_BYTES`` bytes are
+    memory-mapped instead of read. Text with line breaks is searched for in the decoded
+    file, because reading a file in text mode changes its line breaks.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the file, which should be encoded as UTF-8.
+    text : str
+        The text to search for.
+    """
+    if "\r" in text or "\n" in text:
+        with open(file_path, "r", encoding="utf8") as file:
+            return text in file.read()
+    encoded_text: bytes = text.encode("utf8")
+    with open(file_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size < MMAP_MIN_BYTES:
+            return encoded_text in file.read()
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            return mapped_file.find(encoded_text) != -1
+
+
 def create_file_names(
-    file_ext: str, file_id_format: str, file_name_format: str, files_contents: list[str]
+    file_ext: str,
+    file_id_format: str,
+    file_name_format: str,
+    files_contents: list[str],
+    titles: list[str] | None = None,
 ) -> list[str]:
     """Creates names for new files.
 
@@ -184,58 +285,99 @@ def create_file_names(
         The format of the file name.
     files_contents : list[str]
         The contents of the files to be named.
+    titles : list[str] | None, optional
+        The titles of the files, if they are already known (see ``get_title``).
     """
+    template = FileNameTemplate(file_ext, file_id_format, file_name_format)
     file_names = []
     now = datetime.now()
-    for file_contents in files_contents:
+    for i, file_contents in enumerate(files_contents):
+        title = titles[i] if titles is not None else None
+        file_names.append(template.create(file_contents, now, title))
+        if template.time_step is not None:
+            now += template.time_step
+    return file_names
+
+
+class FileNameTemplate:
+    """A file name format that is parsed once and then used to name many files.
+
+    Only the variables that are in the format are computed for each file name. The
+    names are the same as the names created by replacing each variable in turn, which
+    is what this does for the rare formats and titles that contain percent signs that
+    are not part of a variable.
+
+    Attributes
+    ----------
+    time_step : timedelta | None
+        The amount to increase the time by between file names so that names with time
+        variables are unique, or None if the format has no time variables.
+    """
+
+    VARIABLE_PATTERN = re.compile(r"(%(?:uuid4|title|id|Y|M|D|h|m|s))")
+
+    def __init__(self, file_ext: str, file_id_format: str, file_name_format: str):
         if r"%id" in file_name_format:
             file_name_format = file_name_format.replace(r"%id", file_id_format)
-        new_file_name = __create_file_name(
-            file_ext, file_id_format, file_name_format, file_contents, now
-        )
-        new_file_name = validate_file_name(new_file_name)
-        file_names.append(new_file_name)
+        self.time_step: timedelta | None = None
         if r"%s" in file_name_format:
-            now += timedelta(seconds=1)
+            self.time_step = timedelta(seconds=1)
         elif r"%m" in file_name_format:
-            now += timedelta(minutes=1)
+            self.time_step = timedelta(minutes=1)
         elif r"%h" in file_name_format:
-            now += timedelta(hours=1)
+            self.time_step = timedelta(hours=1)
         elif r"%D" in file_name_format:
-            now += timedelta(days=1)
-    return file_names
+            self.time_step = timedelta(days=1)
+        self.__file_ext = file_ext
+        self.__file_id_format = file_id_format
+        self.__file_name_format = file_name_format
+        parts: list[str] = self.VARIABLE_PATTERN.split(file_name_format or r"%uuid4")
+        self.__parts: list[str] | None = parts
+        if any("%" in literal for literal in parts[::2]) or r"%id" in parts[1::2]:
+            self.__parts = None
+        self.__variable_names: set[str] = set(parts[1::2])
+        self.__uses_time = bool(self.__variable_names - {r"%uuid4", r"%title"})
+
+    def create(self, file_contents: str, dt: datetime, title: str | None = None) -> str:
+        """Creates a valid name for a new file.
 
-
-def __create_file_name(
-    file_ext: str,
-    file_id_format: str,
-    file_name_format: str,
-    file_contents: str,
-    dt: datetime,
-) -> str:
-    """Creates a name for a new file.
-
-    Parameters
-    ----------
-    file_ext : str
-        The file extension, including the leading period.
-    file_id_format : str
-        The format of the file ID.
-    file_name_format : str
-        The format of the file name.
-    file_contents : str
-        The contents of the file to be named.
-    dt : datetime
-        The date and time to use for the file name if the file name format contains any
-        date and/or time variables.
-    """
-    if not file_name_format:
-        file_name_format = r"%uuid4"
-    variables: list[tuple[str, str]] = __get_variables(file_contents, dt)
-    variables.append((r"%id", create_file_id(file_id_format, file_contents, dt)))
-    for name, value in variables:
-        file_name_format = file_name_format.replace(name, value)
-    return f"{file_name_format}{file_ext}"
+        Parameters
+        ----------
+        file_contents : str
+            The contents of the file to be named.
+        dt : datetime
+            The date and time to use for any date and time variables.
+        title : str | None, optional
+            The title of the file, if it is already known (see ``get_title``).
+        """
+        uses_title = r"%title" in self.__variable_names
+        if uses_title and title is None:
+            title = get_title(file_contents)
+        if self.__parts is None or (uses_title and "%" in title):  # type: ignore
+            file_name = create_file_id(
+                self.__file_name_format or r"%uuid4", file_contents, dt
+            )
+            file_id = create_file_id(self.__file_id_format, file_contents, dt)
+            file_name = file_name.replace(r"%id", file_id)
+            return validate_file_name(file_name + self.__file_ext)
+        values: dict[str, str] = {}
+        if self.__uses_time:
+            values = {
+                r"%Y": str(dt.year),
+                r"%M": f"{dt.month:02d}",
+                r"%D": f"{dt.day:02d}",
+                r"%h": f"{dt.hour:02d}",
+                r"%m": f"{dt.minute:02d}",
+                r"%s": f"{dt.second:02d}",
+            }
+        if r"%uuid4" in self.__variable_names:
+            values[r"%uuid4"] = str(uuid.uuid4())
+        if uses_title:
+            values[r"%title"] = title  # type: ignore
+        parts = self.__parts.copy()
+        for i in range(1, len(parts), 2):
+            parts[i] = values[parts[i]]
+        return validate_file_name("".join(parts) + self.__file_ext)
 
 
 def create_file_id(file_id_format: str, file_contents: str, dt: datetime = None) -> str:
@@ -253,24 +395,7 @@ def create_file_id(file_id_format: str, file_contents: str, dt: datetime = None)
     """
     if dt is None:
         dt = datetime.now()
-    variables = __get_variables(file_contents, dt)
-    for name, value in variables:
-        file_id_format = file_id_format.replace(name, value)
-    return file_id_format
-
-
-def __get_variables(file_contents: str, dt: datetime) -> list[tuple[str, str]]:
-    """Gets the variable names and values for file name and ID formats.
-
-    Parameters
-    ----------
-    file_contents : str
-        The contents of the file being named or IDed.
-    dt : datetime
-        The datetime to use in the file name or ID if the format contains any date
-        and/or time variables.
-    """
-    return [
+    variables: list[tuple[str, str]] = [
         (r"%uuid4", str(uuid.uuid4())),
         (r"%title", get_title(file_contents)),
         (r"%Y", str(dt.year)),
@@ -280,6 +405,9 @@ def __get_variables(file_contents: str, dt: datetime) -> list[tuple[str, str]]:
         (r"%m", str(dt.minute).zfill(2)),
         (r"%s", str(dt.second).zfill(2)),
     ]
+    for name, value in variables:
+        file_id_format = file_id_format.replace(name, value)
+    return file_id_format
 
 
 def get_title(file_contents: str) -> str:
@@ -302,6 +430,23 @@ def get_title(file_contents: str) -> str:
     return str(uuid.uuid4())
 
 
+def get_tags(file_contents: str) -> list[str]:
+    """Gets the tags in a file, each once, in the order they first appear.
+
+    Parameters
+    ----------
+    file_contents : str
+        The contents of the file to get the tags from.
+    """
+    instrumentation.count("regex_calls")
+    return list(dict.fromkeys(patterns.tag.findall(file_contents)))
+
+
+__INVALID_FILE_NAME_CHARACTERS = str.maketrans(
+    dict.fromkeys("#%{&}\\<>*?/$!'\":@+`|=", "-")
+)
+
+
 def validate_file_name(file_name: str, max_length: int = 30) -> str:
     """Validates a file name's characters and length.
 
@@ -324,9 +469,7 @@ def validate_file_name(file_name: str, max_length: int = 30) -> str:
     """
     root, ext = os.path.splitext(file_name)
     root = root[:max_length]
-    invalid_characters = "#%{&}\\<>*?/$!'\":@+`|="
-    for ch in invalid_characters:
-        root = root.replace(ch, "-")
+    root = root.translate(__INVALID_FILE_NAME_CHARACTERS)
     root = root.strip(" .-_")
     return root + ext
 
@@ -348,10 +491,13 @@ def ensure_file_path_uniqueness(file_path: str) -> str:
     file_path : str
         The absolute path for the file, including the unique file name.
     """
+    instrumentation.count("stat_calls")
     while os.path.exists(file_path):
         folder_path, file_name_and_ext = os.path.split(file_path)
         file_name, file_ext = os.path.splitext(file_name_and_ext)
         match = re.match(r".+\.(\d+)$", file_name)
+        instrumentation.count("regex_calls")
+        instrumentation.count("stat_calls")
         if not match:
             file_name += ".1"
         else:
@@ -361,16 +507,158 @@ def ensure_file_path_uniqueness(file_path: str) -> str:
     return file_path
 
 
+class FileNameRegistry:
+    """Chooses unique names for new files in one folder.
+
+    The folder's file names are listed once, so choosing a name does not need any
+    ``os.path.exists`` calls. Names follow the same rules as
+    ``ensure_file_path_uniqueness``: if a name is taken, ``.1`` is appended to it unless
+    it already ends with a number, in which case the number is increased. The names
+    chosen are remembered, so many files with the same planned name each get the next
+    free number without checking the earlier numbers again.
+
+    Other programs may create files in the folder after it is listed, so files are
+    created with ``open(..., "x")``, and if a name turns out to be taken, the next free
+    name is tried.
+
+    Attributes
+    ----------
+    folder_path : str
+        The absolute path to the folder.
+    """
+
+    def __init__(self, folder_path: str):
+        self.folder_path = folder_path
+        instrumentation.count("stat_calls")
+        with os.scandir(folder_path) as entries:
+            self.__taken: set[str] = {os.path.normcase(e.name) for e in entries}
+        self.__next_numbers: dict[tuple[str, int], int] = {}
+
+    def reserve(self, file_name: str) -> str:
+        """Chooses a unique name for a new file and returns the file's absolute path.
+
+        Parameters
+        ----------
+        file_name : str
+            The planned name of the file, including its extension. It is assumed to
+            not have any invalid characters.
+        """
+        if os.path.normcase(file_name) not in self.__taken:
+            self.__taken.add(os.path.normcase(file_name))
+            return os.path.join(self.folder_path, file_name)
+        stem, ext = os.path.splitext(file_name)
+        match = re.match(r".+\.(\d+)$", stem)
+        instrumentation.count("regex_calls")
+        if match:
+            prefix, number = stem[: match.start(1)], int(match[1]) + 1
+        else:
+            prefix, number = stem + ".", 1
+        key = (os.path.normcase(prefix + ext), number)
+        number = self.__next_numbers.get(key, number)
+        while os.path.normcase(f"{prefix}{number}{ext}") in self.__taken:
+            number += 1
+        self.__next_numbers[key] = number + 1
+        file_name = f"{prefix}{number}{ext}"
+        self.__taken.add(os.path.normcase(file_name))
+        return os.path.join(self.folder_path, file_name)
+
+    def create_file(self, file_name: str, content: str) -> str:
+        """Creates a file with a unique name and returns the file's absolute path.
+
+        Parameters
+        ----------
+        file_name : str
+            The planned name of the file, including its extension. It is assumed to
+            not have any invalid characters.
+        content : str
+            The text to save in the file.
+        """
+        while True:
+            file_path = self.reserve(file_name)
+            try:
+                with open(file_path, "x", encoding="utf8") as file:
+                    file.write(content)
+                    instrumentation.count("bytes_written", file.tell())
+            except FileExistsError:
+                continue
+            instrumentation.count("files_written")
+            return file_path
+
+
+def move_notes(
+    notes: list[Note],
+    new_folder_path: str,
+    all_notes: list[Note],
+    note_types: list[str],
+    link_index: "LinkIndex | None" = None,
+) -> list[Note]:
+    """Moves notes to a new folder and updates internal links to them.
+
+    Notes that do not exist, that would replace an existing file, or that have the same
+    name as an earlier note in the list are not moved, and the user is told about them.
+
+    Parameters
+    ----------
+    notes : list[Note]
+        The notes to move.
+    new_folder_path : str
+        The absolute path to the new folder.
+    all_notes : list[Note]
+        A list of all the notes in the user's notes folder.
+    note_types : list[str]
+        A list of all the file extensions note files can have. Each file extension
+        includes the period.
+    link_index : LinkIndex | None, optional
+        An index of the links in all_notes to reuse. If None, one is created.
+
+    Returns
+    -------
+    list[Note]
+        The notes that were moved.
+    """
+    notes_to_move: list[Note] = []
+    new_paths: set[str] = set()
+    for note_ in notes:
+        new_path: str = os.path.join(new_folder_path, note_.name)
+        if not os.path.exists(note_.path):
+            show_message(f"File not found: {note_.path}")
+        elif os.path.exists(new_path):
+            show_message(f"File already exists: {new_path}")
+        elif new_path in new_paths:
+            show_message(f"Another file is already being moved to {new_path}")
+        else:
+            new_paths.add(new_path)
+            notes_to_move.append(note_)
+    if not notes_to_move:
+        return []
+    move_files(
+        [n.path for n in notes_to_move],
+        new_folder_path,
+        all_notes,
+        note_types,
+        link_index,
+    )
+    for note_ in notes_to_move:
+        note_.path = os.path.join(new_folder_path, note_.name)
+        note_.folder_path = new_folder_path
+    return notes_to_move
+
+
 def move_files(
     paths_of_files_to_move: list[str],
     destination_path: str,
     all_notes: list[Note],
     note_types: list[str],
-) -> None:
+    link_index: "LinkIndex | None" = None,
+    dry_run: bool = False,
+) -> dict[str, str]:
     """Moves files and updates all relevant references everywhere.
 
     Updates paths to these files in any of the notes in the source folder chosen in
     settings, and updates any relative paths in these files if they are of a note type.
+    All the changes are planned in memory first. Then the files are moved, and only the
+    notes whose content changed are written, each once and all at once (see
+    ``write_text_atomically``).
 
     Parameters
     ----------
@@ -383,21 +671,167 @@ def move_files(
     note_types : list[str]
         A list of all the file extensions note files can have. Each file extension
         includes the period.
+    link_index : LinkIndex | None, optional
+        An index of the links in all_notes. If None, one is created. An index that is
+        passed in is kept up to date, so it can be reused for later moves.
+    dry_run : bool, optional
+        If True, nothing is moved or written and link_index is not changed; only the
+        changes that would be made are returned.
+
+    Raises
+    ------
+    ValueError
+        If two of the files have the same name, so they would be moved to the same
+        path. Nothing is moved or changed.
+    OSError
+        If a file cannot be moved. The files that were already moved are moved back,
+        and no notes are changed.
+
+    Returns
+    -------
+    dict[str, str]
+        The new content of each note that changed, keyed by the note's absolute path
+        after the move.
     """
+    if link_index is None:
+        link_index = LinkIndex(all_notes)
+    planned_index: LinkIndex = link_index.copy()
+    original_contents: dict[str, str] = {}
+    new_contents: dict[str, str] = {}
+    moves: dict[str, str] = {}
     for path in paths_of_files_to_move:
         path = os.path.normpath(path).replace("\\", "/")
         file_name_with_ext: str = os.path.basename(path)
         _, file_ext = os.path.splitext(file_name_with_ext)
         if file_ext in note_types:
-            _make_file_paths_absolute(note_path=path)
+            content = __read_new_content(path, new_contents, original_contents, moves)
+            new_contents[path] = make_file_paths_absolute(
+                content, path, planned_index.path_cache
+            )
+            planned_index.update_note(path, new_contents[path])
         new_path = os.path.normpath(
             os.path.join(destination_path, file_name_with_ext)
         ).replace("\\", "/")
-        __change_all_links_to_file(path, new_path, all_notes)
-        os.rename(path, new_path)
+        if new_path in moves:
+            raise ValueError(
+                f"{moves[new_path]} and {path} would both be moved to {new_path}"
+            )
+        for linking_path, original_paths in planned_index.get_links_to(path).items():
+            content = __read_new_content(
+                linking_path, new_contents, original_contents, moves
+            )
+            original_paths_pattern = re.compile(
+                "|".join(
+                    re.escape(p) for p in sorted(original_paths, key=len, reverse=True)
+                )
+            )
+            new_contents[linking_path] = original_paths_pattern.sub(
+                lambda _: new_path, content
+            )
+        planned_index.record_move(path, new_path)
+        moves[new_path] = path
+        if path in new_contents:
+            new_contents[new_path] = new_contents.pop(path)
+            original_contents[new_path] = original_contents.pop(path)
+    changes: dict[str, str] = {
+        note_path: content
+        for note_path, content in new_contents.items()
+        if content != original_contents[note_path]
+    }
+    if dry_run:
+        return changes
+    moved: list[tuple[str, str]] = []
+    try:
+        for new_path, path in moves.items():
+            os.rename(path, new_path)
+            moved.append((path, new_path))
+    except OSError:
+        for path, new_path in reversed(moved):
+            os.rename(new_path, path)
+        raise
+    finally:
+        link_index.path_cache.invalidate(*moves, *moves.values())
+    link_index.update_from(planned_index)
+    for note_path, content in changes.items():
+        write_text_atomically(note_path, content)
+    instrumentation.count("notes_rewritten", len(changes))
+    return changes
+
+
+def __read_new_content(
+    note_path: str,
+    new_contents: dict[str, str],
+    original_contents: dict[str, str],
+    moves: dict[str, str],
+) -> str:
+    """Gets a note's planned content, or reads it from its file if it has none yet.
 
+    Parameters
+    ----------
+    note_path : str
+        The absolute path to the note, after any planned move.
+    new_contents : dict[str, str]
+        The planned content of each note, keyed by path after any planned move.
+    original_contents : dict[str, str]
+        The content each note had when it was read. This function adds to it.
+    moves : dict[str, str]
+        The current path of each file that will be moved, keyed by its planned path.
+    """
+    if note_path in new_contents:
+        return new_contents[note_path]
+    with open(moves.get(note_path, note_path), "r", encoding="utf8") as file:
+        content = file.read()
+    original_contents[note_path] = content
+    return content
+
+
+def write_text_atomically(file_path: str, content: str) -> None:
+    """Replaces a file's content all at once.
+
+    The content is written to a hidden temporary file with a unique name in the same
+    folder which then replaces the file, so the file never has partial content and no
+    other file is overwritten. The file's permissions are kept. If the path is a
+    symbolic link, the file it links to is replaced.
 
-def make_file_paths_absolute(note_content: str, note_path: str) -> str:
+    Parameters
+    ----------
+    file_path : str
+        The absolute path to the file.
+    content : str
+        The file's new content.
+    """
+    file_path = os.path.realpath(file_path)
+    folder_path, file_name = os.path.split(file_path)
+    while True:
+        temp_file_path = os.path.join(
+            folder_path, f".{file_name}.{os.getpid()}.{next(__temp_file_ids)}.tmp"
+        )
+        try:
+            fd: int = os.open(
+                temp_file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666
+            )
+        except FileExistsError:
+            continue
+        break
+    try:
+        with open(fd, "w", encoding="utf8") as file:
+            file.write(content)
+        try:
+            shutil.copymode(file_path, temp_file_path)
+        except FileNotFoundError:
+            pass
+        os.replace(temp_file_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_file_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def make_file_paths_absolute(
+    note_content: str, note_path: str, path_cache: "PathCache | None" = None
+) -> str:
     """Makes all file paths in a note's file links absolute.
 
     Assumes that all the file paths that should be made absolute are valid. Invalid
@@ -409,6 +843,8 @@ def make_file_paths_absolute(note_content: str, note_path: str) -> str:
         The note's content.
     note_path : str
         The absolute path to the note.
+    path_cache : PathCache | None, optional
+        The cache to check whether files exist with. If None, every file is checked.
 
     Returns
     -------
@@ -416,7 +852,9 @@ def make_file_paths_absolute(note_content: str, note_path: str) -> str:
         The note's content with all file paths made absolute.
     """
     note_folder_path = os.path.dirname(note_path)
-    file_paths: list[tuple[str, str]] = get_file_paths(note_content, note_folder_path)
+    file_paths: list[tuple[str, str]] = get_file_paths(
+        note_content, note_folder_path, path_cache
+    )
     for original_path, formatted_path in file_paths:
         note_content = note_content.replace(original_path, formatted_path)
     return note_content
@@ -435,41 +873,14 @@ def _make_file_paths_absolute(note_path: str) -> None:
     """
     with open(note_path, "r", encoding="utf8") as file:
         content = file.read()
-    content = make_file_paths_absolute(content, note_path)
-    with open(note_path, "w", encoding="utf8") as file:
-        file.write(content)
-
-
-def __change_all_links_to_file(
-    current_path_to_change: str, new_path: str, all_notes: list[Note]
-) -> None:
-    """Changes the path to a file in all notes' links.
-
-    Use this before moving a file to a different location.
-
-    Parameters
-    ----------
-    current_path_to_change : str
-        Absolute path to the file.
-    new_path : str
-        Absolute path the file will have after being moved.
-    all_notes : list[Note]
-        A list of all notes in the source folder.
-    """
-    all_note_names: list[str] = []
-    for note_ in all_notes:
-        all_note_names.append(note_.name)
-        with open(note_.path, "r", encoding="utf8") as file:
-            content: str = file.read()
-        file_paths: list[tuple[str, str]] = get_file_paths(content, note_.folder_path)
-        for ORIGINAL_PATH, formatted_path in file_paths:
-            if os.path.samefile(formatted_path, current_path_to_change):
-                content = content.replace(ORIGINAL_PATH, new_path)
-        with open(note_.path, "w", encoding="utf8") as file:
-            file.write(content)
+    new_content = make_file_paths_absolute(content, note_path)
+    if new_content != content:
+        write_text_atomically(note_path, new_content)
 
 
-def get_file_paths(note_content: str, note_folder_path: str) -> list[tuple[str, str]]:
+def get_file_paths(
+    note_content: str, note_folder_path: str, path_cache: "PathCache | None" = None
+) -> list[tuple[str, str]]:
     """Gets the original and formatted file paths in links in a note.
 
     Only paths to files that exist are returned.
@@ -480,6 +891,8 @@ def get_file_paths(note_content: str, note_folder_path: str) -> list[tuple[str,
         The note's content.
     note_folder_path : str
         The absolute path to the note's folder.
+    path_cache : PathCache | None, optional
+        The cache to check whether files exist with. If None, every file is checked.
 
     Returns
     -------
@@ -491,6 +904,7 @@ def get_file_paths(note_content: str, note_folder_path: str) -> list[tuple[str,
     noted_file_path_groups: list[tuple[str]] = patterns.file_path_in_link.findall(
         note_content
     )
+    instrumentation.count("regex_calls")
     ORIGINAL_PATHS: list[str] = [t[0] for t in noted_file_path_groups]
     result_paths: list[tuple[str, str]] = []
     for ORIGINAL_PATH in ORIGINAL_PATHS:
@@ -499,11 +913,211 @@ def get_file_paths(note_content: str, note_folder_path: str) -> list[tuple[str,
         else:
             abs_path = os.path.join(note_folder_path, ORIGINAL_PATH)
         norm_path: str = os.path.normpath(abs_path).replace("\\", "/")
-        if os.path.exists(norm_path):
+        if path_cache is not None:
+            exists = path_cache.exists(norm_path)
+        else:
+            instrumentation.count("stat_calls")
+            exists = os.path.exists(norm_path)
+        if exists:
             result_paths.append((ORIGINAL_PATH, norm_path))
     return result_paths
 
 
+class PathCache:
+    """Remembers which files exist and which files they are.
+
+    Each path is only checked with ``os.stat`` the first time it is needed. Files are
+    identified by their device and inode numbers, the same way ``os.path.samefile``
+    identifies them. The cache is meant to be used for one task at a time, such as
+    moving files, and paths must be invalidated when their files are created, moved,
+    or deleted.
+    """
+
+    def __init__(self):
+        self.__keys: dict[str, tuple[int, int] | None] = {}
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+    def get_key(self, file_path: str) -> tuple[int, int] | None:
+        """Gets a file's device and inode numbers, or None if it does not exist.
+
+        Parameters
+        ----------
+        file_path : str
+            The absolute path to the file.
+        """
+        file_path = os.path.normpath(file_path).replace("\\", "/")
+        if file_path in self.__keys:
+            instrumentation.count("path_cache_hits")
+            return self.__keys[file_path]
+        instrumentation.count("stat_calls")
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            key = None
+        else:
+            key = stat.st_dev, stat.st_ino
+        self.__keys[file_path] = key
+        return key
+
+    def exists(self, file_path: str) -> bool:
+        """Determines whether a file exists.
+
+        Parameters
+        ----------
+        file_path : str
+            The absolute path to the file.
+        """
+        return self.get_key(file_path) is not None
+
+    def invalidate(self, *file_paths: str) -> None:
+        """Forgets what is known about files.
+
+        Parameters
+        ----------
+        *file_paths : str
+            The absolute paths to the files.
+        """
+        for file_path in file_paths:
+            self.__keys.pop(os.path.normpath(file_path).replace("\\", "/"), None)
+
+
+class LinkIndex:
+    """An index of the notes that link to each file.
+
+    Each note is read once when the index is created. After that, finding the notes
+    that link to a file does not read any notes. Files are compared the same way
+    ``os.path.samefile`` compares them, so different paths to the same file are found.
+
+    Attributes
+    ----------
+    path_cache : PathCache
+        The cache the index checks files with. It is shared with the index's copies.
+    """
+
+    def __init__(self, notes: list[Note], path_cache: PathCache | None = None):
+        self.path_cache = path_cache if path_cache is not None else PathCache()
+        self.__links: dict[tuple[int, int], dict[str, set[str]]] = {}
+        self.__targets: dict[str, set[tuple[int, int]]] = {}
+        for note_ in notes:
+            try:
+                with open(note_.path, "r", encoding="utf8") as file:
+                    content = file.read()
+            except FileNotFoundError:
+                continue
+            self.update_note(note_.path, content)
+
+    def update_note(self, note_path: str, content: str) -> None:
+        """Replaces the links recorded for a note.
+
+        Parameters
+        ----------
+        note_path : str
+            The absolute path to the note.
+        content : str
+            The note's content.
+        """
+        note_path = self.__normalize(note_path)
+        self.remove_note(note_path)
+        targets: set[tuple[int, int]] = set()
+        folder_path = os.path.dirname(note_path)
+        for original_path, formatted_path in get_file_paths(
+            content, folder_path, self.path_cache
+        ):
+            key = self.path_cache.get_key(formatted_path)
+            if key is not None:
+                linking_notes = self.__links.setdefault(key, {})
+                linking_notes.setdefault(note_path, set()).add(original_path)
+                targets.add(key)
+        self.__targets[note_path] = targets
+
+    def remove_note(self, note_path: str) -> None:
+        """Forgets the links in a note.
+
+        Parameters
+        ----------
+        note_path : str
+            The absolute path to the note.
+        """
+        note_path = self.__normalize(note_path)
+        for key in self.__targets.pop(note_path, set()):
+            linking_notes = self.__links[key]
+            linking_notes.pop(note_path, None)
+            if not linking_notes:
+                del self.__links[key]
+
+    def get_links_to(self, file_path: str) -> dict[str, set[str]]:
+        """Gets the notes that link to a file.
+
+        Parameters
+        ----------
+        file_path : str
+            The absolute path to the file.
+
+        Returns
+        -------
+        dict[str, set[str]]
+            The absolute paths of the notes that link to the file, each with the paths
+            to the file exactly as they are written in the note.
+        """
+        key = self.path_cache.get_key(file_path)
+        if key is None:
+            return {}
+        return {
+            note_path: set(original_paths)
+            for note_path, original_paths in self.__links.get(key, {}).items()
+        }
+
+    def record_move(self, old_path: str, new_path: str) -> None:
+        """Updates the index for a file that is moving and the links to it.
+
+        This can be called before or after the file is moved.
+
+        Parameters
+        ----------
+        old_path : str
+            The absolute path the file had.
+        new_path : str
+            The absolute path the file has now, which every link to it now uses.
+        """
+        old_path = self.__normalize(old_path)
+        new_path = self.__normalize(new_path)
+        if old_path in self.__targets:
+            targets = self.__targets.pop(old_path)
+            self.__targets[new_path] = targets
+            for key in targets:
+                linking_notes = self.__links[key]
+                linking_notes[new_path] = linking_notes.pop(old_path)
+        key = self.path_cache.get_key(old_path) or self.path_cache.get_key(new_path)
+        if key is not None:
+            for original_paths in self.__links.get(key, {}).values():
+                original_paths.clear()
+                original_paths.add(new_path)
+
+    def copy(self) -> "LinkIndex":
+        """Creates a copy of the index that can be changed separately.
+
+        The copy shares the index's path cache.
+        """
+        return copy.deepcopy(self, {id(self.path_cache): self.path_cache})
+
+    def update_from(self, other: "LinkIndex") -> None:
+        """Makes the index the same as another one.
+
+        Parameters
+        ----------
+        other : LinkIndex
+            The index to copy the links from, which should not be used afterwards.
+        """
+        self.__links = other.__links
+        self.__targets = other.__targets
+
+    @staticmethod
+    def __normalize(path: str) -> str:
+        return os.path.normpath(path).replace("\\", "/")
+
+
 def get_by_title(notes: list[Note], title: str) -> Note:
     """Gets a note by its title.
 
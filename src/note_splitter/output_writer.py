@@ -0,0 +1,230 @@
+"""For saving new files so that each one is written once and never seen half written.
+
+Each file's final content is put together in memory before anything is written. The
+content is written to a hidden temporary file in the destination folder, which is then
+given its final name. If the app crashes or the disk fills up, the destination folder
+may have a leftover temporary file, but never a new note with only part of its content.
+"""
+import os
+import time
+
+from note_splitter import instrumentation
+from note_splitter.journal import SplitJournal
+from note_splitter.note import FileNameRegistry
+
+
+class OutputWriter:
+    """Writes new files into one folder and measures how fast they are written.
+
+    Attributes
+    ----------
+    registry : FileNameRegistry
+        The registry that chooses the names of the new files.
+    sync : bool
+        Whether to wait for each file to be saved to the disk before it is given its
+        final name, and for the folder to be saved to the disk when the writer is
+        closed. This is slower, but new files are not lost if the computer loses power.
+    journal : SplitJournal | None
+        The journal to record each change in before it is made, if there is one.
+    dry_run : bool
+        If True, nothing is written. New files' names are still chosen, and the files
+        and bytes that would be written are counted.
+    files_written : int
+        The number of files written so far.
+    bytes_written : int
+        The number of bytes written so far.
+    planned_file_paths : list[str]
+        The absolute paths of the files that were or would be created, in order.
+    seconds : float
+        The total time spent writing files so far.
+    """
+
+    def __init__(
+        self,
+        registry: FileNameRegistry,
+        sync: bool = False,
+        journal: SplitJournal | None = None,
+        dry_run: bool = False,
+    ):
+        self.registry = registry
+        self.sync = sync
+        self.journal = journal
+        self.dry_run = dry_run
+        self.files_written = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+        self.planned_file_paths: list[str] = []
+
+    @property
+    def folder_path(self) -> str:
+        """The absolute path to the folder that new files are written into."""
+        return self.registry.folder_path
+
+    @property
+    def bytes_per_second(self) -> float:
+        """The average number of bytes written per second so far."""
+        if not self.seconds:
+            return 0.0
+        return self.bytes_written / self.seconds
+
+    def create_file(self, file_name: str, content: str) -> str:
+        """Creates a file with a unique name and returns the file's absolute path.
+
+        Parameters
+        ----------
+        file_name : str
+            The planned name of the file, including its extension. It is assumed to
+            not have any invalid characters.
+        content : str
+            The text to save in the file.
+        """
+        if self.dry_run:
+            return self.__plan_file(self.registry.reserve(file_name), content)
+        temp_file_path: str = self.__write_temp_file(file_name, content)
+        file_path = self.__rename_to_unique_name(temp_file_path, file_name, content)
+        self.planned_file_paths.append(file_path)
+        return file_path
+
+    def create_file_at(self, file_path: str, content: str) -> str:
+        """Creates a file at a path chosen earlier, or with a new name if it is taken.
+
+        Parameters
+        ----------
+        file_path : str
+            The absolute path to the file, reserved with ``registry.reserve``.
+        content : str
+            The text to save in the file.
+
+        Returns
+        -------
+        str
+            The absolute path to the file, which is different from file_path if
+            another program created a file there after the path was reserved.
+        """
+        if self.dry_run:
+            return self.__plan_file(file_path, content)
+        file_name: str = os.path.basename(file_path)
+        temp_file_path: str = self.__write_temp_file(file_name, content)
+        if self.journal is not None:
+            self.journal.before_create(file_path, content)
+        try:
+            _rename_without_replacing(temp_file_path, file_path)
+        except FileExistsError:
+            file_path = self.__rename_to_unique_name(temp_file_path, file_name, content)
+        self.planned_file_paths.append(file_path)
+        return file_path
+
+    def replace_file(self, file_path: str, content: str) -> None:
+        """Replaces the content of a file that was already written.
+
+        Parameters
+        ----------
+        file_path : str
+            The absolute path to the file.
+        content : str
+            The file's new content.
+        """
+        if self.dry_run:
+            self.files_written += 1
+            self.bytes_written += len(content.encode("utf8"))
+            return
+        temp_file_path: str = self.__write_temp_file(
+            os.path.basename(file_path), content
+        )
+        if self.journal is not None:
+            self.journal.before_replace(file_path, content)
+        os.replace(temp_file_path, file_path)
+
+    def delete_file(self, file_path: str) -> None:
+        """Deletes a file that was written by an earlier split.
+
+        Parameters
+        ----------
+        file_path : str
+            The absolute path to the file.
+        """
+        if self.dry_run:
+            return
+        if self.journal is not None:
+            self.journal.before_delete(file_path)
+        os.remove(file_path)
+        instrumentation.count("files_deleted")
+
+    def close(self) -> None:
+        """Saves the folder to the disk if ``sync`` is True.
+
+        Files that were written are not affected.
+        """
+        if self.dry_run or not self.sync or not self.files_written:
+            return
+        if hasattr(os, "O_DIRECTORY"):
+            folder_descriptor: int = os.open(self.folder_path, os.O_DIRECTORY)
+            try:
+                os.fsync(folder_descriptor)
+            finally:
+                os.close(folder_descriptor)
+
+    def summary(self) -> str:
+        """Describes how many files were written and how fast."""
+        return (
+            f"Wrote {self.files_written} files ({self.bytes_written / 1024:.1f} KiB)"
+            f" in {self.seconds:.3f} s"
+            f" ({self.bytes_per_second / 1024 / 1024:.2f} MiB/s)."
+        )
+
+    def __plan_file(self, file_path: str, content: str) -> str:
+        """Counts a file that would be created in a dry run and returns its path."""
+        self.files_written += 1
+        self.bytes_written += len(content.encode("utf8"))
+        self.planned_file_paths.append(file_path)
+        return file_path
+
+    def __rename_to_unique_name(
+        self, temp_file_path: str, file_name: str, content: str
+    ) -> str:
+        """Gives a temporary file the next free name and returns its new path."""
+        while True:
+            file_path: str = self.registry.reserve(file_name)
+            if self.journal is not None:
+                self.journal.before_create(file_path, content)
+            try:
+                _rename_without_replacing(temp_file_path, file_path)
+            except FileExistsError:
+                continue
+            return file_path
+
+    def __write_temp_file(self, file_name: str, content: str) -> str:
+        """Writes a hidden temporary file in the folder and returns its path."""
+        start = time.perf_counter()
+        temp_file_path: str = os.path.join(
+            self.folder_path, f".{file_name}.{os.getpid()}.{self.files_written}.tmp"
+        )
+        with open(temp_file_path, "w", encoding="utf8") as file:
+            file.write(content)
+            size: int = file.tell()
+            if self.sync:
+                file.flush()
+                os.fsync(file.fileno())
+        self.seconds += time.perf_counter() - start
+        self.files_written += 1
+        self.bytes_written += size
+        instrumentation.count("files_written")
+        instrumentation.count("bytes_written", size)
+        return temp_file_path
+
+
+def _rename_without_replacing(src: str, dst: str) -> None:
+    """Renames a file, raising FileExistsError instead of replacing another file."""
+    if os.name == "nt":
+        os.rename(src, dst)  # Windows never replaces files when renaming.
+        return
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        raise
+    except OSError:  # The file system does not support hard links.
+        if os.path.exists(dst):
+            raise FileExistsError(dst)
+        os.rename(src, dst)
+        return
+    os.remove(src)
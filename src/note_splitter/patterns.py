@@ -25,9 +25,11 @@ horizontal_rule : re.Pattern
     The pattern for a horizontal rule, which is composed of three or more minuses,
     underscores, or asterisks. There may be any number of whitespace characters anywhere
     on the line (a full-line element).
-file_path_in_link : re.Pattern
+file_path_in_link : FilePathInLinkPattern
     The pattern for a relative or absolute file path in a link (an inline element). This
-    pattern also matches some website URLs in links.
+    pattern also matches some website URLs in links. It is not compiled by ``re``
+    because backtracking made it take quadratic time or worse to search long lines (see
+    ``FilePathInLinkPattern``).
 math_fence : re.Pattern
     The pattern for the delimiter of a multi-line block of math equations (a full-line
     element).
@@ -35,7 +37,9 @@ ordered_list_item : re.Pattern
     The pattern for an item in an ordered list (a full-line element).
 table_divider : re.Pattern
     The pattern for the part of a table that divides the table's header from its body (a
-    full-line element). This pattern can also match some horizontal rules.
+    full-line element). This pattern can also match some horizontal rules. The cells
+    between pipe symbols cannot be next to each other, which would make the number of
+    ways to try to match a long line of minuses grow exponentially.
 table_row : re.Pattern
     The pattern for a row of a table (a full-line element). This pattern can also match
     some table dividers. Table rows that do not start and end with a pipe symbol are not
@@ -51,6 +55,7 @@ unordered_list_item : re.Pattern
     some horizontal rules and to dos.
 """
 import re
+from typing import Iterator
 
 
 # full-line elements
@@ -64,17 +69,113 @@ header = re.compile(r"^#+ .+")
 horizontal_rule = re.compile(r"^\s*(?:(?:-\s*){3,}|(?:\*\s*){3,}|(?:_\s*){3,})$")
 math_fence = re.compile(r"^\s*\$\$\s*$")
 ordered_list_item = re.compile(r"^\s*\d+[.)]\s.*")
-table_divider = re.compile(r"^\|?(?: *[-:]{3,} *\|?)+$")
+table_divider = re.compile(r"^\|? *[-:]{3,}(?:(?: *\| *| +)[-:]{3,})* *\|?$")
 table_row = re.compile(r"^\|.+\|$")
 task = re.compile(r"^\s*[*+-] \[[x\s]\] .+")
 unordered_list_item = re.compile(r"^\s*[*+-]\s.*")
 
+
 # inline elements
-file_path_in_link = re.compile(
-    r"(?<=]\()(?!https?://|www\d?\.|mailto:|zotero:|obsidian:)"
-    r"(?P<path>.*?(?P<basename>[^(/|\\)]*?(?P<ext>\.[^.\\/]+)))"
-    r"(?=\)(?!`))"
-)
+class FilePathInLinkPattern:
+    r"""Finds file paths in links in linear time.
+
+    The results are the same as those of this regular expression::
+
+        (?<=]\()(?!https?://|www\d?\.|mailto:|zotero:|obsidian:)
+        (?P<path>.*?(?P<basename>[^(/|\\)]*?(?P<ext>\.[^.\\/]+)))
+        (?=\)(?!`))
+
+    For each position after ``](``, the regular expression tries every combination of
+    the lengths of the path's directory, the basename, and the extension. Instead, only
+    the positions of periods are searched, and each period is checked only once. A
+    path's extension starts at the first period after the link's start that is followed
+    by a closing parenthesis before the next period or slash.
+
+    Attributes
+    ----------
+    pattern : str
+        The regular expression, for showing in the settings.
+    flags : int
+        The regular expression's flags.
+    """
+
+    __IGNORED_PREFIXES = re.compile(r"https?://|www\d?\.|mailto:|zotero:|obsidian:")
+    __EXTENSION_END = re.compile(r"[.\\/]")
+    __BASENAME_EXCLUSIONS = re.compile(r"[(/|\\)]")
+
+    def __init__(self):
+        self.pattern: str = (
+            r"(?<=]\()(?!https?://|www\d?\.|mailto:|zotero:|obsidian:)"
+            r"(?P<path>.*?(?P<basename>[^(/|\\)]*?(?P<ext>\.[^.\\/]+)))"
+            r"(?=\)(?!`))"
+        )
+        self.flags: int = re.compile(self.pattern).flags
+
+    def findall(self, string: str) -> list[tuple[str, str, str]]:
+        """Returns each path's path, basename, and extension, like ``re.findall``."""
+        return list(self.__finditer(string))
+
+    def __finditer(self, string: str) -> Iterator[tuple[str, str, str]]:
+        checked_start: int = 0
+        period: int = -1
+        extension_end: int = -1
+        last_exclusion: int = -1
+        newline: int = -1
+        link_start: int = string.find("](")
+        while link_start != -1:
+            start: int = link_start + 2
+            if self.__IGNORED_PREFIXES.match(string, start):
+                link_start = string.find("](", link_start + 1)
+                continue
+            if period < start:
+                previous_period: int = max(period, 0)
+                period, extension_end = self.__find_extension(
+                    string, max(start, checked_start)
+                )
+                if period == -1:
+                    return
+                checked_start = period + 1
+                # The last character before the period that cannot be in a basename.
+                # Each part of the string is only searched once.
+                for match in self.__BASENAME_EXCLUSIONS.finditer(
+                    string, previous_period, period
+                ):
+                    last_exclusion = match.start()
+            if newline < start:
+                newline = string.find("\n", start)
+                if newline == -1:
+                    newline = len(string)
+            if start <= last_exclusion and newline < last_exclusion:
+                # The path's directory cannot contain line breaks, but its basename can.
+                link_start = string.find("](", link_start + 1)
+                continue
+            basename_start: int = max(start, last_exclusion + 1)
+            yield (
+                string[start:extension_end],
+                string[basename_start:extension_end],
+                string[period:extension_end],
+            )
+            link_start = string.find("](", extension_end - 2)
+
+    def __find_extension(self, string: str, start: int) -> tuple[int, int]:
+        """Finds the first period at or after a position that can start an extension.
+
+        Returns the period's index and the extension's end, or -1 and -1.
+        """
+        period: int = string.find(".", start)
+        while period != -1:
+            match = self.__EXTENSION_END.search(string, period + 1)
+            end: int = len(string) if match is None else match.start()
+            parenthesis: int = string.rfind(")", period + 2, end)
+            while parenthesis != -1 and string.startswith("`", parenthesis + 1):
+                parenthesis = string.rfind(")", period + 2, parenthesis)
+            if parenthesis != -1:
+                return period, parenthesis
+            period = string.find(".", period + 1)
+        return -1, -1
+
+
+file_path_in_link = FilePathInLinkPattern()
 tag = re.compile(
     r"(?<!\S)(?:(?:#+[\w\d_-]*[\w\d_-]#?)|(?:(?<=.)#+[\w\d_-]*[\w\d_-]#?))"
 )
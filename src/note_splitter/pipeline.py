@@ -0,0 +1,1056 @@
+"""The steps for splitting files that do not depend on the graphical user interface.
+
+The split tab and the batch mode (``python -m note_splitter --batch``) both use the
+functions here. Settings are read once per run into a ``SplitConfig``.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+from typing import Any
+from typing import Callable
+
+from note_splitter import instrumentation
+from note_splitter import tokens
+from note_splitter.async_io import AsyncFileIO
+from note_splitter.async_io import read_bytes
+from note_splitter.formatter_ import Formatter
+from note_splitter.journal import SplitJournal
+from note_splitter.journal import SplitLock
+from note_splitter.lexer import Lexer
+from note_splitter.manifest import create_section_ids
+from note_splitter.manifest import hash_text
+from note_splitter.manifest import OutputRecord
+from note_splitter.manifest import SplitManifest
+from note_splitter.note import create_file_names
+from note_splitter.note import create_notes
+from note_splitter.note import file_contains
+from note_splitter.note import FileNameRegistry
+from note_splitter.note import get_file_paths
+from note_splitter.note import get_title
+from note_splitter.note import make_file_paths_absolute
+from note_splitter.note import Note
+from note_splitter.note import PathCache
+from note_splitter.note import validate_file_name
+from note_splitter.output_writer import OutputWriter
+from note_splitter.parser_ import SyntaxTree
+from note_splitter.plan import estimate_seconds
+from note_splitter.plan import PlannedSource
+from note_splitter.plan import SplitPlan
+from note_splitter.settings import DEFAULT_SETTINGS
+from note_splitter.settings import get_app_data_folder_path
+from note_splitter.settings import get_token_type
+from note_splitter.settings import get_token_type_name
+from note_splitter.split_cache import create_key
+from note_splitter.split_cache import SplitCache
+from note_splitter.splitter import Splitter
+from PySide6 import QtCore
+
+
+@dataclass
+class SplitConfig:
+    """The settings that affect how files are split and where new files are saved.
+
+    Attributes
+    ----------
+    split_keyword : str
+        The keyword for deciding which files to split.
+    file_id_format : str
+        The format of the file IDs.
+    file_name_format : str
+        The format of the new file names.
+    split_type : type[tokens.Token]
+        The type of token to split by.
+    split_attrs : dict
+        The attributes of the token to split by.
+    using_split_keyword : bool
+        Whether the split keyword was used to find the files to split.
+    remove_split_keyword : bool
+        Whether to remove the split keyword from the new files.
+    parse_blocks : bool
+        Whether to parse blocks.
+    copy_global_tags : bool
+        Whether to copy global tags to each new file.
+    copy_frontmatter : bool
+        Whether to copy frontmatter to each new file.
+    move_footnotes : bool
+        Whether to move footnotes into the new files.
+    create_index_file : bool
+        Whether to create an index file for each split file.
+    create_backlinks : bool
+        Whether to append a backlink to each new file.
+    source_folder_path : str | None
+        The absolute path to the folder of files to split, if one was chosen.
+    destination_folder_path : str
+        The absolute path to the folder to save new files in.
+    use_split_cache : bool
+        Whether to reuse the saved results of splitting files that have not changed.
+    incremental_split : bool
+        Whether to update the files created the last time a file was split instead of
+        creating new files for every section.
+    sync_output_files : bool
+        Whether to wait for each new file to be saved to the disk before continuing.
+    io_concurrency : int
+        The maximum number of files to read or write at the same time. If more than 1,
+        files are read ahead and saved while other files are split.
+    lexer_processes : int
+        The number of processes to lex each very long file in.
+    """
+
+    split_keyword: str
+    file_id_format: str
+    file_name_format: str
+    split_type: type[tokens.Token]
+    split_attrs: dict
+    using_split_keyword: bool
+    remove_split_keyword: bool
+    parse_blocks: bool
+    copy_global_tags: bool
+    copy_frontmatter: bool
+    move_footnotes: bool
+    create_index_file: bool
+    create_backlinks: bool
+    source_folder_path: str | None
+    destination_folder_path: str
+    use_split_cache: bool
+    incremental_split: bool
+    sync_output_files: bool = False
+    io_concurrency: int = 1
+    lexer_processes: int = 1
+
+    @classmethod
+    def from_settings(cls) -> "SplitConfig":
+        """Creates a SplitConfig from the user's saved settings.
+
+        The default settings are used for any settings that are not found.
+        """
+        settings = QtCore.QSettings()
+
+        def value(key: str) -> object:
+            return settings.value(key, DEFAULT_SETTINGS[key])
+
+        return cls(
+            split_keyword=value("split_keyword"),  # type: ignore
+            file_id_format=value("file_id_format"),  # type: ignore
+            file_name_format=value("file_name_format"),  # type: ignore
+            split_type=get_token_type(value("split_type")),  # type: ignore
+            split_attrs=value("split_attrs"),  # type: ignore
+            using_split_keyword=bool(value("using_split_keyword")),
+            remove_split_keyword=bool(value("remove_split_keyword")),
+            parse_blocks=bool(value("parse_blocks")),
+            copy_global_tags=bool(value("copy_global_tags")),
+            copy_frontmatter=bool(value("copy_frontmatter")),
+            move_footnotes=bool(value("move_footnotes")),
+            create_index_file=bool(value("create_index_file")),
+            create_backlinks=bool(value("create_backlinks")),
+            source_folder_path=settings.value("source_folder_path") or None,
+            destination_folder_path=value("destination_folder_path"),  # type: ignore
+            use_split_cache=bool(value("use_split_cache")),
+            incremental_split=bool(value("incremental_split")),
+            sync_output_files=bool(value("sync_output_files")),
+            io_concurrency=int(value("io_concurrency")),  # type: ignore
+            lexer_processes=int(value("lexer_processes")),  # type: ignore
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Converts the settings to a dictionary that can be saved as JSON."""
+        data: dict[str, Any] = asdict(self)
+        data["split_type"] = get_token_type_name(self.split_type)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "SplitConfig":
+        """Creates a SplitConfig from a dictionary made by ``to_dict``.
+
+        Parameters
+        ----------
+        data : dict[str, Any]
+            The settings.
+        """
+        return cls(**{**data, "split_type": get_token_type(data["split_type"])})
+
+
+def open_split_cache(config: SplitConfig) -> SplitCache | None:
+    """Opens the split cache in the app's data folder if the settings allow it.
+
+    Parameters
+    ----------
+    config : SplitConfig
+        The settings to split with.
+    """
+    if not config.use_split_cache:
+        return None
+    return SplitCache(get_app_data_folder_path("split_cache"))
+
+
+def get_notes_in_folder(folder_path: str) -> list[Note]:
+    """Gets all the notes in a folder, not including its subfolders.
+
+    Parameters
+    ----------
+    folder_path : str
+        The absolute path to the folder.
+    """
+    file_paths: list[str] = [
+        os.path.join(folder_path, file_name) for file_name in os.listdir(folder_path)
+    ]
+    return create_notes(file_paths)
+
+
+def find_notes_with_keyword(
+    split_keyword: str,
+    notes: list[Note],
+    progress: Callable[[int], None] | None = None,
+) -> list[Note]:
+    """Filters to the notes that have the split keyword.
+
+    Parameters
+    ----------
+    split_keyword : str
+        The keyword to search for.
+    notes : list[Note]
+        The notes to search.
+    progress : Callable[[int], None] | None, optional
+        A function that is called with the number of notes searched so far.
+    """
+    chosen_notes: list[Note] = []
+    for i, note in enumerate(notes):
+        if progress is not None:
+            progress(i)
+        if file_contains(note.path, split_keyword):
+            chosen_notes.append(note)
+    return chosen_notes
+
+
+def split_files(
+    notes: list[Note],
+    config: SplitConfig,
+    progress: Callable[[int], None] | None = None,
+    cache: SplitCache | None = None,
+    resume: bool = True,
+) -> list[Note]:
+    """Splits files into multiple smaller files.
+
+    If ``config.io_concurrency`` is more than 1, this runs ``split_files_async``.
+
+    Parameters
+    ----------
+    notes : list[Note]
+        The notes to be split.
+    config : SplitConfig
+        The settings to split with. The destination folder must exist.
+    progress : Callable[[int], None] | None, optional
+        A function that is called with the percentage of the work done so far.
+    cache : SplitCache | None, optional
+        The cache of split results to use. Files whose results are in the cache are
+        not lexed, parsed, split, or formatted again.
+    resume : bool, optional
+        What to do if an earlier split into the destination folder did not finish (see
+        ``SplitJournal``). If True, the source files it finished are skipped unless
+        they changed since. If False, all its changes are undone first.
+
+    Returns
+    -------
+    new_notes : list[Note]
+        The newly created notes, including any index notes. If ``incremental_split`` is
+        on, this also includes notes that were rewritten.
+
+    Raises
+    ------
+    FolderLockedError
+        If another split into the destination folder is running.
+    """
+    if config.io_concurrency > 1:
+        return asyncio.run(split_files_async(notes, config, progress, cache, resume))
+    tokenize: Callable = Lexer(config.lexer_processes)
+    split: Callable = Splitter()
+    format_: Callable = Formatter()
+    all_new_notes: list[Note] = []
+
+    def report(step: float) -> None:
+        if progress is not None:
+            progress(int(step / (note_count + 5) * 100))
+
+    with SplitLock(config.destination_folder_path):
+        writer, manifest, journal = __start_run(config, resume)
+        finished_sources: dict[str, str] = journal.get_finished_sources()
+        note_count = len(notes)
+        for i, source_note in enumerate(notes):
+            report(i + 1)
+            with instrumentation.stage("read"):
+                content: bytes = read_bytes(source_note.path)
+            instrumentation.count("source_files")
+            if finished_sources.get(source_note.path) == hash_text(content):
+                all_new_notes.extend(
+                    create_notes(journal.get_created_files(source_note.path))
+                )
+                continue
+            if source_note.path in finished_sources and manifest is None:
+                # The file changed since the unfinished run split it.
+                journal.roll_back_source(source_note.path)
+            report(i + 2)
+            split_contents: list[str] = __split_content(
+                content, config, cache, tokenize, split, format_
+            )
+            report(i + 3)
+            all_new_notes.extend(
+                __save_sections(
+                    source_note, content, split_contents, config, writer, manifest
+                )
+            )
+            report(i + 5)
+        __finish_run(writer, manifest)
+        return all_new_notes
+
+
+async def split_files_async(
+    notes: list[Note],
+    config: SplitConfig,
+    progress: Callable[[int], None] | None = None,
+    cache: SplitCache | None = None,
+    resume: bool = True,
+) -> list[Note]:
+    """Splits files into multiple smaller files, overlapping reading and writing.
+
+    Files are read and written in worker threads, at most ``config.io_concurrency`` at
+    a time (see ``AsyncFileIO``). While a file is lexed, parsed, split, and formatted,
+    the next files are read ahead and the previous file's sections are saved. Files
+    are still split in order, and their sections are saved one file at a time, so the
+    results are the same as ``split_files``.
+
+    The parameters and return value are the same as ``split_files``'s.
+    """
+    file_io = AsyncFileIO(max(1, config.io_concurrency))
+    tokenize: Callable = Lexer(config.lexer_processes)
+    split: Callable = Splitter()
+    format_: Callable = Formatter()
+    all_new_notes: list[Note] = []
+
+    def report(step: float) -> None:
+        if progress is not None:
+            progress(int(step / (note_count + 5) * 100))
+
+    reads: dict[int, asyncio.Task] = {}
+
+    def read_ahead(index: int) -> None:
+        if index < note_count:
+            reads[index] = asyncio.create_task(file_io.read_bytes(notes[index].path))
+
+    with SplitLock(config.destination_folder_path):
+        writer, manifest, journal = __start_run(config, resume)
+        finished_sources: dict[str, str] = journal.get_finished_sources()
+        note_count = len(notes)
+        for i in range(file_io.concurrency):
+            read_ahead(i)
+        saving: asyncio.Task | None = None
+        for i, source_note in enumerate(notes):
+            report(i + 1)
+            with instrumentation.stage("read"):
+                content: bytes = await reads.pop(i)
+            read_ahead(i + file_io.concurrency)
+            instrumentation.count("source_files")
+            if finished_sources.get(source_note.path) == hash_text(content):
+                # The previous file's notes must be listed before this file's.
+                if saving is not None:
+                    all_new_notes.extend(await saving)
+                    saving = None
+                all_new_notes.extend(
+                    create_notes(journal.get_created_files(source_note.path))
+                )
+                continue
+            report(i + 2)
+            split_contents: list[str] = __split_content(
+                content, config, cache, tokenize, split, format_
+            )
+            report(i + 3)
+            if saving is not None:
+                all_new_notes.extend(await saving)
+            if source_note.path in finished_sources and manifest is None:
+                # The file changed since the unfinished run split it.
+                journal.roll_back_source(source_note.path)
+            saving = asyncio.create_task(
+                file_io.run(
+                    __save_sections,
+                    source_note,
+                    content,
+                    split_contents,
+                    config,
+                    writer,
+                    manifest,
+                )
+            )
+            report(i + 4)
+        if saving is not None:
+            all_new_notes.extend(await saving)
+        report(note_count + 4)
+        await file_io.run(__finish_run, writer, manifest)
+        return all_new_notes
+
+
+def plan_split(
+    notes: list[Note],
+    config: SplitConfig,
+    progress: Callable[[int], None] | None = None,
+    cache: SplitCache | None = None,
+    trace_folder_path: str | None = None,
+) -> SplitPlan:
+    """Plans splitting files without writing anything.
+
+    The files are lexed, parsed, split, formatted, and named the same way as by
+    ``split_files``, and the new files' names are chosen, but no files are created. If
+    ``incremental_split`` is on, the plan describes splitting into new files, so the
+    bytes to write are an upper bound.
+
+    Parameters
+    ----------
+    notes : list[Note]
+        The notes to plan to split.
+    config : SplitConfig
+        The settings to split with. The destination folder must exist.
+    progress : Callable[[int], None] | None, optional
+        A function that is called with the percentage of the work done so far.
+    cache : SplitCache | None, optional
+        The cache of split results to use.
+    trace_folder_path : str | None, optional
+        The folder of saved performance traces to estimate the write speed from (see
+        ``plan.estimate_seconds``).
+
+    Returns
+    -------
+    SplitPlan
+        The plan, which can be saved and run later with ``execute_plan``.
+    """
+    tokenize: Callable = Lexer(config.lexer_processes)
+    split: Callable = Splitter()
+    format_: Callable = Formatter()
+    destination_folder_path = config.destination_folder_path
+    writer = OutputWriter(FileNameRegistry(destination_folder_path), dry_run=True)
+    path_cache = PathCache()
+    making_paths_absolute = (
+        not config.source_folder_path
+        or config.source_folder_path != destination_folder_path
+    )
+    plan = SplitPlan(config.to_dict())
+    for i, source_note in enumerate(notes):
+        if progress is not None:
+            progress(int(i / len(notes) * 100))
+        start = time.perf_counter()
+        with instrumentation.stage("read"):
+            content: bytes = read_bytes(source_note.path)
+        plan.read_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        split_contents: list[str] = __split_content(
+            content, config, cache, tokenize, split, format_
+        )
+        with instrumentation.stage("name"):
+            new_file_names: list[str] = create_file_names(
+                source_note.ext,
+                config.file_id_format,
+                config.file_name_format,
+                split_contents,
+            )
+        plan.compute_seconds += time.perf_counter() - start
+        save_split_notes(source_note, split_contents, new_file_names, config, writer)
+        if making_paths_absolute:
+            for split_content in split_contents:
+                plan.link_rewrite_count += len(
+                    get_file_paths(split_content, destination_folder_path, path_cache)
+                )
+        plan.sources.append(
+            PlannedSource(
+                source_note.path, hash_text(content), split_contents, new_file_names
+            )
+        )
+    plan.file_paths = writer.planned_file_paths
+    plan.total_bytes = writer.bytes_written
+    plan.estimated_seconds = estimate_seconds(
+        plan.read_seconds, plan.total_bytes, writer.files_written, trace_folder_path
+    )
+    return plan
+
+
+def execute_plan(
+    plan: SplitPlan,
+    progress: Callable[[int], None] | None = None,
+    resume: bool = True,
+) -> list[Note]:
+    """Splits files as planned by ``plan_split``.
+
+    Source files that did not change since the plan was made are not lexed, parsed,
+    split, formatted, or named again. Source files that changed are split again.
+
+    Parameters
+    ----------
+    plan : SplitPlan
+        The plan to run.
+    progress : Callable[[int], None] | None, optional
+        A function that is called with the percentage of the work done so far.
+    resume : bool, optional
+        What to do if an earlier split into the destination folder did not finish (see
+        ``split_files``).
+
+    Returns
+    -------
+    new_notes : list[Note]
+        The newly created notes, the same as ``split_files`` returns.
+
+    Raises
+    ------
+    FolderLockedError
+        If another split into the destination folder is running.
+    """
+    config = SplitConfig.from_dict(plan.config)
+    tokenize: Callable = Lexer(config.lexer_processes)
+    split: Callable = Splitter()
+    format_: Callable = Formatter()
+    all_new_notes: list[Note] = []
+    with SplitLock(config.destination_folder_path):
+        writer, manifest, journal = __start_run(config, resume)
+        finished_sources: dict[str, str] = journal.get_finished_sources()
+        for i, source in enumerate(plan.sources):
+            if progress is not None:
+                progress(int(i / len(plan.sources) * 100))
+            with instrumentation.stage("read"):
+                content: bytes = read_bytes(source.source_path)
+            instrumentation.count("source_files")
+            content_hash = hash_text(content)
+            if finished_sources.get(source.source_path) == content_hash:
+                all_new_notes.extend(
+                    create_notes(journal.get_created_files(source.source_path))
+                )
+                continue
+            if source.source_path in finished_sources and manifest is None:
+                # The file changed since the unfinished run split it.
+                journal.roll_back_source(source.source_path)
+            split_contents: list[str] = source.split_contents
+            new_file_names: list[str] | None = source.file_names
+            if content_hash != source.source_hash:
+                print(
+                    f"{source.source_path} changed since it was planned. Splitting it."
+                )
+                split_contents = __split_content(
+                    content, config, None, tokenize, split, format_
+                )
+                new_file_names = None
+            all_new_notes.extend(
+                __save_sections(
+                    Note(source.source_path),
+                    content,
+                    split_contents,
+                    config,
+                    writer,
+                    manifest,
+                    new_file_names,
+                )
+            )
+        __finish_run(writer, manifest)
+        return all_new_notes
+
+
+def __start_run(
+    config: SplitConfig, resume: bool
+) -> tuple[OutputWriter, SplitManifest | None, SplitJournal]:
+    """Opens the journal, manifest, and writer of the destination folder.
+
+    If an earlier split into the folder did not finish, it is resumed or undone. The
+    caller must hold the folder's ``SplitLock`` so that the journal cannot belong to a
+    run that is still going.
+    """
+    destination_folder_path = config.destination_folder_path
+    journal = SplitJournal.in_folder(destination_folder_path, config.sync_output_files)
+    if journal.is_unfinished():
+        if resume:
+            undone_count = journal.roll_back(unfinished_only=True)
+            print(f"Resuming an unfinished split after undoing {undone_count} changes.")
+        else:
+            undone_count = journal.roll_back()
+            print(f"Undid {undone_count} changes of an unfinished split.")
+    manifest: SplitManifest | None = None
+    if config.incremental_split:
+        manifest = SplitManifest.in_folder(destination_folder_path)
+        journal.restore_manifest(manifest)
+    writer = OutputWriter(
+        FileNameRegistry(destination_folder_path), config.sync_output_files, journal
+    )
+    return writer, manifest, journal
+
+
+def __split_content(
+    content: bytes,
+    config: SplitConfig,
+    cache: SplitCache | None,
+    tokenize: Callable,
+    split: Callable,
+    format_: Callable,
+) -> list[str]:
+    """Splits a file's content, or gets the result from the cache."""
+    split_args = (
+        config.split_type,
+        config.split_attrs,
+        config.using_split_keyword,
+        config.remove_split_keyword,
+        config.split_keyword,
+        config.parse_blocks,
+        config.copy_global_tags,
+        config.copy_frontmatter,
+        config.move_footnotes,
+    )
+    if cache is not None:
+        with instrumentation.stage("cache"):
+            cache_key: str = create_key(content, *split_args)
+            cached_contents: list[str] | None = cache.get(cache_key)
+        if cached_contents is not None:
+            return cached_contents
+    split_contents = split_text(content, tokenize, split, format_, *split_args)
+    if cache is not None:
+        with instrumentation.stage("cache"):
+            cache.put(cache_key, split_contents)
+    return split_contents
+
+
+def __save_sections(
+    source_note: Note,
+    content: bytes,
+    split_contents: list[str],
+    config: SplitConfig,
+    writer: OutputWriter,
+    manifest: SplitManifest | None,
+    new_file_names: list[str] | None = None,
+) -> list[Note]:
+    """Saves a file's sections and records in the journal when they are all saved."""
+    assert writer.journal is not None
+    writer.journal.start_source(source_note.path)
+    new_notes: list[Note] = __write_sections(
+        source_note, split_contents, config, writer, manifest, new_file_names
+    )
+    writer.journal.finish_source(source_note.path, content, manifest)
+    return new_notes
+
+
+def __write_sections(
+    source_note: Note,
+    split_contents: list[str],
+    config: SplitConfig,
+    writer: OutputWriter,
+    manifest: SplitManifest | None,
+    new_file_names: list[str] | None = None,
+) -> list[Note]:
+    """Names and saves a file's sections, or updates them if there is a manifest.
+
+    If new_file_names is given, the sections are not named again.
+    """
+    if manifest is not None:
+        with instrumentation.stage("save"):
+            return resplit_note(source_note, split_contents, config, manifest, writer)
+    if new_file_names is None:
+        with instrumentation.stage("name"):
+            new_file_names = create_file_names(
+                source_note.ext,
+                config.file_id_format,
+                config.file_name_format,
+                split_contents,
+            )
+    with instrumentation.stage("save"):
+        new_notes = save_split_notes(
+            source_note, split_contents, new_file_names, config, writer
+        )
+    print(f"Created {len(split_contents)} new files.")
+    if config.create_index_file and split_contents:
+        print(f"Created index file at {new_notes[-1].path}")
+    return new_notes
+
+
+def __finish_run(writer: OutputWriter, manifest: SplitManifest | None) -> None:
+    """Closes the writer, saves the manifest, and deletes the journal.
+
+    This is only done after all the files are split.
+    """
+    writer.close()
+    if writer.files_written:
+        print(writer.summary())
+    if manifest is not None:
+        manifest.save()
+    if writer.journal is not None:
+        writer.journal.commit()
+
+
+def resplit_note(
+    source_note: Note,
+    split_contents: list[str],
+    config: SplitConfig,
+    manifest: SplitManifest,
+    writer: OutputWriter | None = None,
+) -> list[Note]:
+    """Saves a file's sections, updating the files created the last time it was split.
+
+    Files of unchanged sections are kept as they are, files of changed sections are
+    rewritten in place, and files of sections that no longer exist are deleted. Files
+    that were edited or deleted since they were created are left alone, and their
+    sections get new files. Each file that is written is written once, with its
+    backlink. The manifest is updated but not saved.
+
+    Parameters
+    ----------
+    source_note : Note
+        The note that was split.
+    split_contents : list[str]
+        The sections of the note.
+    config : SplitConfig
+        The settings to split with.
+    manifest : SplitManifest
+        The manifest of the destination folder.
+    writer : OutputWriter | None, optional
+        The writer for the destination folder. If None, a new one is created.
+
+    Returns
+    -------
+    list[Note]
+        The notes that were created or rewritten, including any index note.
+    """
+    destination_folder_path = config.destination_folder_path
+    source_folder_path = config.source_folder_path
+    if writer is None:
+        writer = OutputWriter(FileNameRegistry(destination_folder_path))
+    index_record: OutputRecord | None = manifest.get_index(source_note.path)
+    index_file_path: str | None = None
+    index_title = get_title(create_index_content(source_note, [], config.split_type))
+    if config.create_index_file and split_contents:
+        if index_record is not None and index_record.is_unmodified():
+            index_file_path = index_record.path
+        else:
+            index_record = None
+            index_name = validate_file_name(f"index - {source_note.name}", 35)
+            index_file_path = writer.registry.reserve(index_name)
+    backlink = ""
+    if config.create_backlinks:
+        if index_file_path is not None:
+            backlink = create_backlink(index_title, index_file_path)
+        else:
+            backlink = create_backlink(source_note.title, source_note.path)
+
+    previous_records: dict[str, OutputRecord] = manifest.get_sections(source_note.path)
+    titles: list[str] = [get_title(content) for content in split_contents]
+    section_ids: list[str] = create_section_ids(titles)
+    records: dict[str, OutputRecord] = {}
+    changed_section_indexes: list[int] = []
+    new_section_indexes: list[int] = []
+    kept_count = 0
+    for i, (section_id, content) in enumerate(zip(section_ids, split_contents)):
+        # Sections whose backlink changed are rewritten too.
+        content_hash = hash_text(content + backlink)
+        record: OutputRecord | None = previous_records.pop(section_id, None)
+        if record is None or not record.is_unmodified():
+            record = OutputRecord("", content_hash)
+            new_section_indexes.append(i)
+        elif record.content_hash != content_hash:
+            record.content_hash = content_hash
+            changed_section_indexes.append(i)
+        else:
+            kept_count += 1
+        records[section_id] = record
+
+    def make_absolute(content: str, file_path: str) -> str:
+        if not source_folder_path or source_folder_path != destination_folder_path:
+            return make_file_paths_absolute(content, file_path)
+        return content
+
+    written_notes: list[Note] = []
+    written_contents: dict[str, str] = {}
+    for i in changed_section_indexes:
+        file_path = records[section_ids[i]].path
+        content = make_absolute(split_contents[i], file_path)
+        writer.replace_file(file_path, content + backlink)
+        written_contents[file_path] = content
+        written_notes.append(
+            Note(
+                file_path,
+                destination_folder_path,
+                os.path.basename(file_path),
+                titles[i],
+            )
+        )
+    if new_section_indexes:
+        with instrumentation.stage("name"):
+            new_file_names: list[str] = create_file_names(
+                source_note.ext,
+                config.file_id_format,
+                config.file_name_format,
+                [split_contents[i] for i in new_section_indexes],
+                [titles[i] for i in new_section_indexes],
+            )
+        for i, new_file_name in zip(new_section_indexes, new_file_names):
+            # The links only depend on the folder, not on the file's final name.
+            content = make_absolute(
+                split_contents[i], os.path.join(destination_folder_path, new_file_name)
+            )
+            file_path = writer.create_file(new_file_name, content + backlink)
+            records[section_ids[i]].path = file_path
+            written_contents[file_path] = content
+            written_notes.append(
+                Note(
+                    file_path,
+                    destination_folder_path,
+                    os.path.basename(file_path),
+                    titles[i],
+                )
+            )
+    deleted_count = 0
+    for record in previous_records.values():
+        if record.is_unmodified():
+            writer.delete_file(record.path)
+            deleted_count += 1
+    print(
+        f"Kept {kept_count}, rewrote or created {len(written_notes)}, and deleted"
+        f" {deleted_count} files."
+    )
+
+    if index_file_path is not None:
+        section_notes = [
+            Note(record.path, destination_folder_path, os.path.basename(record.path), t)
+            for record, t in zip(records.values(), titles)
+        ]
+        index_content = create_index_content(
+            source_note, section_notes, config.split_type
+        )
+        index_hash = hash_text(index_content)
+        if index_record is None:
+            new_index_file_path = writer.create_file_at(index_file_path, index_content)
+            if new_index_file_path != index_file_path and backlink:
+                # Another program took the index file's name after it was chosen.
+                backlink = create_backlink(index_title, new_index_file_path)
+                for file_path, content in written_contents.items():
+                    writer.replace_file(file_path, content + backlink)
+                for section_id, content in zip(section_ids, split_contents):
+                    if records[section_id].path in written_contents:
+                        records[section_id].content_hash = hash_text(content + backlink)
+            print(f"Created index file at {new_index_file_path}")
+            index_record = OutputRecord(new_index_file_path, index_hash)
+            index_changed = True
+        else:
+            index_changed = index_record.content_hash != index_hash
+            if index_changed:
+                writer.replace_file(index_record.path, index_content)
+                index_record.content_hash = index_hash
+        if index_changed:
+            written_notes.append(
+                Note(
+                    index_record.path,
+                    destination_folder_path,
+                    os.path.basename(index_record.path),
+                    index_title,
+                )
+            )
+    elif index_record is not None:
+        if index_record.is_unmodified():
+            writer.delete_file(index_record.path)
+        index_record = None
+
+    for record in records.values():
+        record.update_stat()
+    if index_record is not None:
+        index_record.update_stat()
+    manifest.set_outputs(source_note.path, records, index_record)
+    return written_notes
+
+
+def save_split_notes(
+    source_note: Note,
+    split_contents: list[str],
+    new_file_names: list[str],
+    config: SplitConfig,
+    writer: OutputWriter,
+) -> list[Note]:
+    """Saves a file's sections and its index file, writing each file only once.
+
+    Each section's backlink is added to its content before the section is written, so
+    no file is opened again after it is created.
+
+    Parameters
+    ----------
+    source_note : Note
+        The note that was split.
+    split_contents : list[str]
+        The sections of the note.
+    new_file_names : list[str]
+        The planned names of the sections' files, parallel to split_contents.
+    config : SplitConfig
+        The settings to split with.
+    writer : OutputWriter
+        The writer for the destination folder.
+
+    Returns
+    -------
+    list[Note]
+        The new notes of the sections, followed by the index note if one was created.
+    """
+    destination_folder_path = config.destination_folder_path
+    source_folder_path = config.source_folder_path
+    if not source_folder_path or source_folder_path != destination_folder_path:
+        # The links only depend on the folder, not on the file's final name.
+        split_contents = [
+            make_file_paths_absolute(
+                split_content, os.path.join(destination_folder_path, new_file_name)
+            )
+            for new_file_name, split_content in zip(new_file_names, split_contents)
+        ]
+    index_file_path: str | None = None
+    index_title = ""
+    backlink = ""
+    if config.create_index_file and split_contents:
+        index_name = validate_file_name(f"index - {source_note.name}", 35)
+        index_file_path = writer.registry.reserve(index_name)
+        index_title = get_title(
+            create_index_content(source_note, [], config.split_type)
+        )
+        if config.create_backlinks:
+            backlink = create_backlink(index_title, index_file_path)
+    elif config.create_backlinks:
+        backlink = create_backlink(source_note.title, source_note.path)
+    new_notes: list[Note] = []
+    for new_file_name, split_content in zip(new_file_names, split_contents):
+        new_file_path = writer.create_file(new_file_name, split_content + backlink)
+        new_notes.append(
+            Note(
+                new_file_path,
+                destination_folder_path,
+                os.path.basename(new_file_path),
+                get_title(split_content),
+            )
+        )
+    if index_file_path is None:
+        return new_notes
+    index_content = create_index_content(source_note, new_notes, config.split_type)
+    new_index_file_path = writer.create_file_at(index_file_path, index_content)
+    if new_index_file_path != index_file_path and backlink:
+        # Another program took the index file's name after it was chosen.
+        backlink = create_backlink(index_title, new_index_file_path)
+        for new_note, split_content in zip(new_notes, split_contents):
+            writer.replace_file(new_note.path, split_content + backlink)
+    index_note = Note(
+        new_index_file_path,
+        destination_folder_path,
+        os.path.basename(new_index_file_path),
+        index_title,
+    )
+    return new_notes + [index_note]
+
+
+def split_text(
+    content: str | bytes,
+    tokenize: Callable,
+    split: Callable,
+    format_: Callable,
+    split_type: type[tokens.Token],
+    split_attrs: dict,
+    using_split_keyword: bool,
+    remove_split_keyword: bool,
+    split_keyword: str,
+    parse_blocks: bool,
+    copy_global_tags: bool,
+    copy_frontmatter: bool,
+    move_footnotes: bool,
+) -> list[str]:
+    """Splits a string into multiple strings based on several factors.
+
+    Attributes
+    ----------
+    content : str | bytes
+        The string to be split, or its UTF-8 bytes, which are decoded one line at a
+        time (see ``Lexer``).
+    tokenize : Callable
+        A function created from the Lexer class that converts a string into a list of
+        tokens.
+    split : Callable
+        A function created from the Splitter class that groups the tokens into sections.
+    format_ : Callable
+        A function created from the Formatter class that adjusts the formatting of each
+        section and converts them to strings.
+    split_type : type[tokens.Token]
+        The type of token to split by.
+    split_attrs : dict
+        The attributes of the token to split by.
+    using_split_keyword : bool
+        Whether to use a keyword to decide which files to split.
+    remove_split_keyword : bool
+        Whether to remove the keyword from the content of the token.
+    split_keyword : str
+        The keyword for deciding which files to split.
+    parse_blocks : bool
+        Whether to parse blocks.
+    copy_global_tags : bool
+        Whether to copy global tags to each new file.
+    copy_frontmatter : bool
+        Whether to copy frontmatter to each new file.
+    move_footnotes : bool
+        Whether to move footnotes into the new files.
+
+    Returns
+    -------
+    split_contents : list[str]
+        A list of strings that are the sections of the original string.
+    """
+    with instrumentation.stage("lex"):
+        tokens_: list[tokens.Token] = tokenize(content)
+    instrumentation.count("tokens", len(tokens_))
+    with instrumentation.stage("parse"):
+        syntax_tree = SyntaxTree(tokens_, parse_blocks)
+    with instrumentation.stage("split"):
+        sections, global_tags = split(
+            syntax_tree.content,
+            split_type,
+            split_attrs,
+            using_split_keyword,
+            remove_split_keyword,
+            split_keyword,
+        )
+    instrumentation.count("sections", len(sections))
+    with instrumentation.stage("format"):
+        split_contents: list[str] = format_(
+            sections=sections,
+            global_tags=global_tags,
+            copy_global_tags=copy_global_tags,
+            copy_frontmatter=copy_frontmatter,
+            move_footnotes=move_footnotes,
+            frontmatter=syntax_tree.frontmatter,
+            footnotes=syntax_tree.footnotes,
+        )
+    return split_contents
+
+
+def create_index_content(
+    source_note: Note, new_notes: list[Note], split_type: type[tokens.Token]
+) -> str:
+    """Creates the contents of an index file for the new notes.
+
+    Parameters
+    ----------
+    source_note : Note
+        The note that the new notes were created from.
+    new_notes : list[Note]
+        The newly created notes.
+    split_type : type[tokens.Token]
+        The type of token that was split by.
+    """
+    lines: list[str] = [f"# index of {source_note.title}\n\n"]
+    for n in new_notes:
+        if issubclass(split_type, tokens.Header):
+            lines.append(f"* [{n.title}]({n.path})\n")
+        else:
+            lines.append(f"* [{n.name}]({n.path})\n")
+    lines.append(f"\n[Source: {source_note.title}]({source_note.path})")
+    return "".join(lines)
+
+
+def create_backlink(root_title: str, root_path: str) -> str:
+    """Creates the text of a backlink to be appended to a new note.
+
+    Parameters
+    ----------
+    root_title : str
+        The title of the note that the backlink links to.
+    root_path : str
+        The absolute path to the note that the backlink links to.
+    """
+    return f"\n\n[Backlink: {root_title}]({root_path})\n"
@@ -0,0 +1,186 @@
+"""For planning a split without writing anything, and executing the plan later.
+
+A plan has the sections and planned file names of every source file, so executing it
+does not lex, parse, split, format, or name anything again. It also has the projected
+cost of executing it: the files that will be created, how many bytes will be written,
+how many links will be made absolute, and an estimate of how long it will take. The
+estimate uses the write speed measured in the latest saved performance trace, if there
+is one.
+
+Plans are saved as JSON files. See ``pipeline.plan_split`` and
+``pipeline.execute_plan``.
+"""
+import json
+import os
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+
+DEFAULT_BYTES_PER_SECOND = 20 * 1024 * 1024
+DEFAULT_SECONDS_PER_FILE = 0.002
+
+
+@dataclass
+class PlannedSource:
+    """The planned sections of one source file.
+
+    Attributes
+    ----------
+    source_path : str
+        The absolute path to the source file.
+    source_hash : str
+        The hash of the source file's content when it was planned. If the content
+        changes, the file is split again when the plan is executed.
+    split_contents : list[str]
+        The sections of the source file.
+    file_names : list[str]
+        The planned names of the sections' files. A name that is taken when the plan
+        is executed gets a number added to it.
+    """
+
+    source_path: str
+    source_hash: str
+    split_contents: list[str]
+    file_names: list[str]
+
+
+@dataclass
+class SplitPlan:
+    """A split that was planned but not executed.
+
+    Attributes
+    ----------
+    config : dict[str, Any]
+        The settings to split with (see ``SplitConfig.to_dict``).
+    sources : list[PlannedSource]
+        The planned sections of each source file.
+    file_paths : list[str]
+        The absolute paths of the files that will be created, including index files.
+    total_bytes : int
+        The number of bytes that will be written.
+    link_rewrite_count : int
+        The number of links in the new files that will be made absolute.
+    read_seconds : float
+        How long reading the source files took while planning.
+    compute_seconds : float
+        How long lexing, parsing, splitting, formatting, and naming took while planning.
+        Executing the plan skips this.
+    estimated_seconds : float
+        The estimated time to execute the plan.
+    """
+
+    config: dict[str, Any]
+    sources: list[PlannedSource] = field(default_factory=list)
+    file_paths: list[str] = field(default_factory=list)
+    total_bytes: int = 0
+    link_rewrite_count: int = 0
+    read_seconds: float = 0.0
+    compute_seconds: float = 0.0
+    estimated_seconds: float = 0.0
+
+    def save(self, file_path: str) -> None:
+        """Saves the plan as a JSON file.
+
+        Parameters
+        ----------
+        file_path : str
+            The path to save the plan at.
+        """
+        with open(file_path, "w", encoding="utf8") as file:
+            json.dump({"version": 1, **asdict(self)}, file)
+
+    @classmethod
+    def load(cls, file_path: str) -> "SplitPlan":
+        """Loads a plan saved by ``save``.
+
+        Parameters
+        ----------
+        file_path : str
+            The path to the plan.
+        """
+        with open(file_path, "r", encoding="utf8") as file:
+            data: dict[str, Any] = json.load(file)
+        data.pop("version", None)
+        data["sources"] = [PlannedSource(**source) for source in data["sources"]]
+        return cls(**data)
+
+    def summary(self) -> str:
+        """Describes what executing the plan will do."""
+        return (
+            f"{len(self.sources)} source files, {len(self.file_paths)} new files,"
+            f" {self.total_bytes / 1024:.1f} KiB to write,"
+            f" {self.link_rewrite_count} links to make absolute."
+            f" Planning took {self.read_seconds + self.compute_seconds:.3f} s."
+            f" Executing the plan should take about {self.estimated_seconds:.3f} s."
+        )
+
+
+def estimate_seconds(
+    read_seconds: float,
+    total_bytes: int,
+    file_count: int,
+    trace_folder_path: str | None = None,
+) -> float:
+    """Estimates how long executing a plan will take.
+
+    Parameters
+    ----------
+    read_seconds : float
+        How long reading the source files took while planning. They are read again to
+        check whether they changed.
+    total_bytes : int
+        The number of bytes that will be written.
+    file_count : int
+        The number of files that will be written.
+    trace_folder_path : str | None, optional
+        The folder of saved performance traces. The write speed measured in the latest
+        one is used. If None or if there are no traces with writes, default speeds are
+        used.
+    """
+    bytes_per_second = DEFAULT_BYTES_PER_SECOND
+    seconds_per_file = DEFAULT_SECONDS_PER_FILE
+    trace: dict[str, Any] | None = None
+    if trace_folder_path is not None:
+        trace = load_latest_trace(trace_folder_path)
+    if trace is not None:
+        save_seconds: float = trace["stages"].get("save", {}).get("seconds", 0.0)
+        bytes_written: int = trace["counters"].get("bytes_written", 0)
+        files_written: int = trace["counters"].get("files_written", 0)
+        if save_seconds and bytes_written and files_written:
+            # Attribute the measured time to bytes and files the same way the
+            # defaults do, then scale both to match the trace.
+            default_seconds = (
+                bytes_written / DEFAULT_BYTES_PER_SECOND
+                + files_written * DEFAULT_SECONDS_PER_FILE
+            )
+            scale = save_seconds / default_seconds
+            bytes_per_second = DEFAULT_BYTES_PER_SECOND / scale
+            seconds_per_file = DEFAULT_SECONDS_PER_FILE * scale
+    return read_seconds + total_bytes / bytes_per_second + file_count * seconds_per_file
+
+
+def load_latest_trace(folder_path: str) -> dict[str, Any] | None:
+    """Loads the newest performance trace saved in a folder, if there is one.
+
+    Parameters
+    ----------
+    folder_path : str
+        The absolute path to the folder of traces.
+    """
+    try:
+        file_names: list[str] = [
+            name for name in os.listdir(folder_path) if name.endswith(".json")
+        ]
+    except FileNotFoundError:
+        return None
+    for file_name in sorted(file_names, reverse=True):
+        try:
+            with open(
+                os.path.join(folder_path, file_name), "r", encoding="utf8"
+            ) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            continue
+    return None
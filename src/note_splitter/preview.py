@@ -0,0 +1,102 @@
+"""For previewing the sections a note will be split into as the settings change.
+
+A ``SplitPreview`` keeps the tokens and syntax trees of the text it last split. When
+only the split settings change, only ``Splitter`` and ``Formatter`` run again, on a copy
+of the saved syntax tree. When the text changes, only the lines that changed are lexed
+again (see ``lexer.IncrementalLexer``).
+"""
+import pickle
+
+from note_splitter import tokens
+from note_splitter.formatter_ import Formatter
+from note_splitter.lexer import IncrementalLexer
+from note_splitter.parser_ import SyntaxTree
+from note_splitter.pipeline import SplitConfig
+from note_splitter.splitter import Splitter
+
+
+MAX_SECTIONS = 100
+
+
+class SplitPreview:
+    """Splits a note's text the same way ``pipeline.split_text`` does, reusing work.
+
+    Splitting and formatting change the syntax tree they are given, so each syntax tree
+    is saved pickled, and unpickling it creates a new copy much faster than lexing and
+    parsing the text again.
+
+    Attributes
+    ----------
+    lexer : IncrementalLexer
+        The lexer of the text, which remembers the last text it lexed.
+    """
+
+    def __init__(self):
+        self.lexer = IncrementalLexer()
+        self.__split = Splitter()
+        self.__format = Formatter()
+        self.__text: str | None = None
+        self.__trees: dict[bool, bytes] = {}
+
+    def __call__(self, text: str, config: SplitConfig) -> list[str]:
+        """Splits text into the sections that splitting a file with it would create.
+
+        Parameters
+        ----------
+        text : str
+            The content of the file.
+        config : SplitConfig
+            The settings to split with. The folders are not used.
+
+        Returns
+        -------
+        list[str]
+            The sections.
+        """
+        if text != self.__text:
+            self.__text = text
+            self.__trees = {}
+        pickled_tree: bytes | None = self.__trees.get(config.parse_blocks)
+        if pickled_tree is None:
+            tokens_: list[tokens.Token] = self.lexer(text)
+            pickled_tree = pickle.dumps(SyntaxTree(tokens_, config.parse_blocks))
+            self.__trees[config.parse_blocks] = pickled_tree
+        syntax_tree: SyntaxTree = pickle.loads(pickled_tree)
+        sections, global_tags = self.__split(
+            syntax_tree.content,
+            config.split_type,
+            config.split_attrs,
+            config.using_split_keyword,
+            config.remove_split_keyword,
+            config.split_keyword,
+        )
+        return self.__format(
+            sections=sections,
+            global_tags=global_tags,
+            copy_global_tags=config.copy_global_tags,
+            copy_frontmatter=config.copy_frontmatter,
+            move_footnotes=config.move_footnotes,
+            frontmatter=syntax_tree.frontmatter,
+            footnotes=syntax_tree.footnotes,
+        )
+
+
+def format_preview(sections: list[str], max_sections: int = MAX_SECTIONS) -> str:
+    """Joins sections into one text to show, with a divider before each one.
+
+    Parameters
+    ----------
+    sections : list[str]
+        The sections.
+    max_sections : int, optional
+        The most sections to show. Showing every section of a huge file would be slow.
+    """
+    if not sections:
+        return "This file would not be split."
+    parts: list[str] = [
+        f"----- section {i} of {len(sections)} -----\n{section}"
+        for i, section in enumerate(sections[:max_sections], start=1)
+    ]
+    if len(sections) > max_sections:
+        parts.append(f"----- and {len(sections) - max_sections} more sections -----")
+    return "\n".join(parts)
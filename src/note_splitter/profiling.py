@@ -0,0 +1,210 @@
+"""Optional cProfile, sampling, and tracemalloc reports for split runs.
+
+Profiling is off until ``enable_profiling`` is called, which the app does when it is
+started with ``--profile``. While it is off, ``profile_run`` returns a context manager
+that does nothing. While it is on, each run saves these files in the profile folder:
+
+* ``<name> <time>.prof``, which can be opened with ``python -m pstats`` or tools like
+  snakeviz. Not created in sampling mode.
+* ``<name> <time> samples.txt``, the call stacks seen by the sampler in the collapsed
+  format that flame graph tools accept. Only created in sampling mode.
+* ``<name> <time> memory.txt``, the lines of code that allocated the most memory.
+
+cProfile records every function call, which can slow a large split down a lot.
+Sampling mode instead looks at the call stack at a fixed interval, so its overhead
+stays low and does not depend on how many functions are called.
+"""
+import cProfile
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from contextlib import nullcontext
+from datetime import datetime
+from typing import ContextManager
+from typing import Iterator
+
+
+class Profiler:
+    """Profiles runs and saves the reports in a folder.
+
+    Attributes
+    ----------
+    folder_path : str
+        The absolute path to the folder to save reports in.
+    sample_interval : float | None
+        The number of seconds between samples of the call stack, or None to use
+        cProfile instead of sampling.
+    trace_memory : bool
+        Whether to save a report of the lines that allocated the most memory.
+    top_count : int
+        The number of lines to list in each memory report.
+    report_paths : list[str]
+        The absolute paths of all the reports saved so far.
+    """
+
+    def __init__(
+        self,
+        folder_path: str,
+        sample_interval: float | None = None,
+        trace_memory: bool = True,
+        top_count: int = 25,
+    ):
+        if sample_interval is not None and sample_interval <= 0:
+            raise ValueError("The sample interval must be positive.")
+        self.folder_path = folder_path
+        self.sample_interval = sample_interval
+        self.trace_memory = trace_memory
+        self.top_count = top_count
+        self.report_paths: list[str] = []
+
+    @contextmanager
+    def run(self, name: str) -> Iterator[None]:
+        """Profiles the code in the ``with`` block and saves the reports.
+
+        Parameters
+        ----------
+        name : str
+            The start of the reports' file names, such as ``split``.
+        """
+        os.makedirs(self.folder_path, exist_ok=True)
+        started_at = datetime.now().strftime("%Y-%m-%d %H-%M-%S")
+        base_path = os.path.join(self.folder_path, f"{name} {started_at}")
+        was_tracing_memory = tracemalloc.is_tracing()
+        if self.trace_memory and not was_tracing_memory:
+            tracemalloc.start()
+        profile: cProfile.Profile | None = None
+        sampler: _Sampler | None = None
+        if self.sample_interval is None:
+            profile = cProfile.Profile()
+            profile.enable()
+        else:
+            sampler = _Sampler(self.sample_interval)
+            sampler.start()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(base_path + ".prof")
+                self.report_paths.append(base_path + ".prof")
+            if sampler is not None:
+                sampler.stop()
+                self.report_paths.append(sampler.save(base_path + " samples.txt"))
+            if self.trace_memory:
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                if not was_tracing_memory:
+                    tracemalloc.stop()
+                memory_path = base_path + " memory.txt"
+                self.__save_memory_report(snapshot, peak, memory_path)
+                self.report_paths.append(memory_path)
+            print(f"Saved profiling reports to {base_path}*")
+
+    def __save_memory_report(
+        self, snapshot: tracemalloc.Snapshot, peak: int, file_path: str
+    ) -> None:
+        """Saves the lines that allocated the most memory that is still allocated."""
+        snapshot = snapshot.filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            )
+        )
+        statistics = snapshot.statistics("lineno")
+        with open(file_path, "w", encoding="utf8") as file:
+            file.write(f"peak traced memory: {peak / 1024:,.1f} KiB\n")
+            file.write(f"top {self.top_count} lines by allocated memory:\n\n")
+            for i, stat in enumerate(statistics[: self.top_count], start=1):
+                frame = stat.traceback[0]
+                file.write(
+                    f"{i}. {frame.filename}:{frame.lineno}: "
+                    f"{stat.size / 1024:,.1f} KiB in {stat.count:,} blocks\n"
+                )
+
+
+class _Sampler:
+    """Records the call stack of the thread that started it at a fixed interval."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.__thread_id = threading.get_ident()
+        self.__stop_event = threading.Event()
+        self.__thread = threading.Thread(target=self.__sample, daemon=True)
+
+    def start(self) -> None:
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.__stop_event.set()
+        self.__thread.join()
+
+    def save(self, file_path: str) -> str:
+        """Saves the stacks in the collapsed format and returns the file's path."""
+        with open(file_path, "w", encoding="utf8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        return file_path
+
+    def __sample(self) -> None:
+        while not self.__stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.__thread_id)
+            names: list[str] = []
+            while frame is not None:
+                code = frame.f_code
+                file_name = os.path.basename(code.co_filename)
+                names.append(f"{code.co_name} ({file_name}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+__profiler: Profiler | None = None
+
+
+def enable_profiling(
+    folder_path: str, sample_interval: float | None = None, trace_memory: bool = True
+) -> Profiler:
+    """Turns profiling on and returns the profiler that will be used.
+
+    Parameters
+    ----------
+    folder_path : str
+        The absolute path to the folder to save reports in.
+    sample_interval : float | None, optional
+        The number of seconds between samples of the call stack, or None to use
+        cProfile instead of sampling.
+    trace_memory : bool, optional
+        Whether to save a report of the lines that allocated the most memory.
+    """
+    global __profiler
+    __profiler = Profiler(folder_path, sample_interval, trace_memory)
+    return __profiler
+
+
+def disable_profiling() -> Profiler | None:
+    """Turns profiling off and returns the profiler that was being used."""
+    global __profiler
+    profiler, __profiler = __profiler, None
+    return profiler
+
+
+def enabled() -> bool:
+    """Returns whether profiling is on."""
+    return __profiler is not None
+
+
+def profile_run(name: str) -> ContextManager:
+    """Profiles the code in a ``with`` block if profiling is on.
+
+    Parameters
+    ----------
+    name : str
+        The start of the reports' file names, such as ``split``.
+    """
+    if __profiler is None:
+        return nullcontext()
+    return __profiler.run(name)
@@ -36,6 +36,17 @@ header_pattern : str
     The uncompiled regex pattern for headers.
 horizontal_rule_pattern : str
     The uncompiled regex pattern for horizontal rules.
+incremental_split : bool
+    Whether or not to update the files created the last time a file was split instead
+    of creating new files for every section. The files created from each file are
+    listed in a hidden manifest file in the destination folder.
+io_concurrency : int
+    The maximum number of files to read or write at the same time. If more than 1,
+    files are read ahead and saved while other files are split, which is faster for
+    folders on network drives.
+lexer_processes : int
+    The number of processes to lex each very long file in. If more than 1, files of at
+    least a few megabytes are split into chunks that are lexed at the same time.
 math_fence_pattern : str
     The uncompiled regex pattern for math fences.
 move_footnotes : bool
@@ -48,6 +59,9 @@ ordered_list_item_pattern : str
     The uncompiled regex pattern for ordered list items.
 parse_blocks : bool
     Whether or not to create ``Block`` tokens while parsing.
+record_trace : bool
+    Whether or not to record how long each stage of splitting takes and save it as a
+    JSON file in the app's data folder.
 remove_split_keyword : bool
     Whether or not to remove the split keyword from the source file and new file(s).
 replace_split_contents : bool
@@ -63,6 +77,9 @@ split_keyword : str
 split_type : str
     The output-formatted name of the type to split by. This can be any token type, even
     an abstract one.
+sync_output_files : bool
+    Whether or not to wait for each new file to be saved to the disk before continuing,
+    so that new files are not lost if the computer loses power.
 table_divider_pattern : str
     The uncompiled regex pattern for table dividers.
 table_row_pattern : str
@@ -73,6 +90,10 @@ task_pattern : str
     The uncompiled regex pattern for tasks.
 unordered_list_item_pattern : str
     The uncompiled regex pattern for unordered list items.
+use_split_cache : bool
+    Whether or not to save the results of splitting each file in the app's data folder
+    and reuse them when a file with the same content is split with the same settings.
+    The saved results contain copies of the files' contents, so this is off by default.
 using_split_keyword : bool
     Whether or not the split keyword was used to find file(s) to split.
 
@@ -122,22 +143,28 @@ DEFAULT_SETTINGS = {
     "frontmatter_fence_pattern": patterns.frontmatter_fence.pattern,
     "header_pattern": patterns.header.pattern,
     "horizontal_rule_pattern": patterns.horizontal_rule.pattern,
+    "incremental_split": False,
+    "io_concurrency": 1,
+    "lexer_processes": 1,
     "math_fence_pattern": patterns.math_fence.pattern,
     "move_footnotes": True,
     "note_types": [".md", ".markdown", ".txt"],
     "ordered_list_item_pattern": patterns.ordered_list_item.pattern,
     "parse_blocks": True,
+    "record_trace": False,
     "remove_split_keyword": False,
     "replace_split_contents": False,
     "source_folder_path": "",
     "split_attrs": {"level": 2},
     "split_keyword": "#split",
     "split_type": "header",
+    "sync_output_files": False,
     "table_divider_pattern": patterns.table_divider.pattern,
     "table_row_pattern": patterns.table_row.pattern,
     "tag_pattern": patterns.tag.pattern,
     "task_pattern": patterns.task.pattern,
     "unordered_list_item_pattern": patterns.unordered_list_item.pattern,
+    "use_split_cache": False,
     "using_split_keyword": True,
 }
 
@@ -146,6 +173,22 @@ def show_message(text: str) -> None:
     QtWidgets.QMessageBox(text=text).exec()
 
 
+def get_app_data_folder_path(*subfolder_names: str) -> str:
+    """Gets the absolute path to a folder for the app's data, creating it if necessary.
+
+    Parameters
+    ----------
+    *subfolder_names : str
+        The names of any nested subfolders of the app's data folder to get the path of.
+    """
+    folder_path: str = QtCore.QStandardPaths.writableLocation(
+        QtCore.QStandardPaths.AppDataLocation
+    )
+    folder_path = os.path.join(folder_path, *subfolder_names)
+    os.makedirs(folder_path, exist_ok=True)
+    return folder_path
+
+
 def reset_settings() -> None:
     """Clears all settings and saves the default settings to the registry.
 
@@ -259,13 +302,14 @@ def get_token_type_names(
     predicate : Callable, optional
         A function that filters the token types.
     all_token_types : list, optional
-        A list of all token types. If not provided, the list of all token types will be
-        fetched.
+        A list of all token types. If not provided, all the registered token types are
+        used.
     """
     if not all_token_types:
-        all_token_types = tokens.get_all_token_types(tokens)
+        if not filter_predicate:
+            return tokens.registry.names
+        all_token_types = tokens.registry.types
     token_names = []
-    assert all_token_types is not None
     for token_type in all_token_types:
         if not filter_predicate or filter_predicate(token_type):
             token_names.append(get_token_type_name(token_type))
@@ -280,15 +324,10 @@ def get_token_type_name(token_type: type) -> str:
     token_type : type
         The token type to get the name of.
     """
-    token_name = []
     try:
-        for i, letter in enumerate(token_type.__name__):
-            if i and letter.isupper():
-                token_name.append(" ")
-            token_name.append(letter)
-    except AttributeError:
-        raise TypeError(f"{token_type} is not a type.")
-    return "".join(token_name).lower()
+        return tokens.registry.get_name(token_type)
+    except (KeyError, TypeError):  # Unhashable objects raise TypeError.
+        return tokens.create_token_type_name(token_type)
 
 
 def get_token_type(type_name: str) -> type:
@@ -299,9 +338,4 @@ def get_token_type(type_name: str) -> type:
     type_name : str
         The output-formatted name of the token type to get.
     """
-    all_token_types: list[type] = tokens.get_all_token_types(tokens)
-    token_type_names = get_token_type_names(None, all_token_types)
-    for name, type_ in zip(token_type_names, all_token_types):
-        if name == type_name:
-            return type_
-    raise ValueError(f'Token type "{type_name}" not found.')
+    return tokens.registry.get_type(type_name)
@@ -225,6 +225,118 @@ class SettingsTab(QtWidgets.QWidget):
         self.create_backlinks_checkbox.setChecked(
             settings.value("create_backlinks", DEFAULT_SETTINGS["create_backlinks"])
         )
+        self.incremental_split_checkbox = QtWidgets.QCheckBox()
+        self.incremental_split_checkbox.setSizePolicy(
+            QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed
+        )
+        self.incremental_split_checkbox.stateChanged.connect(
+            lambda: update_from_checkbox(
+                "incremental_split", self.incremental_split_checkbox
+            )
+        )
+        self.incremental_split_checkbox.setToolTip(
+            "When splitting a file again, keep the files of unchanged sections, rewrite"
+            " the files of changed sections, and delete the files of removed sections."
+        )
+        self.checkboxes_layout.addRow(
+            "update previous splits:", self.incremental_split_checkbox
+        )
+        self.incremental_split_checkbox.setChecked(
+            settings.value("incremental_split", DEFAULT_SETTINGS["incremental_split"])
+        )
+        self.use_split_cache_checkbox = QtWidgets.QCheckBox()
+        self.use_split_cache_checkbox.setSizePolicy(
+            QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed
+        )
+        self.use_split_cache_checkbox.stateChanged.connect(
+            lambda: update_from_checkbox(
+                "use_split_cache", self.use_split_cache_checkbox
+            )
+        )
+        self.use_split_cache_checkbox.setToolTip(
+            "Save the results of splitting each file in the app's data folder and"
+            " reuse them when a file that has not changed is split again. The saved"
+            " results contain copies of the files' contents."
+        )
+        self.checkboxes_layout.addRow(
+            "reuse results for unchanged files:", self.use_split_cache_checkbox
+        )
+        self.use_split_cache_checkbox.setChecked(
+            settings.value("use_split_cache", DEFAULT_SETTINGS["use_split_cache"])
+        )
+        self.sync_output_files_checkbox = QtWidgets.QCheckBox()
+        self.sync_output_files_checkbox.setSizePolicy(
+            QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed
+        )
+        self.sync_output_files_checkbox.stateChanged.connect(
+            lambda: update_from_checkbox(
+                "sync_output_files", self.sync_output_files_checkbox
+            )
+        )
+        self.sync_output_files_checkbox.setToolTip(
+            "Wait for each new file to be saved to the disk before continuing. This is"
+            " slower, but new files are not lost if the computer loses power."
+        )
+        self.checkboxes_layout.addRow(
+            "sync new files to disk:", self.sync_output_files_checkbox
+        )
+        self.sync_output_files_checkbox.setChecked(
+            settings.value("sync_output_files", DEFAULT_SETTINGS["sync_output_files"])
+        )
+        self.io_concurrency_spin_box = QtWidgets.QSpinBox()
+        self.io_concurrency_spin_box.setRange(1, 32)
+        self.io_concurrency_spin_box.setSizePolicy(
+            QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed
+        )
+        self.io_concurrency_spin_box.valueChanged.connect(
+            lambda value: QtCore.QSettings().setValue("io_concurrency", value)
+        )
+        self.io_concurrency_spin_box.setToolTip(
+            "The number of files to read or write at the same time. More than 1 reads"
+            " files ahead and saves them while other files are split, which is faster"
+            " for folders on network drives."
+        )
+        self.checkboxes_layout.addRow(
+            "files to read or write at once:", self.io_concurrency_spin_box
+        )
+        self.io_concurrency_spin_box.setValue(
+            int(settings.value("io_concurrency", DEFAULT_SETTINGS["io_concurrency"]))
+        )
+        self.lexer_processes_spin_box = QtWidgets.QSpinBox()
+        self.lexer_processes_spin_box.setRange(1, 64)
+        self.lexer_processes_spin_box.setSizePolicy(
+            QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed
+        )
+        self.lexer_processes_spin_box.valueChanged.connect(
+            lambda value: QtCore.QSettings().setValue("lexer_processes", value)
+        )
+        self.lexer_processes_spin_box.setToolTip(
+            "The number of processes to lex each file of at least a few megabytes in."
+            " More than 1 is faster for huge files on computers with multiple cores."
+        )
+        self.checkboxes_layout.addRow(
+            "processes to lex huge files in:", self.lexer_processes_spin_box
+        )
+        self.lexer_processes_spin_box.setValue(
+            int(settings.value("lexer_processes", DEFAULT_SETTINGS["lexer_processes"]))
+        )
+        self.record_trace_checkbox = QtWidgets.QCheckBox()
+        self.record_trace_checkbox.setSizePolicy(
+            QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed
+        )
+        self.record_trace_checkbox.stateChanged.connect(
+            lambda: update_from_checkbox("record_trace", self.record_trace_checkbox)
+        )
+        self.record_trace_checkbox.setToolTip(
+            "Measure how long each stage of splitting takes, show the results after"
+            " splitting, and save them as a JSON file in the app's data folder."
+        )
+        self.checkboxes_layout.addRow(
+            "record performance trace:", self.record_trace_checkbox
+        )
+        self.record_trace_checkbox.setChecked(
+            settings.value("record_trace", DEFAULT_SETTINGS["record_trace"])
+        )
 
         self.buttons_layout = QtWidgets.QHBoxLayout()
         self.layout.addLayout(self.buttons_layout)
@@ -342,3 +454,21 @@ class SettingsTab(QtWidgets.QWidget):
         self.create_backlinks_checkbox.setChecked(
             settings.value("create_backlinks", DEFAULT_SETTINGS["create_backlinks"])
         )
+        self.incremental_split_checkbox.setChecked(
+            settings.value("incremental_split", DEFAULT_SETTINGS["incremental_split"])
+        )
+        self.use_split_cache_checkbox.setChecked(
+            settings.value("use_split_cache", DEFAULT_SETTINGS["use_split_cache"])
+        )
+        self.sync_output_files_checkbox.setChecked(
+            settings.value("sync_output_files", DEFAULT_SETTINGS["sync_output_files"])
+        )
+        self.io_concurrency_spin_box.setValue(
+            int(settings.value("io_concurrency", DEFAULT_SETTINGS["io_concurrency"]))
+        )
+        self.lexer_processes_spin_box.setValue(
+            int(settings.value("lexer_processes", DEFAULT_SETTINGS["lexer_processes"]))
+        )
+        self.record_trace_checkbox.setChecked(
+            settings.value("record_trace", DEFAULT_SETTINGS["record_trace"])
+        )
@@ -0,0 +1,193 @@
+"""A disk cache of split results for skipping source files that have not changed.
+
+Each result is keyed by a hash of the source file's content, the settings that affect
+how it is split, the compiled patterns, and the source code of the modules that lex,
+parse, split, and format text. If any of those change, the old results are never used
+again and are eventually evicted.
+
+Each result is saved as its own JSON file in the cache folder. The files' modification
+times are used to decide which results were least recently used, so the cache needs no
+index file that could become out of date.
+"""
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from typing import Any
+
+from note_splitter import formatter_
+from note_splitter import instrumentation
+from note_splitter import lexer
+from note_splitter import parser_
+from note_splitter import patterns
+from note_splitter import splitter
+from note_splitter import tokens
+from note_splitter.note import write_text_atomically
+from note_splitter.settings import get_token_type_name
+
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+__code_hash: str | None = None
+
+
+class SplitCache:
+    """A least recently used cache of split_text results with a size limit on disk.
+
+    Attributes
+    ----------
+    folder_path : str
+        The absolute path to the folder the results are saved in.
+    max_bytes : int
+        The maximum total size of the saved results. The least recently used results
+        are deleted when a new result would exceed this.
+    """
+
+    def __init__(self, folder_path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.folder_path = folder_path
+        self.max_bytes = max_bytes
+        os.makedirs(folder_path, exist_ok=True)
+        self.__sizes: OrderedDict[str, int] = OrderedDict()
+        entries: list[os.DirEntry] = [
+            entry
+            for entry in os.scandir(folder_path)
+            if entry.is_file() and entry.name.endswith(".json")
+        ]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            self.__sizes[entry.name.removesuffix(".json")] = entry.stat().st_size
+        self.__total_bytes = sum(self.__sizes.values())
+
+    def __len__(self) -> int:
+        return len(self.__sizes)
+
+    @property
+    def total_bytes(self) -> int:
+        """The total size of the saved results."""
+        return self.__total_bytes
+
+    def get(self, key: str) -> list[str] | None:
+        """Gets a saved result, or None if there is no result for the key.
+
+        Parameters
+        ----------
+        key : str
+            A key created by ``create_key``.
+        """
+        if key not in self.__sizes:
+            instrumentation.count("split_cache_misses")
+            return None
+        file_path = self.__get_file_path(key)
+        try:
+            with open(file_path, "r", encoding="utf8") as file:
+                split_contents: list[str] = json.load(file)
+            os.utime(file_path)
+        except (OSError, ValueError):
+            self.__forget(key)
+            instrumentation.count("split_cache_misses")
+            return None
+        self.__sizes.move_to_end(key)
+        instrumentation.count("split_cache_hits")
+        return split_contents
+
+    def put(self, key: str, split_contents: list[str]) -> None:
+        """Saves a result, deleting the least recently used results if necessary.
+
+        Results larger than the cache's maximum size are not saved.
+
+        Parameters
+        ----------
+        key : str
+            A key created by ``create_key``.
+        split_contents : list[str]
+            The result of split_text.
+        """
+        data: str = json.dumps(split_contents)  # Only ASCII characters.
+        if len(data) > self.max_bytes:
+            return
+        if key in self.__sizes:
+            self.__forget(key)
+        while self.__sizes and self.__total_bytes + len(data) > self.max_bytes:
+            oldest_key = next(iter(self.__sizes))
+            self.__forget(oldest_key)
+        file_path = self.__get_file_path(key)
+        write_text_atomically(file_path, data)
+        self.__sizes[key] = len(data)
+        self.__total_bytes += len(data)
+
+    def clear(self) -> None:
+        """Deletes all the saved results."""
+        for key in list(self.__sizes):
+            self.__forget(key)
+
+    def __forget(self, key: str) -> None:
+        """Deletes a saved result."""
+        self.__total_bytes -= self.__sizes.pop(key)
+        try:
+            os.remove(self.__get_file_path(key))
+        except FileNotFoundError:
+            pass
+
+    def __get_file_path(self, key: str) -> str:
+        return os.path.join(self.folder_path, key + ".json")
+
+
+def create_key(
+    content: str | bytes,
+    split_type: type[tokens.Token],
+    split_attrs: dict,
+    using_split_keyword: bool,
+    remove_split_keyword: bool,
+    split_keyword: str,
+    parse_blocks: bool,
+    copy_global_tags: bool,
+    copy_frontmatter: bool,
+    move_footnotes: bool,
+) -> str:
+    """Creates a cache key for the result of calling split_text with these arguments.
+
+    The parameters are the same as split_text's.
+    """
+    options: dict[str, Any] = {
+        "split_type": get_token_type_name(split_type),
+        "split_attrs": split_attrs,
+        "using_split_keyword": using_split_keyword,
+        "remove_split_keyword": remove_split_keyword,
+        "split_keyword": split_keyword,
+        "parse_blocks": parse_blocks,
+        "copy_global_tags": copy_global_tags,
+        "copy_frontmatter": copy_frontmatter,
+        "move_footnotes": move_footnotes,
+        "patterns": get_patterns_hash(),
+        "code": get_code_hash(),
+    }
+    if isinstance(content, str):
+        content = content.encode("utf8")
+    hash_ = hashlib.sha256(content)
+    hash_.update(json.dumps(options, sort_keys=True, default=str).encode("utf8"))
+    return hash_.hexdigest()
+
+
+def get_patterns_hash() -> str:
+    """Returns a hash of all the compiled patterns that are currently used."""
+    hash_ = hashlib.sha256()
+    for name, value in sorted(vars(patterns).items()):
+        if isinstance(value, re.Pattern):
+            hash_.update(f"{name}\0{value.pattern}\0{value.flags}\0".encode("utf8"))
+    return hash_.hexdigest()
+
+
+def get_code_hash() -> str:
+    """Returns a hash of the source code that lexes, parses, splits, and formats text.
+
+    The hash is only computed once.
+    """
+    global __code_hash
+    if __code_hash is None:
+        hash_ = hashlib.sha256()
+        for module in (tokens, lexer, parser_, splitter, formatter_):
+            assert module.__file__ is not None
+            with open(module.__file__, "rb") as file:
+                hash_.update(file.read())
+        __code_hash = hash_.hexdigest()
+    return __code_hash
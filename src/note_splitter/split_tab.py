@@ -1,29 +1,39 @@
 import inspect
 import os
-from typing import Callable
+import time
 
+from note_splitter import instrumentation
+from note_splitter import profiling
 from note_splitter import tokens
-from note_splitter.formatter_ import Formatter
+from note_splitter.catalog import get_cache_file_path
+from note_splitter.catalog import NoteCatalog
 from note_splitter.gui import files_browse
+from note_splitter.gui import request_confirmation
 from note_splitter.gui import request_folder_path
 from note_splitter.gui import require_folder_path
 from note_splitter.gui import SplitSummaryDialog
-from note_splitter.lexer import Lexer
-from note_splitter.note import create_file_names
-from note_splitter.note import create_notes
-from note_splitter.note import ensure_file_path_uniqueness
-from note_splitter.note import make_file_paths_absolute
+from note_splitter.journal import FolderLockedError
+from note_splitter.journal import SplitJournal
+from note_splitter.journal import SplitLock
 from note_splitter.note import Note
 from note_splitter.note import show_message
-from note_splitter.note import validate_file_name
-from note_splitter.parser_ import SyntaxTree
+from note_splitter.pipeline import find_notes_with_keyword
+from note_splitter.pipeline import open_split_cache
+from note_splitter.pipeline import split_files
+from note_splitter.pipeline import SplitConfig
+from note_splitter.preview import format_preview
+from note_splitter.preview import SplitPreview
 from note_splitter.settings import DEFAULT_SETTINGS
+from note_splitter.settings import get_app_data_folder_path
 from note_splitter.settings import get_token_type
 from note_splitter.settings import get_token_type_names
 from note_splitter.settings import update_from_checkbox
 from note_splitter.settings import update_from_combo_box
 from note_splitter.settings import update_from_line_edit
-from note_splitter.splitter import Splitter
+from note_splitter.split_cache import SplitCache
+from note_splitter.watcher import FolderWatchController
+from note_splitter.watcher import KeywordWatcher
+from note_splitter.watcher import split_watched_files
 from PySide6 import QtCore
 from PySide6 import QtWidgets
 
@@ -33,8 +43,10 @@ class SplitTab(QtWidgets.QWidget):
         super().__init__()
         self.main_window = main_window
         settings = QtCore.QSettings()
-        self.all_notes: list[Note] = []
+        self.catalog = NoteCatalog()
+        self.catalog_folder_path: str | None = None
         self.chosen_notes: list[Note] = []
+        self.__split_cache: SplitCache | None = None
         self.layout = QtWidgets.QVBoxLayout(self)
         self.layout.addWidget(QtWidgets.QLabel("Choose files to split:"))
         files_choosing_layout = QtWidgets.QHBoxLayout()
@@ -58,6 +70,20 @@ class SplitTab(QtWidgets.QWidget):
         self.file_list_text_browser = QtWidgets.QTextBrowser()
         self.layout.addWidget(self.file_list_text_browser)
 
+        preview_layout = QtWidgets.QHBoxLayout()
+        self.layout.addLayout(preview_layout)
+        preview_layout.addWidget(QtWidgets.QLabel("Preview:"))
+        self.preview_combo_box = QtWidgets.QComboBox()
+        self.preview_combo_box.currentIndexChanged.connect(
+            lambda _: self.__update_preview()
+        )
+        preview_layout.addWidget(self.preview_combo_box, 1)
+        self.preview_text_browser = QtWidgets.QTextBrowser()
+        self.layout.addWidget(self.preview_text_browser)
+        self.previews: dict[str, SplitPreview] = {}
+        self.preview_file_watcher = QtCore.QFileSystemWatcher(self)
+        self.preview_file_watcher.fileChanged.connect(lambda _: self.__update_preview())
+
         self.layout.addWidget(QtWidgets.QLabel("Choose what to split by:"))
         self.split_by_layout = QtWidgets.QHBoxLayout()
         self.layout.addLayout(self.split_by_layout)
@@ -101,9 +127,7 @@ class SplitTab(QtWidgets.QWidget):
         self.parse_blocks_checkbox.setChecked(
             settings.value("parse_blocks", DEFAULT_SETTINGS["parse_blocks"])
         )
-        self.parse_blocks_checkbox.stateChanged.connect(
-            lambda: update_from_checkbox("parse_blocks", self.parse_blocks_checkbox)
-        )
+        self.parse_blocks_checkbox.stateChanged.connect(self.__on_parse_blocks_change)
         self.parse_blocks_layout.addWidget(self.parse_blocks_checkbox)
         self.parse_blocks_layout.addWidget(QtWidgets.QLabel("parse blocks"))
         self.parse_blocks_layout.addStretch()
@@ -112,6 +136,19 @@ class SplitTab(QtWidgets.QWidget):
         self.split_button.clicked.connect(self.__on_split_button_click)
         self.split_button.setStyleSheet("background-color: #225185;")
         self.layout.addWidget(self.split_button)
+
+        self.watch_layout = QtWidgets.QHBoxLayout()
+        self.layout.addLayout(self.watch_layout)
+        self.watch_checkbox = QtWidgets.QCheckBox()
+        self.watch_checkbox.stateChanged.connect(self.__on_watch_checkbox_change)
+        self.watch_layout.addWidget(self.watch_checkbox)
+        self.watch_layout.addWidget(
+            QtWidgets.QLabel("split files in the source folder that gain the keyword")
+        )
+        self.watch_layout.addStretch()
+        self.watch_status_label = QtWidgets.QLabel()
+        self.layout.addWidget(self.watch_status_label)
+        self.watch_controller = FolderWatchController(self.__split_watched_files, self)
         self.layout.addStretch()
 
     def reload_tab_inputs(self) -> None:
@@ -125,6 +162,7 @@ class SplitTab(QtWidgets.QWidget):
         )
         self.chosen_notes.clear()
         self.file_list_text_browser.clear()
+        self.__reset_preview()
         self.type_combo_box.setCurrentText(
             settings.value("split_type", DEFAULT_SETTINGS["split_type"])
         )
@@ -158,6 +196,7 @@ class SplitTab(QtWidgets.QWidget):
             )
         else:
             self.file_list_text_browser.clear()
+        self.__reset_preview()
 
     def __on_keyword_search(self) -> None:
         """Searches for files with the keyword and updates the file list."""
@@ -166,10 +205,9 @@ class SplitTab(QtWidgets.QWidget):
             show_message("Please enter a keyword to search for.")
             return
         QtCore.QSettings().setValue("using_split_keyword", 1)
-        self.all_notes = self.__get_all_notes_in_source_folder()
-        if not self.all_notes:
+        if not self.__scan_source_folder():
             return
-        self.chosen_notes = self.__get_notes_with_keyword(keyword, self.all_notes)
+        self.chosen_notes = self.__get_notes_with_keyword(keyword)
         if self.chosen_notes:
             self.file_list_text_browser.setText(
                 "\n".join(f"[[{n.name}]] {n.title}" for n in self.chosen_notes)
@@ -177,6 +215,7 @@ class SplitTab(QtWidgets.QWidget):
         else:
             show_message("No notes with the chosen keyword found.")
             self.file_list_text_browser.clear()
+        self.__reset_preview()
 
     def __on_split_type_change(self) -> None:
         update_from_combo_box("split_type", self.type_combo_box)
@@ -196,6 +235,7 @@ class SplitTab(QtWidgets.QWidget):
             self.parse_blocks_checkbox.setEnabled(False)
         else:
             self.parse_blocks_checkbox.setEnabled(True)
+        self.__update_preview()
 
     def __on_split_attr_change(self) -> None:
         current_text: str = self.attribute_combo_box.currentText()
@@ -204,6 +244,7 @@ class SplitTab(QtWidgets.QWidget):
         else:
             QtCore.QSettings().setValue("split_attrs", {current_text: ""})
         self.value_line_edit.clear()
+        self.__update_preview()
 
     def __on_split_value_change(self) -> None:
         current_text: str = self.attribute_combo_box.currentText()
@@ -213,6 +254,56 @@ class SplitTab(QtWidgets.QWidget):
             QtCore.QSettings().setValue(
                 "split_attrs", {current_text: self.value_line_edit.text()}
             )
+        self.__update_preview()
+
+    def __on_parse_blocks_change(self) -> None:
+        update_from_checkbox("parse_blocks", self.parse_blocks_checkbox)
+        self.__update_preview()
+
+    def __reset_preview(self) -> None:
+        """Lists the chosen notes to preview and previews the first one.
+
+        The previews of notes that are no longer chosen are forgotten.
+        """
+        self.previews = {
+            n.path: self.previews[n.path]
+            for n in self.chosen_notes
+            if n.path in self.previews
+        }
+        self.preview_combo_box.blockSignals(True)
+        self.preview_combo_box.clear()
+        self.preview_combo_box.addItems(
+            [f"[[{n.name}]] {n.title}" for n in self.chosen_notes]
+        )
+        self.preview_combo_box.blockSignals(False)
+        self.__update_preview()
+
+    def __update_preview(self) -> None:
+        """Shows the sections the chosen note to preview would be split into.
+
+        The note is read again each time, and the preview is updated when the note's
+        file changes. Only the lines that changed are lexed again, and if the text did
+        not change, only splitting and formatting are done again.
+        """
+        watched_file_paths: list[str] = self.preview_file_watcher.files()
+        if watched_file_paths:
+            self.preview_file_watcher.removePaths(watched_file_paths)
+        index: int = self.preview_combo_box.currentIndex()
+        if not 0 <= index < len(self.chosen_notes):
+            self.preview_text_browser.clear()
+            return
+        note: Note = self.chosen_notes[index]
+        try:
+            with open(note.path, "r", encoding="utf8") as file:
+                text: str = file.read()
+        except (OSError, UnicodeDecodeError) as e:
+            self.preview_text_browser.setPlainText(f"Could not read the file: {e}")
+            return
+        # Editors that save by replacing the file stop it from being watched.
+        self.preview_file_watcher.addPath(note.path)
+        preview: SplitPreview = self.previews.setdefault(note.path, SplitPreview())
+        sections: list[str] = preview(text, SplitConfig.from_settings())
+        self.preview_text_browser.setPlainText(format_preview(sections))
 
     def __get_split_type_attr_names(self) -> list[str]:
         """Returns a list of attribute names of the split type.
@@ -234,53 +325,141 @@ class SplitTab(QtWidgets.QWidget):
         if not self.chosen_notes:
             show_message("No files chosen to split.")
             return
-        if not self.all_notes:
-            self.all_notes = self.__get_all_notes_in_source_folder()
-        new_notes: list[Note] = self.__split_files(self.chosen_notes)
-        self.all_notes.extend(new_notes)
-        dialog = SplitSummaryDialog(new_notes, self.all_notes, self)
+        if not self.catalog:
+            self.__scan_source_folder()
+        trace: instrumentation.Trace | None = None
+        record_trace: bool = bool(
+            QtCore.QSettings().value("record_trace", DEFAULT_SETTINGS["record_trace"])
+        )
+        if record_trace:
+            trace = instrumentation.start_trace()
+        try:
+            with instrumentation.stage("total"):
+                new_notes: list[Note] = self.__split_files(self.chosen_notes)
+        finally:
+            instrumentation.stop_trace()
+        if trace is not None:
+            trace_path = trace.save(get_app_data_folder_path("traces"))
+            print(f"Saved a performance trace to {trace_path}")
+        for new_note in new_notes:
+            if os.path.exists(new_note.path):
+                self.catalog.add(new_note)
+        if self.catalog_folder_path is not None:
+            self.catalog.save(get_cache_file_path(self.catalog_folder_path))
+        dialog = SplitSummaryDialog(new_notes, self.catalog, self, trace)
         dialog.exec()
         self.file_list_text_browser.clear()
         self.chosen_notes.clear()
+        self.__reset_preview()
 
-    def __get_all_notes_in_source_folder(self) -> list[Note]:
-        """Gets all the notes in the user's chosen source folder.
+    def __on_watch_checkbox_change(self) -> None:
+        """Starts or stops watching the source folder for files to split."""
+        if not self.watch_checkbox.isChecked():
+            self.watch_controller.stop()
+            self.watch_status_label.clear()
+            return
+        settings = QtCore.QSettings()
+        source_folder_path: str | None = settings.value("source_folder_path")
+        config = SplitConfig.from_settings()
+        if (
+            not source_folder_path
+            or not os.path.isdir(source_folder_path)
+            or not os.path.isdir(config.destination_folder_path or "")
+        ):
+            show_message("Choose existing source and destination folders first.")
+            self.watch_checkbox.setChecked(False)
+            return
+        note_types: list[str] = settings.value(
+            "note_types", DEFAULT_SETTINGS["note_types"]
+        )
+        self.watch_controller.start(
+            KeywordWatcher(
+                source_folder_path,
+                note_types,
+                config.split_keyword,
+                resplit_changed=config.incremental_split,
+            )
+        )
+        self.watch_status_label.setText(f"Watching {source_folder_path}")
+
+    def __split_watched_files(self, watcher: KeywordWatcher) -> None:
+        """Splits the watched files that gained the keyword using the settings."""
+        if not watcher.pending_count:
+            return
+        config = SplitConfig.from_settings()
+        if not os.path.isdir(config.destination_folder_path or ""):
+            return
+        watcher.split_keyword = config.split_keyword
+        watcher.resplit_changed = config.incremental_split
+        new_notes: list[Note] = split_watched_files(
+            watcher, config, self.__get_split_cache(config)
+        )
+        if not new_notes:
+            return
+        for new_note in new_notes:
+            if os.path.exists(new_note.path):
+                self.catalog.add(new_note)
+        self.watch_status_label.setText(
+            f"Created {len(new_notes)} files from watched files at"
+            f" {time.strftime('%H:%M:%S')}"
+        )
+
+    def __get_split_cache(self, config: SplitConfig) -> SplitCache | None:
+        """Gets the split cache, opening it the first time it is needed."""
+        if not config.use_split_cache:
+            return None
+        if self.__split_cache is None:
+            self.__split_cache = open_split_cache(config)
+        return self.__split_cache
 
-        If a source folder has not been chosen yet, the user will be asked to choose
-        one.
+    def __scan_source_folder(self) -> bool:
+        """Updates the catalog to have the notes in the user's chosen source folder.
+
+        Only the notes whose files are new or changed since the last scan, or since
+        the catalog's cache was saved, are read. If a source folder has not been chosen
+        yet, the user will be asked to choose one.
+
+        Returns
+        -------
+        bool
+            True if there are any notes in the source folder, False otherwise.
         """
-        folder_list: list[str]
         settings = QtCore.QSettings()
         source_folder_path: str | None = settings.value("source_folder_path")
+        note_types: list[str] = settings.value(
+            "note_types", DEFAULT_SETTINGS["note_types"]
+        )
+        self.catalog.set_file_id_regex(
+            settings.value("file_id_regex", DEFAULT_SETTINGS["file_id_regex"])
+        )
         try:
             if not source_folder_path:
                 raise FileNotFoundError
-            folder_list = os.listdir(source_folder_path)
+            self.__scan_folder(source_folder_path, note_types)
         except FileNotFoundError:
             source_folder_path = request_folder_path("source")
             if not source_folder_path:
-                return []
-            else:
-                settings.setValue("source_folder_path", source_folder_path)
-                self.main_window.settings_tab.source_folder_line_edit.setText(
-                    source_folder_path
-                )
-                folder_list = os.listdir(source_folder_path)
-        assert source_folder_path is not None
-        file_paths: list[str] = [
-            os.path.join(source_folder_path, file_name) for file_name in folder_list
-        ]
-        return create_notes(file_paths)
-
-    def __get_notes_with_keyword(
-        self, split_keyword: str, all_notes: list[Note]
-    ) -> list[Note]:
-        """Filters to the notes that have the split keyword."""
-        if not all_notes:
-            all_notes = self.__get_all_notes_in_source_folder()
-        if not all_notes:
+                return False
+            settings.setValue("source_folder_path", source_folder_path)
+            self.main_window.settings_tab.source_folder_line_edit.setText(
+                source_folder_path
+            )
+            self.__scan_folder(source_folder_path, note_types)
+        return bool(self.catalog)
+
+    def __scan_folder(self, folder_path: str, note_types: list[str]) -> None:
+        """Scans a folder into the catalog, using and updating the folder's cache."""
+        if folder_path != self.catalog_folder_path:
+            self.catalog.load(get_cache_file_path(folder_path))
+            self.catalog_folder_path = folder_path
+        self.catalog.scan_folder(folder_path, note_types)
+        self.catalog.save(get_cache_file_path(folder_path))
+
+    def __get_notes_with_keyword(self, split_keyword: str) -> list[Note]:
+        """Filters the source folder's notes to those that have the split keyword."""
+        if not self.catalog and not self.__scan_source_folder():
             return []
-        chosen_notes: list[Note] = []
+        all_notes: list[Note] = self.catalog.notes
         progress_dialog = QtWidgets.QProgressDialog(
             "searching for notes with the keyword",
             "cancel",
@@ -289,12 +468,9 @@ class SplitTab(QtWidgets.QWidget):
             self,
             modal=True,
         )
-        for i, note in enumerate(all_notes):
-            progress_dialog.setValue(i)
-            with open(note.path, "r", encoding="utf8") as file:
-                contents = file.read()
-            if split_keyword in contents:
-                chosen_notes.append(note)
+        chosen_notes = find_notes_with_keyword(
+            split_keyword, all_notes, progress_dialog.setValue
+        )
         progress_dialog.setValue(len(all_notes))
         return chosen_notes
 
@@ -302,7 +478,10 @@ class SplitTab(QtWidgets.QWidget):
         """Splits files into multiple smaller files.
 
         If no notes are provided, they will be found using the split keyword and the
-        source folder path chosen in settings.
+        source folder path chosen in settings. If the destination folder does not
+        exist, the user will be asked to choose one. If an earlier split into the
+        destination folder did not finish, the user will be asked whether to resume it
+        or undo it.
 
         Parameters
         ----------
@@ -318,271 +497,48 @@ class SplitTab(QtWidgets.QWidget):
             "splitting...", "cancel", 0, 100, self, modal=True
         )
         progress.forceShow()
-        tokenize: Callable = Lexer()
-        split: Callable = Splitter()
-        format_: Callable = Formatter()
-
-        settings = QtCore.QSettings()
-        split_keyword: str = settings.value(
-            "split_keyword", DEFAULT_SETTINGS["split_keyword"]
-        )
-        file_id_format: str = settings.value(
-            "file_id_format", DEFAULT_SETTINGS["file_id_format"]
-        )
-        file_name_format: str = settings.value(
-            "file_name_format", DEFAULT_SETTINGS["file_name_format"]
-        )
-        split_type: type[tokens.Token] = get_token_type(
-            settings.value("split_type", DEFAULT_SETTINGS["split_type"])
-        )
-        split_attrs: dict = settings.value(
-            "split_attrs", DEFAULT_SETTINGS["split_attrs"]
-        )
-        using_split_keyword: bool = bool(
-            settings.value(
-                "using_split_keyword", DEFAULT_SETTINGS["using_split_keyword"]
-            )
-        )
-        remove_split_keyword: bool = bool(
-            settings.value(
-                "remove_split_keyword", DEFAULT_SETTINGS["remove_split_keyword"]
-            )
-        )
-        parse_blocks: bool = bool(
-            settings.value("parse_blocks", bool(DEFAULT_SETTINGS["parse_blocks"]))
-        )
-        copy_global_tags: bool = bool(
-            settings.value(
-                "copy_global_tags", bool(DEFAULT_SETTINGS["copy_global_tags"])
-            )
-        )
-        copy_frontmatter: bool = bool(
-            settings.value(
-                "copy_frontmatter", bool(DEFAULT_SETTINGS["copy_frontmatter"])
-            )
-        )
-        move_footnotes: bool = bool(
-            settings.value("move_footnotes", bool(DEFAULT_SETTINGS["move_footnotes"]))
-        )
-        create_index_file: bool = bool(
-            settings.value("create_index_file", DEFAULT_SETTINGS["create_index_file"])
-        )
-        create_backlinks: bool = bool(
-            settings.value("create_backlinks", DEFAULT_SETTINGS["create_backlinks"])
-        )
-
+        config = SplitConfig.from_settings()
         progress.setValue(1)
         if not notes:
-            notes = self.__get_notes_with_keyword(split_keyword, self.all_notes)
+            with instrumentation.stage("keyword_search"):
+                notes = self.__get_notes_with_keyword(config.split_keyword)
         if not notes:
             return []
-        all_new_notes: list[Note] = []
-
-        note_count = len(notes)
-        for i, source_note in enumerate(notes):
-            progress.setValue((i + 1) / (note_count + 5) * 100)
-            with open(source_note.path, "r", encoding="utf8") as file:
-                content: str = file.read()
-            progress.setValue((i + 2) / (note_count + 5) * 100)
-            split_contents: list[str] = split_text(
-                content,
-                tokenize,
-                split,
-                format_,
-                split_type,
-                split_attrs,
-                using_split_keyword,
-                remove_split_keyword,
-                split_keyword,
-                parse_blocks,
-                copy_global_tags,
-                copy_frontmatter,
-                move_footnotes,
-            )
-            progress.setValue((i + 3) / (note_count + 5) * 100)
-            new_file_names: list[str] = create_file_names(
-                source_note.ext, file_id_format, file_name_format, split_contents
-            )
-            progress.setValue((i + 4) / (note_count + 5) * 100)
-            new_notes = self.save_new_notes(split_contents, new_file_names)
-            all_new_notes.extend(new_notes)
-            progress.setValue((i + 5) / (note_count + 5) * 100)
-            print(f"Created {len(new_notes)} new files.")
-            if new_notes:
-                if create_index_file:
-                    index_note: Note = create_index_file_(
-                        source_note, new_notes, split_type
-                    )
-                    print(f"Created index file at {index_note.path}")
-                    all_new_notes.append(index_note)
-                    if create_backlinks:
-                        append_backlinks(index_note, new_notes)
-                elif create_backlinks:
-                    append_backlinks(source_note, new_notes)
-        progress.cancel()
-        return all_new_notes
-
-    def save_new_notes(
-        self, split_contents: list[str], new_file_names: list[str]
-    ) -> list[Note]:
-        """Creates new files and saves strings into them.
-
-        The lists for the contents and names of the new files are parallel.
-
-        Attributes
-        ----------
-        split_contents : list[str]
-            A list of strings to each be saved into a new file.
-        new_file_names : list[str]
-            A list of names of files to be created.
-
-        Returns
-        -------
-        new_notes : list[Note]
-            The newly created notes.
-        """
-        new_notes = []
-        settings = QtCore.QSettings()
-        source_folder_path: str | None = settings.value("source_folder_path")
-        destination_folder_path: str | None = settings.value("destination_folder_path")
+        instrumentation.count("stat_calls")
+        destination_folder_path: str | None = config.destination_folder_path
         if not destination_folder_path or not os.path.exists(destination_folder_path):
-            destination_folder_path = require_folder_path("destination")
-            settings.setValue("destination_folder_path", destination_folder_path)
+            config.destination_folder_path = require_folder_path("destination")
+            QtCore.QSettings().setValue(
+                "destination_folder_path", config.destination_folder_path
+            )
             self.main_window.settings_tab.destination_folder_line_edit.setText(
-                destination_folder_path
+                config.destination_folder_path
             )
-
-        for new_file_name, split_content in zip(new_file_names, split_contents):
-            new_file_path: str = ensure_file_path_uniqueness(
-                os.path.join(destination_folder_path, new_file_name)
+        if SplitLock(config.destination_folder_path).is_locked():
+            progress.cancel()
+            show_message(
+                "Another split into the destination folder is running. Please try"
+                " again when it finishes."
+            )
+            return []
+        resume = True
+        if SplitJournal.in_folder(config.destination_folder_path).is_unfinished():
+            resume = request_confirmation(
+                "An earlier split into the destination folder did not finish. Resume"
+                " it? If not, its changes will be undone first."
             )
-            if not source_folder_path or source_folder_path != destination_folder_path:
-                split_content = make_file_paths_absolute(split_content, new_file_path)
-            with open(new_file_path, "x", encoding="utf8") as file:
-                file.write(split_content)
-            new_notes.append(Note(new_file_path))
-        return new_notes
-
-
-def split_text(
-    content: str,
-    tokenize: Callable,
-    split: Callable,
-    format_: Callable,
-    split_type: type[tokens.Token],
-    split_attrs: dict,
-    using_split_keyword: bool,
-    remove_split_keyword: bool,
-    split_keyword: str,
-    parse_blocks: bool,
-    copy_global_tags: bool,
-    copy_frontmatter: bool,
-    move_footnotes: bool,
-) -> list[str]:
-    """Splits a string into multiple strings based on several factors.
-
-    Attributes
-    ----------
-    content : str
-        The string to be split.
-    tokenize : Callable
-        A function created from the Lexer class that converts a string into a list of
-        tokens.
-    split : Callable
-        A function created from the Splitter class that groups the tokens into sections.
-    format_ : Callable
-        A function created from the Formatter class that adjusts the formatting of each
-        section and converts them to strings.
-    split_type : type[tokens.Token]
-        The type of token to split by.
-    split_attrs : dict
-        The attributes of the token to split by.
-    using_split_keyword : bool
-        Whether to use a keyword to decide which files to split.
-    remove_split_keyword : bool
-        Whether to remove the keyword from the content of the token.
-    split_keyword : str
-        The keyword for deciding which files to split.
-    parse_blocks : bool
-        Whether to parse blocks.
-    copy_global_tags : bool
-        Whether to copy global tags to each new file.
-    copy_frontmatter : bool
-        Whether to copy frontmatter to each new file.
-    move_footnotes : bool
-        Whether to move footnotes into the new files.
-
-    Returns
-    -------
-    split_contents : list[str]
-        A list of strings that are the sections of the original string.
-    """
-    tokens_: list[tokens.Token] = tokenize(content)
-    syntax_tree = SyntaxTree(tokens_, parse_blocks)
-    sections, global_tags = split(
-        syntax_tree.content,
-        split_type,
-        split_attrs,
-        using_split_keyword,
-        remove_split_keyword,
-        split_keyword,
-    )
-    split_contents: list[str] = format_(
-        sections=sections,
-        global_tags=global_tags,
-        copy_global_tags=copy_global_tags,
-        copy_frontmatter=copy_frontmatter,
-        move_footnotes=move_footnotes,
-        frontmatter=syntax_tree.frontmatter,
-        footnotes=syntax_tree.footnotes,
-    )
-    return split_contents
-
-
-def create_index_file_(
-    source_note: Note, new_notes: list[Note], split_type: type[tokens.Token]
-) -> Note:
-    """Creates an index file for the new notes in the same folder.
-
-    Parameters
-    ----------
-    source_note : Note
-        The note that the new notes were created from.
-    new_notes : list[Note]
-        The newly created notes.
-    split_type : type[tokens.Token]
-        The type of token that was split by.
-
-    Returns
-    -------
-    Note
-        The newly created index note.
-    """
-    index_name = validate_file_name(f"index - {source_note.name}", 35)
-    folder_path = new_notes[0].folder_path
-    index_file_path = os.path.join(folder_path, index_name)
-    index_file_path = ensure_file_path_uniqueness(index_file_path)
-    with open(index_file_path, "x", encoding="utf8") as file:
-        file.write(f"# index of {source_note.title}\n\n")
-        for n in new_notes:
-            if issubclass(split_type, tokens.Header):
-                file.write(f"* [{n.title}]({n.path})\n")
-            else:
-                file.write(f"* [{n.name}]({n.path})\n")
-        file.write(f"\n[Source: {source_note.title}]({source_note.path})")
-    return Note(index_file_path, folder_path, index_name)
-
-
-def append_backlinks(root_note: Note, notes: list[Note]) -> None:
-    """Appends backlinks to the root note in each of the given notes.
-
-    Parameters
-    ----------
-    root_note : str
-        The note that the backlinks will link to.
-    notes : list[Note]
-        The notes to append backlinks to.
-    """
-    for note_ in notes:
-        with open(note_.path, "a", encoding="utf8") as file:
-            file.write(f"\n\n[Backlink: {root_note.title}]({root_note.path})\n")
+        try:
+            with profiling.profile_run("split"):
+                all_new_notes = split_files(
+                    notes,
+                    config,
+                    progress.setValue,
+                    self.__get_split_cache(config),
+                    resume,
+                )
+        except FolderLockedError as e:
+            progress.cancel()
+            show_message(str(e))
+            return []
+        progress.cancel()
+        return all_new_notes
@@ -1,4 +1,5 @@
 """For splitting a syntax tree's tokens into Sections tokens."""
+from note_splitter import instrumentation
 from note_splitter import patterns
 from note_splitter import tokens
 
@@ -117,6 +118,7 @@ class Splitter:
             else:
                 if isinstance(token, tokens.CanHaveInlineElements):
                     tags = patterns.tag.findall(token.content)
+                    instrumentation.count("regex_calls")
                     global_tags.extend(tags)
                 self.__tokens.pop(0)
 
@@ -8,12 +8,13 @@ tokens, that ``content`` property is a string of the original content of the raw
 text. Otherwise, the ``content`` property is the list of subtokens. Each token class
 also has a boolean class variable (not an instance variable) named ``HAS_PATTERN``. If
 ``HAS_PATTERN`` is True, the class has a corresponding regular expression in
-patterns.py.
+patterns.py. Every token type is listed in ``registry``, and new token types must be
+added to it with ``registry.register``.
 """
-import inspect
+import bisect
+import re
 from abc import ABC
 from abc import abstractmethod
-from functools import lru_cache
 from types import ModuleType
 from typing import Any
 
@@ -534,34 +535,206 @@ class Section(Block):
         self._content: list[Any] = tokens_ or []
 
 
-def __is_token_type(obj: Any) -> bool:
-    """Returns True if obj is a Token type.
+def create_token_type_name(token_type: type) -> str:
+    """Creates a token type's output-formatted name, such as "code fence".
 
     Parameters
     ----------
-    obj : Any
-        The object to test.
+    token_type : type
+        The token type to create the name of.
     """
-    return inspect.isclass(obj) and obj.__name__ not in ("ABC", "Any", "module")
+    try:
+        class_name: str = token_type.__name__
+    except AttributeError:
+        raise TypeError(f"{token_type} is not a type.")
+    return re.sub(r"(?<!^)(?=[A-Z])", " ", class_name).lower()
 
 
-@lru_cache(maxsize=1)
-def get_all_token_types(tokens_module: ModuleType) -> list[type[Token]]:
-    """Gets the list of all token types.
+class TokenTypeRegistry:
+    """The token types, with their names, numeric IDs, and patterns.
 
-    Call the function like this: ``tokens.get_all_token_types(tokens)``.
+    Each token type is registered once, so looking up a type by its name or ID, or a
+    name or ID by its type, does not need to search or create anything. Types are kept
+    in alphabetical order of their class names, which is the order the lexer tries
+    their patterns in.
+
+    A token type with ``HAS_PATTERN`` is bound to the pattern in patterns.py with the
+    same name as the type's output-formatted name with underscores instead of spaces.
+    Patterns bound by name are looked up in patterns.py each time ``get_patterns`` is
+    called, so patterns that are replaced while the app runs are used.
+    """
+
+    def __init__(self):
+        self.__types: list[type[Token]] = []
+        self.__names: list[str] = []
+        self.__types_by_name: dict[str, type[Token]] = {}
+        self.__names_by_type: dict[type[Token], str] = {}
+        self.__types_by_id: list[type[Token]] = []
+        self.__ids_by_type: dict[type[Token], int] = {}
+        self.__patterns: dict[type[Token], str | re.Pattern] = {}
+
+    def register(
+        self,
+        token_type: type[Token],
+        name: str | None = None,
+        pattern: str | re.Pattern | None = None,
+    ) -> type[Token]:
+        """Adds a token type and returns it.
+
+        Parameters
+        ----------
+        token_type : type[Token]
+            The token type to add.
+        name : str | None, optional
+            The type's output-formatted name. If None, it is created from the type's
+            class name.
+        pattern : str | re.Pattern | None, optional
+            The type's pattern, or the name of its pattern in patterns.py. If None and
+            the type has ``HAS_PATTERN``, the type's name is used with underscores
+            instead of spaces.
+
+        Raises
+        ------
+        ValueError
+            If a different type with the same name was already added.
+        """
+        if not issubclass(token_type, Token):
+            raise TypeError(f"{token_type} is not a token type.")
+        if name is None:
+            name = create_token_type_name(token_type)
+        registered_type = self.__types_by_name.get(name)
+        if registered_type is not None and registered_type is not token_type:
+            raise ValueError(f'Token type "{name}" is already registered.')
+        if token_type not in self.__ids_by_type:
+            self.__ids_by_type[token_type] = len(self.__types_by_id)
+            self.__types_by_id.append(token_type)
+            i = bisect.bisect(self.__types, token_type.__name__, key=_get_class_name)
+            self.__types.insert(i, token_type)
+            self.__names.insert(i, name)
+        else:
+            del self.__types_by_name[self.__names_by_type[token_type]]
+            self.__names[self.__types.index(token_type)] = name
+        self.__types_by_name[name] = token_type
+        self.__names_by_type[token_type] = name
+        if pattern is None and token_type.HAS_PATTERN:
+            pattern = name.replace(" ", "_")
+        if pattern is not None:
+            self.__patterns[token_type] = pattern
+        return token_type
+
+    @property
+    def types(self) -> list[type[Token]]:
+        """All the token types, in alphabetical order of their class names."""
+        return list(self.__types)
+
+    @property
+    def names(self) -> list[str]:
+        """All the token types' output-formatted names, in the order of ``types``."""
+        return list(self.__names)
+
+    def get_name(self, token_type: type[Token]) -> str:
+        """Gets a token type's output-formatted name.
+
+        Raises
+        ------
+        KeyError
+            If the type is not registered.
+        """
+        return self.__names_by_type[token_type]
+
+    def get_type(self, name: str) -> type[Token]:
+        """Gets a token type by its output-formatted name.
+
+        Raises
+        ------
+        ValueError
+            If there is no token type with the name.
+        """
+        try:
+            return self.__types_by_name[name]
+        except KeyError:
+            raise ValueError(f'Token type "{name}" not found.')
+
+    def get_id(self, token_type: type[Token]) -> int:
+        """Gets a token type's numeric ID, which is its order of registration.
+
+        Raises
+        ------
+        KeyError
+            If the type is not registered.
+        """
+        return self.__ids_by_type[token_type]
+
+    def get_type_by_id(self, type_id: int) -> type[Token]:
+        """Gets a token type by its numeric ID.
+
+        Raises
+        ------
+        IndexError
+            If there is no token type with the ID.
+        """
+        return self.__types_by_id[type_id]
+
+    def get_patterns(self) -> list[tuple[type[Token], re.Pattern]]:
+        """Gets the token types that have patterns and their patterns.
+
+        The types are in the order of ``types``.
+        """
+        bindings: list[tuple[type[Token], re.Pattern]] = []
+        for token_type in self.__types:
+            pattern = self.__patterns.get(token_type)
+            if isinstance(pattern, str):
+                pattern = getattr(patterns, pattern)
+            if pattern is not None:
+                bindings.append((token_type, pattern))
+        return bindings
+
+
+def _get_class_name(token_type: type) -> str:
+    return token_type.__name__
+
+
+registry = TokenTypeRegistry()
+for _token_type in (
+    Token,
+    Line,
+    Block,
+    CanHaveInlineElements,
+    TextListItem,
+    TablePart,
+    Fence,
+    Fenced,
+    Text,
+    EmptyLine,
+    Header,
+    HorizontalRule,
+    Blockquote,
+    BlockquoteBlock,
+    Footnote,
+    Task,
+    UnorderedListItem,
+    OrderedListItem,
+    TextList,
+    TableRow,
+    TableDivider,
+    Table,
+    CodeFence,
+    Code,
+    CodeBlock,
+    MathFence,
+    Math,
+    MathBlock,
+    Section,
+):
+    registry.register(_token_type)
+
+
+def get_all_token_types(tokens_module: ModuleType | None = None) -> list[type[Token]]:
+    """Gets the list of all token types, in alphabetical order of their class names.
 
     Parameters
     ----------
-    tokens_module : ModuleType
-        The module containing the token types. There is only one correct argument. The
-        only reason why the argument is required is because there doesn't seem to be any
-        other way to automatically get the list of token types from within the file they
-        are in.
+    tokens_module : ModuleType | None, optional
+        Not used. Token types are listed in ``registry``.
     """
-    token_types: list[type] = [
-        c[1] for c in inspect.getmembers(tokens_module, __is_token_type)
-    ]
-    for type_ in token_types:
-        assert issubclass(type_, Token), f"{type_} is not a token type"
-    return token_types
+    return registry.types
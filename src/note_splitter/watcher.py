@@ -0,0 +1,325 @@
+"""For splitting files automatically when they gain the split keyword.
+
+A ``KeywordWatcher`` remembers the size and modification time of each note in the
+source folder. Each time the folder is scanned, the files that changed are noted, and
+once a changed file has not changed again for the debounce time, it is read. If it now
+has the split keyword but did not the last time it was read, it is split. Files that
+were not read yet are assumed to not have had the keyword. With incremental splitting
+on, files that still have the keyword are split again whenever they change, which
+updates the files created from them earlier.
+
+Only files that changed are read, so scanning is cheap. The folder is scanned on a
+timer by ``watch``, which is used by the headless mode (``python -m note_splitter
+--watch``), and when ``QFileSystemWatcher`` reports a change or on a timer by
+``FolderWatchController``, which is used by the split tab.
+"""
+import os
+import time
+from typing import Callable
+
+from note_splitter.journal import FolderLockedError
+from note_splitter.note import create_notes
+from note_splitter.note import file_contains
+from note_splitter.note import Note
+from note_splitter.pipeline import split_files
+from note_splitter.pipeline import SplitConfig
+from note_splitter.split_cache import SplitCache
+from PySide6 import QtCore
+
+
+DEFAULT_INTERVAL_SECONDS = 2.0
+DEFAULT_DEBOUNCE_SECONDS = 1.0
+
+
+class KeywordWatcher:
+    """Finds the files in a folder that gained the split keyword.
+
+    Attributes
+    ----------
+    folder_path : str
+        The absolute path to the folder to watch, not including its subfolders.
+    note_types : list[str]
+        The file extensions of the files to watch, each including the period.
+    split_keyword : str
+        The keyword for deciding which files to split.
+    debounce_seconds : float
+        How long a file must go without changing before it is read.
+    resplit_changed : bool
+        Whether files that still have the keyword are split again when they change.
+    """
+
+    def __init__(
+        self,
+        folder_path: str,
+        note_types: list[str],
+        split_keyword: str,
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        resplit_changed: bool = False,
+    ):
+        self.folder_path = folder_path
+        self.note_types = note_types
+        self.split_keyword = split_keyword
+        self.debounce_seconds = debounce_seconds
+        self.resplit_changed = resplit_changed
+        self.__stats: dict[str, tuple[int, int]] = self.__get_stats()
+        self.__has_keyword: dict[str, bool] = {}
+        self.__changed_at: dict[str, float] = {}
+
+    @property
+    def pending_count(self) -> int:
+        """The number of changed files that have not been read yet."""
+        return len(self.__changed_at)
+
+    def scan(self, now: float | None = None) -> None:
+        """Notes which files were created or changed since the last scan.
+
+        Parameters
+        ----------
+        now : float | None, optional
+            The current ``time.monotonic()``. If None, it is found.
+        """
+        if now is None:
+            now = time.monotonic()
+        stats: dict[str, tuple[int, int]] = self.__get_stats()
+        for path, stat in stats.items():
+            if self.__stats.get(path) != stat:
+                self.__changed_at[path] = now
+        for path in self.__stats.keys() - stats.keys():
+            self.__has_keyword.pop(path, None)
+            self.__changed_at.pop(path, None)
+        self.__stats = stats
+
+    def take_files_to_split(self, now: float | None = None) -> list[str]:
+        """Reads the files that stopped changing and returns the ones to split.
+
+        Parameters
+        ----------
+        now : float | None, optional
+            The current ``time.monotonic()``. If None, it is found.
+
+        Returns
+        -------
+        list[str]
+            The absolute paths of the files to split, in alphabetical order.
+        """
+        if now is None:
+            now = time.monotonic()
+        ready_paths: list[str] = [
+            path
+            for path, changed_at in self.__changed_at.items()
+            if now - changed_at >= self.debounce_seconds
+        ]
+        file_paths: list[str] = []
+        for path in ready_paths:
+            del self.__changed_at[path]
+            try:
+                has_keyword: bool = file_contains(path, self.split_keyword)
+            except OSError:
+                continue
+            had_keyword: bool = self.__has_keyword.get(path, False)
+            self.__has_keyword[path] = has_keyword
+            if has_keyword and (not had_keyword or self.resplit_changed):
+                file_paths.append(path)
+        return sorted(file_paths)
+
+    def ignore(self, file_paths: list[str]) -> None:
+        """Makes the watcher not split files that were just written by a split.
+
+        Parameters
+        ----------
+        file_paths : list[str]
+            The absolute paths of the files. Files in other folders are ignored.
+        """
+        for path in file_paths:
+            path = os.path.normpath(path)
+            if os.path.dirname(path) != os.path.normpath(self.folder_path):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            self.__stats[path] = (stat.st_mtime_ns, stat.st_size)
+            self.__has_keyword[path] = True
+            self.__changed_at.pop(path, None)
+
+    def retry(self, file_paths: list[str], now: float | None = None) -> None:
+        """Makes the watcher offer files to split again after they could not be split.
+
+        Parameters
+        ----------
+        file_paths : list[str]
+            The absolute paths of the files.
+        now : float | None, optional
+            The current ``time.monotonic()``. If None, it is found.
+        """
+        if now is None:
+            now = time.monotonic()
+        for path in file_paths:
+            self.__has_keyword[path] = False
+            self.__changed_at[path] = now
+
+    def __get_stats(self) -> dict[str, tuple[int, int]]:
+        """Gets the modification time and size of each note in the folder."""
+        stats: dict[str, tuple[int, int]] = {}
+        with os.scandir(self.folder_path) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1] not in self.note_types:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except FileNotFoundError:  # The file was deleted while listing.
+                    continue
+                path = os.path.normpath(os.path.join(self.folder_path, entry.name))
+                stats[path] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+
+def split_watched_files(
+    watcher: KeywordWatcher,
+    config: SplitConfig,
+    cache: SplitCache | None = None,
+    now: float | None = None,
+) -> list[Note]:
+    """Splits the files that gained the split keyword, if there are any.
+
+    Parameters
+    ----------
+    watcher : KeywordWatcher
+        The watcher of the source folder, which has already scanned it.
+    config : SplitConfig
+        The settings to split with. The destination folder must exist.
+    cache : SplitCache | None, optional
+        The cache of split results to use.
+    now : float | None, optional
+        The current ``time.monotonic()``. If None, it is found.
+
+    Returns
+    -------
+    list[Note]
+        The new notes. If another split into the destination folder is running, the
+        files are left for a later call and this is empty.
+    """
+    file_paths: list[str] = watcher.take_files_to_split(now)
+    if not file_paths:
+        return []
+    config.using_split_keyword = True
+    try:
+        new_notes: list[Note] = split_files(
+            create_notes(file_paths), config, cache=cache
+        )
+    except FolderLockedError as e:
+        watcher.retry(file_paths, now)
+        print(f"{e} Trying again later.")
+        return []
+    watcher.ignore([n.path for n in new_notes])
+    print(f"Split {len(file_paths)} files into {len(new_notes)} files.")
+    return new_notes
+
+
+def watch(
+    config: SplitConfig,
+    note_types: list[str],
+    interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+    debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+    cache: SplitCache | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> None:
+    """Scans the source folder on a timer and splits files that gain the keyword.
+
+    Parameters
+    ----------
+    config : SplitConfig
+        The settings to split with. The source and destination folders must exist.
+    note_types : list[str]
+        The file extensions of the files to watch, each including the period.
+    interval_seconds : float, optional
+        How long to wait between scans.
+    debounce_seconds : float, optional
+        How long a file must go without changing before it is read.
+    cache : SplitCache | None, optional
+        The cache of split results to use.
+    should_stop : Callable[[], bool] | None, optional
+        A function that is called before each scan and returns True to stop watching.
+        If None, this runs until it is interrupted.
+    """
+    assert config.source_folder_path is not None
+    watcher = KeywordWatcher(
+        config.source_folder_path,
+        note_types,
+        config.split_keyword,
+        debounce_seconds,
+        config.incremental_split,
+    )
+    while should_stop is None or not should_stop():
+        time.sleep(interval_seconds)
+        watcher.scan()
+        split_watched_files(watcher, config, cache)
+
+
+class FolderWatchController(QtCore.QObject):
+    """Watches the source folder while the app's window is open.
+
+    The folder is scanned when ``QFileSystemWatcher`` reports that files were added,
+    removed, or renamed, and on a timer to find files whose content changed, which
+    ``QFileSystemWatcher`` only reports for each file that is watched on its own.
+
+    Parameters
+    ----------
+    split : Callable[[KeywordWatcher], None]
+        A function that splits the files the watcher returns from
+        ``take_files_to_split``. It is called after each scan.
+    parent : QtCore.QObject | None, optional
+        The controller's parent.
+    """
+
+    def __init__(
+        self,
+        split: Callable[[KeywordWatcher], None],
+        parent: QtCore.QObject | None = None,
+    ):
+        super().__init__(parent)
+        self.split = split
+        self.watcher: KeywordWatcher | None = None
+        self.__file_system_watcher = QtCore.QFileSystemWatcher(self)
+        self.__file_system_watcher.directoryChanged.connect(self.__scan)
+        self.__timer = QtCore.QTimer(self)
+        self.__timer.timeout.connect(self.__scan)
+
+    def start(
+        self,
+        watcher: KeywordWatcher,
+        interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+    ) -> None:
+        """Starts watching a folder, replacing any folder that was being watched.
+
+        Parameters
+        ----------
+        watcher : KeywordWatcher
+            The watcher of the folder.
+        interval_seconds : float, optional
+            How long to wait between scans when nothing is reported.
+        """
+        self.stop()
+        self.watcher = watcher
+        self.__file_system_watcher.addPath(watcher.folder_path)
+        self.__timer.start(int(interval_seconds * 1000))
+
+    def stop(self) -> None:
+        """Stops watching."""
+        self.__timer.stop()
+        directories: list[str] = self.__file_system_watcher.directories()
+        if directories:
+            self.__file_system_watcher.removePaths(directories)
+        self.watcher = None
+
+    def __scan(self) -> None:
+        if self.watcher is None:
+            return
+        try:
+            self.watcher.scan()
+        except FileNotFoundError:  # The folder was deleted or renamed.
+            self.stop()
+            return
+        self.split(self.watcher)
@@ -0,0 +1,36 @@
+from typing import Callable
+
+import pytest
+from note_splitter import pipeline
+from note_splitter import tokens
+
+
+@pytest.fixture
+def split_config() -> Callable[..., pipeline.SplitConfig]:
+    """Returns a function that creates split settings, with any settings changed."""
+
+    def create_split_config(**changes) -> pipeline.SplitConfig:
+        config = pipeline.SplitConfig(
+            split_keyword="#split",
+            file_id_format=r"%uuid4",
+            file_name_format=r"%id",
+            split_type=tokens.Header,
+            split_attrs={"level": 2},
+            using_split_keyword=False,
+            remove_split_keyword=True,
+            parse_blocks=True,
+            copy_global_tags=False,
+            copy_frontmatter=False,
+            move_footnotes=False,
+            create_index_file=False,
+            create_backlinks=False,
+            source_folder_path=None,
+            destination_folder_path="",
+            use_split_cache=False,
+            incremental_split=False,
+        )
+        for name, value in changes.items():
+            setattr(config, name, value)
+        return config
+
+    return create_split_config
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from note_splitter.async_io import AsyncFileIO
+
+
+def test_read_text(tmp_path):
+    (tmp_path / "a.md").write_text("content", encoding="utf8")
+    file_io = AsyncFileIO(2)
+    assert asyncio.run(file_io.read_text(str(tmp_path / "a.md"))) == "content"
+
+
+def test_read_bytes(tmp_path):
+    (tmp_path / "a.md").write_bytes("内容\r\n".encode("utf8"))
+    file_io = AsyncFileIO(2)
+    data = asyncio.run(file_io.read_bytes(str(tmp_path / "a.md")))
+    assert data == "内容\r\n".encode("utf8")
+
+
+def test_run_limits_concurrency():
+    lock = threading.Lock()
+    running = 0
+    most_running = 0
+
+    def wait() -> None:
+        nonlocal running, most_running
+        with lock:
+            running += 1
+            most_running = max(most_running, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+
+    async def run_all() -> None:
+        file_io = AsyncFileIO(2)
+        await asyncio.gather(*(file_io.run(wait) for _ in range(6)))
+
+    asyncio.run(run_all())
+    assert most_running == 2
+
+
+def test_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        AsyncFileIO(0)
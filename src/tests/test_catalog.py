@@ -0,0 +1,112 @@
+import os
+
+from note_splitter.catalog import NoteCatalog
+from note_splitter.note import Note
+
+
+def write_note(folder_path, file_name: str, content: str) -> Note:
+    (folder_path / file_name).write_text(content)
+    return Note(str(folder_path / file_name))
+
+
+def test_lookups(tmp_path):
+    first = write_note(tmp_path, "20230101000000 a.md", "# same\n")
+    second = write_note(tmp_path, "20230102000000 b.md", "# same\n")
+    catalog = NoteCatalog([first, second], r"\d{14}")
+    assert len(catalog) == 2
+    assert catalog.get_by_path(first.path) is first
+    assert catalog.get_by_title("same") == [first, second]
+    assert catalog.get_by_title("missing") == []
+    assert catalog.get_by_id("20230102000000") is second
+    assert catalog.get_file_id(first.path) == "20230101000000"
+    assert catalog.get_mtime(first.path) == os.stat(first.path).st_mtime
+
+
+def test_remove_and_move(tmp_path):
+    note = write_note(tmp_path, "20230101000000 a.md", "# a\n")
+    catalog = NoteCatalog([note], r"\d{14}")
+    assert catalog.get_by_title("a") == [note]
+    (tmp_path / "sub").mkdir()
+    old_path = note.path
+    note.path = str(tmp_path / "sub" / note.name)
+    os.rename(old_path, note.path)
+    catalog.move(old_path, note)
+    assert old_path not in catalog
+    assert catalog.get_by_path(note.path) is note
+    assert catalog.get_by_title("a") == [note]
+    assert catalog.remove(note.path) is note
+    assert catalog.get_by_title("a") == []
+    assert catalog.get_by_id("20230101000000") is None
+    assert catalog.remove(note.path) is None
+
+
+def test_scan_folder_only_creates_changed_notes(tmp_path):
+    kept = write_note(tmp_path, "kept.md", "# kept\n")
+    changed = write_note(tmp_path, "changed.md", "# changed\n")
+    deleted = write_note(tmp_path, "deleted.md", "# deleted\n")
+    (tmp_path / "other.txt").write_text("not a note")
+    catalog = NoteCatalog()
+    catalog.scan_folder(str(tmp_path), [".md"])
+    assert len(catalog) == 3
+    scanned_kept = catalog.get_by_path(kept.path)
+    (tmp_path / "changed.md").write_text("# changed again\n")
+    os.remove(deleted.path)
+    write_note(tmp_path, "new.md", "# new\n")
+    catalog.scan_folder(str(tmp_path), [".md"])
+    assert catalog.get_by_path(kept.path) is scanned_kept
+    assert catalog.get_by_path(changed.path).title == "changed again"
+    assert deleted.path not in catalog
+    assert [n.name for n in catalog.get_by_title("new")] == ["new.md"]
+
+
+def test_set_file_id_regex(tmp_path):
+    note = write_note(tmp_path, "abc-123.md", "")
+    catalog = NoteCatalog([note])
+    assert catalog.get_file_id(note.path) is None
+    catalog.set_file_id_regex(r"\d+")
+    assert catalog.get_by_id("123") is note
+
+
+def test_load_saved_metadata(tmp_path):
+    notes_folder = tmp_path / "notes"
+    notes_folder.mkdir()
+    cache_path = str(tmp_path / "cache.json")
+    unchanged = write_note(notes_folder, "unchanged.md", "# old title\n#tag\n")
+    write_note(notes_folder, "changed.md", "# old title\n")
+    catalog = NoteCatalog()
+    catalog.scan_folder(str(notes_folder), [".md"])
+    for note in catalog:
+        assert note.title == "old title"
+    assert catalog.get_by_path(unchanged.path).tags == ["#tag"]
+    catalog.save(cache_path)
+
+    stat = os.stat(unchanged.path)
+    (notes_folder / "unchanged.md").write_text("# new title\n#new\n")
+    os.utime(unchanged.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    (notes_folder / "changed.md").write_text("# changed title\n")
+    loaded_catalog = NoteCatalog()
+    loaded_catalog.load(cache_path)
+    loaded_catalog.scan_folder(str(notes_folder), [".md"])
+    loaded_note = loaded_catalog.get_by_path(unchanged.path)
+    assert loaded_note.known_title == "old title"
+    assert loaded_note.known_tags == ["#tag"]
+    assert loaded_catalog.get_by_title("changed title")[0].name == "changed.md"
+
+
+def test_load_without_known_titles(tmp_path):
+    cache_path = str(tmp_path / "cache.json")
+    note = write_note(tmp_path, "a.md", "# a\n")
+    NoteCatalog([note]).save(cache_path)
+    catalog = NoteCatalog()
+    catalog.load(cache_path)
+    catalog.scan_folder(str(tmp_path), [".md"])
+    assert catalog.get_by_path(note.path).known_title is None
+    assert catalog.get_by_path(note.path).title == "a"
+
+
+def test_load_damaged_cache(tmp_path):
+    (tmp_path / "cache.json").write_text("{")
+    catalog = NoteCatalog()
+    catalog.load(str(tmp_path / "cache.json"))
+    catalog.load(str(tmp_path / "missing.json"))
+    assert len(catalog) == 0
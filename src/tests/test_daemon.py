@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+
+from note_splitter import pipeline
+from note_splitter.daemon import send_request
+from note_splitter.daemon import serve
+from note_splitter.daemon import SplitDaemon
+
+
+def create_daemon(source, destination, split_config) -> SplitDaemon:
+    def get_config() -> pipeline.SplitConfig:
+        return split_config(
+            using_split_keyword=True,
+            source_folder_path=str(source),
+            destination_folder_path=str(destination),
+        )
+
+    return SplitDaemon([".md"], get_config)
+
+
+def test_split_and_scan(tmp_path, split_config):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    (tmp_path / "a.md").write_text("# a\n#split\n\n## first\n\n## second\n")
+    (tmp_path / "b.md").write_text("# b\n\n## first\n\n## second\n")
+    split_daemon = create_daemon(tmp_path, destination, split_config)
+    response = split_daemon.handle({"command": "scan", "keyword": "#split"})
+    assert response["ok"]
+    assert response["note_count"] == 2
+    assert response["file_paths"] == [(tmp_path / "a.md").as_posix()]
+    response = split_daemon.handle(
+        {"command": "split", "files": [str(tmp_path / "b.md")], "id": 7}
+    )
+    assert response["ok"]
+    assert response["id"] == 7
+    assert len(response["new_files"]) == 2
+    response = split_daemon.handle({"command": "split"})
+    assert response["ok"]
+    assert len(os.listdir(destination)) == 4
+
+
+def test_move_keeps_the_link_index_up_to_date(tmp_path, split_config):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("b")
+    (tmp_path / "c.md").write_text("[a](a.md)")
+    split_daemon = create_daemon(tmp_path, destination, split_config)
+    response = split_daemon.handle(
+        {
+            "command": "move",
+            "files": [str(tmp_path / "a.md"), str(tmp_path / "missing.md")],
+            "destination": str(destination),
+        }
+    )
+    assert response["ok"]
+    assert response["moved"] == {
+        str(tmp_path / "a.md"): str(destination / "a.md"),
+    }
+    assert list(response["skipped"]) == [str(tmp_path / "missing.md")]
+    assert response["notes_rewritten"] == 1
+    assert (tmp_path / "c.md").read_text() == f"[a]({destination.as_posix()}/a.md)"
+    (tmp_path / "c.md").write_text("[b](b.md)")
+    response = split_daemon.handle(
+        {"command": "move", "files": [str(tmp_path / "b.md")], "destination": "dest"}
+    )
+    assert not response["ok"]
+    response = split_daemon.handle(
+        {
+            "command": "move",
+            "files": [str(tmp_path / "b.md")],
+            "destination": str(destination),
+        }
+    )
+    assert response["notes_rewritten"] == 1
+    assert (tmp_path / "c.md").read_text() == f"[b]({destination.as_posix()}/b.md)"
+
+
+def test_move_skips_files_with_the_same_name(tmp_path, split_config):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    for folder_name in ("x", "y"):
+        (tmp_path / folder_name).mkdir()
+        (tmp_path / folder_name / "a.md").write_text(folder_name)
+    split_daemon = create_daemon(tmp_path, destination, split_config)
+    response = split_daemon.handle(
+        {
+            "command": "move",
+            "files": [str(tmp_path / "x" / "a.md"), str(tmp_path / "y" / "a.md")],
+            "destination": str(destination),
+        }
+    )
+    assert response["ok"]
+    assert response["moved"] == {
+        str(tmp_path / "x" / "a.md"): str(destination / "a.md"),
+    }
+    assert list(response["skipped"]) == [str(tmp_path / "y" / "a.md")]
+    assert (destination / "a.md").read_text() == "x"
+    assert (tmp_path / "y" / "a.md").read_text() == "y"
+
+
+def test_invalid_requests(tmp_path, split_config):
+    split_daemon = create_daemon(tmp_path, tmp_path, split_config)
+    assert not json.loads(split_daemon.handle_line("{"))["ok"]
+    assert not json.loads(split_daemon.handle_line("[]"))["ok"]
+    assert not split_daemon.handle({"command": "fly"})["ok"]
+    response = split_daemon.handle({"command": "split", "files": "a.md"})
+    assert not response["ok"]
+    assert "list of file paths" in response["error"]
+
+
+def test_serve(tmp_path, split_config):
+    split_daemon = create_daemon(tmp_path, tmp_path, split_config)
+    address = str(tmp_path / "daemon.sock")
+    thread = threading.Thread(target=serve, args=(split_daemon, address))
+    thread.start()
+    try:
+        for _ in range(100):
+            if os.path.exists(address):
+                break
+            thread.join(0.05)
+        assert send_request(address, {"command": "ping"}, timeout=5.0)["ok"]
+        assert os.stat(address).st_mode & 0o077 == 0
+    finally:
+        send_request(address, {"command": "shutdown"}, timeout=5.0)
+        thread.join(5.0)
+    assert not thread.is_alive()
+    assert not os.path.exists(address)
@@ -0,0 +1,54 @@
+from note_splitter.gui import NoteListModel
+from note_splitter.note import Note
+from PySide6 import QtCore
+
+
+def create_notes(count: int) -> list[Note]:
+    return [Note(f"/notes/{i}.md", title=f"title {i}") for i in range(count)]
+
+
+def test_data():
+    model = NoteListModel(create_notes(3))
+    assert model.rowCount() == 3
+    assert model.data(model.index(1)) == "[[1.md]] title 1"
+    assert model.data(model.index(1), QtCore.Qt.ItemDataRole.ToolTipRole) == (
+        "/notes/1.md"
+    )
+    assert model.data(model.index(3)) is None
+
+
+def test_data_reads_only_shown_titles(tmp_path):
+    (tmp_path / "shown.md").write_text("# shown\n")
+    notes = [Note(str(tmp_path / "shown.md")), Note(str(tmp_path / "missing.md"))]
+    model = NoteListModel(notes)
+    assert model.data(model.index(0)) == "[[shown.md]] shown"
+
+
+def test_get_notes_in_row_order():
+    notes = create_notes(5)
+    model = NoteListModel(notes)
+    indexes = [model.index(3), model.index(0), model.index(3)]
+    assert model.get_notes(indexes) == [notes[0], notes[3]]
+
+
+def test_remove_notes_in_ranges():
+    notes = create_notes(10)
+    model = NoteListModel(notes)
+    removed_rows: list[tuple[int, int]] = []
+    model.rowsRemoved.connect(lambda _, first, last: removed_rows.append((first, last)))
+    expected = [n for i, n in enumerate(notes) if i not in (1, 2, 3, 7)]
+    model.remove_notes([notes[7], notes[1], notes[2], notes[3]])
+    assert model.notes == expected
+    assert removed_rows == [(7, 7), (1, 3)]
+
+
+def test_remove_many_scattered_notes_resets_model():
+    notes = create_notes(1000)
+    model = NoteListModel(notes)
+    reset_count: list[int] = []
+    model.modelReset.connect(lambda: reset_count.append(1))
+    expected = notes[1::2]
+    model.remove_notes(notes[::2])
+    assert model.notes == expected
+    assert model.notes is notes
+    assert len(reset_count) == 1
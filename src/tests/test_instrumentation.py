@@ -0,0 +1,99 @@
+import json
+import os
+from textwrap import dedent
+
+from note_splitter import instrumentation
+from note_splitter import pipeline
+from note_splitter import tokens
+from note_splitter.formatter_ import Formatter
+from note_splitter.lexer import Lexer
+from note_splitter.splitter import Splitter
+
+
+###########
+#  Trace  #
+###########
+
+
+def test_trace_stage_adds_time_and_calls():
+    trace = instrumentation.Trace()
+    for _ in range(3):
+        with trace.stage("lex"):
+            pass
+    assert trace.calls["lex"] == 3
+    assert trace.stages["lex"] >= 0
+
+
+def test_trace_count():
+    trace = instrumentation.Trace()
+    trace.count("tokens", 5)
+    trace.count("tokens")
+    assert trace.counters == {"tokens": 6}
+
+
+def test_trace_save(tmp_path):
+    trace = instrumentation.Trace()
+    with trace.stage("save"):
+        trace.count("bytes_written", 10)
+    file_path = trace.save(os.path.join(tmp_path, "traces"))
+    with open(file_path, "r", encoding="utf8") as file:
+        saved = json.load(file)
+    assert saved["stages"]["save"]["calls"] == 1
+    assert saved["counters"] == {"bytes_written": 10}
+
+
+def test_trace_summary():
+    trace = instrumentation.Trace()
+    with trace.stage("parse"):
+        pass
+    trace.count("sections", 1234)
+    summary = trace.summary()
+    assert "parse: " in summary
+    assert "sections: 1,234" in summary
+
+
+##############################
+#  start_trace / stop_trace  #
+##############################
+
+
+def test_count_without_trace_does_nothing():
+    assert not instrumentation.enabled()
+    instrumentation.count("tokens")
+    with instrumentation.stage("lex"):
+        pass
+    assert instrumentation.stop_trace() is None
+
+
+def test_split_text_with_trace():
+    content = dedent(
+        """\
+        # first header
+        Here is a sentence.
+        # second header
+        Here is another sentence.
+        """
+    )
+    trace = instrumentation.start_trace()
+    try:
+        pipeline.split_text(
+            content=content,
+            tokenize=Lexer(),
+            split=Splitter(),
+            format_=Formatter(),
+            split_type=tokens.Header,
+            split_attrs={},
+            using_split_keyword=False,
+            remove_split_keyword=False,
+            split_keyword="",
+            parse_blocks=False,
+            copy_global_tags=False,
+            copy_frontmatter=False,
+            move_footnotes=False,
+        )
+    finally:
+        assert instrumentation.stop_trace() is trace
+    assert set(trace.stages) == {"lex", "parse", "split", "format"}
+    assert trace.counters["tokens"] == 5
+    assert trace.counters["sections"] == 2
+    assert trace.counters["regex_calls"] > 5
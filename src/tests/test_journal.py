@@ -0,0 +1,61 @@
+import os
+
+import pytest
+from note_splitter.journal import FolderLockedError
+from note_splitter.journal import LOCK_FILE_NAME
+from note_splitter.journal import SplitJournal
+from note_splitter.journal import SplitLock
+from note_splitter.note import FileNameRegistry
+from note_splitter.output_writer import OutputWriter
+
+
+def test_roll_back_undoes_changes(tmp_path):
+    (tmp_path / "old.md").write_text("old content")
+    (tmp_path / "deleted.md").write_text("deleted content")
+    journal = SplitJournal.in_folder(str(tmp_path))
+    writer = OutputWriter(FileNameRegistry(str(tmp_path)), journal=journal)
+    journal.start_source("source.md")
+    writer.create_file("new.md", "new content")
+    writer.replace_file(str(tmp_path / "old.md"), "replaced content")
+    writer.delete_file(str(tmp_path / "deleted.md"))
+    assert SplitJournal.in_folder(str(tmp_path)).is_unfinished()
+
+    assert SplitJournal.in_folder(str(tmp_path)).roll_back() == 3
+    assert sorted(os.listdir(tmp_path)) == ["deleted.md", "old.md"]
+    assert (tmp_path / "old.md").read_text() == "old content"
+    assert (tmp_path / "deleted.md").read_text() == "deleted content"
+
+
+def test_roll_back_leaves_edited_files_alone(tmp_path):
+    journal = SplitJournal.in_folder(str(tmp_path))
+    writer = OutputWriter(FileNameRegistry(str(tmp_path)), journal=journal)
+    writer.create_file("new.md", "new content")
+    (tmp_path / "new.md").write_text("edited content")
+    assert SplitJournal.in_folder(str(tmp_path)).roll_back() == 0
+    assert (tmp_path / "new.md").read_text() == "edited content"
+
+
+def test_commit_deletes_journal(tmp_path):
+    journal = SplitJournal.in_folder(str(tmp_path))
+    writer = OutputWriter(FileNameRegistry(str(tmp_path)), journal=journal)
+    writer.create_file("new.md", "new content")
+    journal.commit()
+    assert os.listdir(tmp_path) == ["new.md"]
+    assert not SplitJournal.in_folder(str(tmp_path)).is_unfinished()
+
+
+def test_split_lock_is_exclusive(tmp_path):
+    with SplitLock(str(tmp_path)):
+        assert (tmp_path / LOCK_FILE_NAME).read_text() == str(os.getpid())
+        assert SplitLock(str(tmp_path)).is_locked()
+        with pytest.raises(FolderLockedError):
+            SplitLock(str(tmp_path)).acquire()
+    assert os.listdir(tmp_path) == []
+    assert not SplitLock(str(tmp_path)).is_locked()
+
+
+def test_split_lock_ignores_lock_files_of_ended_runs(tmp_path):
+    (tmp_path / LOCK_FILE_NAME).write_text("999999")
+    with SplitLock(str(tmp_path)):
+        assert (tmp_path / LOCK_FILE_NAME).read_text() == str(os.getpid())
+    assert os.listdir(tmp_path) == []
@@ -1,4 +1,9 @@
+import mmap
+import re
+
+import pytest
 from note_splitter import lexer
+from note_splitter import patterns
 from note_splitter import tokens
 
 
@@ -43,3 +48,121 @@ def test_tokenize_with_code_block():
     assert isinstance(tokens_[0], tokens.CodeFence)
     assert isinstance(tokens_[1], tokens.Code)
     assert isinstance(tokens_[2], tokens.CodeFence)
+
+
+def test_incremental_lexer_matches_lexer():
+    texts = [
+        "# title\ntext\n```\n# code\n```\n$$\nx\n$$",
+        "# title\ntext\n# code\n```\n$$\nx\n$$",
+        "# title\nnew text\n```\n# code\n```\n$$\nx\n$$\nend",
+        "",
+        "```\n# code",
+    ]
+    tokenize = lexer.IncrementalLexer()
+    for text in texts:
+        expected = lexer.Lexer()(text)
+        tokens_ = tokenize(text)
+        assert [(type(t), t.content) for t in tokens_] == [
+            (type(t), t.content) for t in expected
+        ]
+
+
+def test_incremental_lexer_only_lexes_changed_lines():
+    tokenize = lexer.IncrementalLexer()
+    tokenize("a\nb\nc\nd")
+    assert tokenize.lexed_line_count == 4
+    tokens_ = tokenize("a\nb\n```\nc\nd")
+    assert tokenize.lexed_line_count == 1
+    assert isinstance(tokens_[3], tokens.Code)
+    tokenize("a\nb\n```\nc\nd")
+    assert tokenize.lexed_line_count == 0
+
+
+def test_parallel_lexer_matches_lexer(monkeypatch):
+    monkeypatch.setattr(lexer, "PARALLEL_MIN_CHARS", 0)
+    monkeypatch.setattr(lexer, "CHUNK_CHARS", 8)
+    text = (
+        "# title\ntext\n```\n# code\n$$\nstill code\n```\n- item\n$$\n# math\n"
+        "```\n$$\n\n| a |\n| --- |\n> quote\n```\n"
+    )
+    expected = lexer.Lexer()(text)
+    tokens_ = lexer.Lexer(process_count=2)(text)
+    assert [(type(t), t.content) for t in tokens_] == [
+        (type(t), t.content) for t in expected
+    ]
+    crlf_data = text.replace("\n", "\r\n").encode("utf8")
+    tokens_ = lexer.Lexer(process_count=2)(crlf_data)
+    assert [(type(t), t.content) for t in tokens_] == [
+        (type(t), t.content) for t in expected
+    ]
+
+
+def test_split_into_chunks():
+    text = "abc\ndefgh\ni\n\njk"
+    chunks = lexer._split_into_chunks(text, 4)
+    assert chunks == ["abc\ndefgh", "i\n\njk"]
+    assert "\n".join(chunks).split("\n") == text.split("\n")
+    data = b"abc\r\ndefgh\r\ni\r\n\r\njk"
+    chunks = lexer._split_into_chunks(data, 5)
+    assert chunks == [b"abc\r\ndefgh", b"i\r\n\r\njk"]
+
+
+def assert_same_tokens(actual, expected):
+    assert [(type(t), t.content) for t in actual] == [
+        (type(t), t.content) for t in expected
+    ]
+
+
+def test_lexing_bytes_matches_lexing_text(tmp_path):
+    text = (
+        "# 标题\n　\n\x1c\n   ```\n代码\n```\n１. not a list\n1. list\n"
+        "- [x] 完成\n| a | b |\n|---|---|\n> 引用\n$$\nx\n$$\n[^1]: 脚注"
+    )
+    expected = lexer.Lexer()(text)
+    assert_same_tokens(lexer.Lexer()(text.encode("utf8")), expected)
+    for line_break in ["\r\n", "\r"]:
+        data = text.replace("\n", line_break).encode("utf8")
+        assert_same_tokens(lexer.Lexer()(data), expected)
+    file_path = tmp_path / "note.md"
+    file_path.write_bytes(text.encode("utf8"))
+    with open(file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            assert_same_tokens(lexer.Lexer()(mapped_file), expected)
+
+
+def test_lexing_bytes_with_non_ascii_patterns(monkeypatch):
+    monkeypatch.setattr(patterns, "header", re.compile(r"^#+[ 　].+"))
+    text = "#　标题\n# title"
+    tokens_ = lexer.Lexer()(text.encode("utf8"))
+    assert_same_tokens(tokens_, lexer.Lexer()(text))
+    assert isinstance(tokens_[0], tokens.Header)
+
+
+def test_numpy_lexer_matches_lexer(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(lexer, "NUMPY_MIN_CHARS", 0)
+    monkeypatch.setattr(lexer, "NUMPY_BLOCK_BYTES", 16)
+    text = (
+        "# 标题\n  # indented\n　# ideographic space\n\x1c\n   ```\n代码\n```\n\n"
+        "１. not a list\n1. list\n- [x] 完成\n| a | b |\n|---|---|\n> 引用\n"
+        "$$\nx\n$$\n***\n   \n[^1]: 脚注\nprose\n"
+    )
+    plain_lexer = lexer.Lexer()
+    plain_lexer.use_numpy = False
+    expected = plain_lexer(text)
+    assert_same_tokens(lexer.Lexer()(text), expected)
+    crlf_text = text.replace("\n", "\r\n")
+    assert_same_tokens(lexer.Lexer()(crlf_text), plain_lexer(crlf_text))
+    for line_break in ["\n", "\r\n", "\r"]:
+        data = text.replace("\n", line_break).encode("utf8")
+        assert_same_tokens(lexer.Lexer()(data), expected)
+    assert_same_tokens(lexer.Lexer()(""), plain_lexer(""))
+
+
+def test_numpy_lexer_tries_custom_patterns(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(lexer, "NUMPY_MIN_CHARS", 0)
+    monkeypatch.setattr(patterns, "header", re.compile(r"^=+ .+"))
+    tokens_ = lexer.Lexer()("= title\n# not a title")
+    assert isinstance(tokens_[0], tokens.Header)
+    assert not isinstance(tokens_[1], tokens.Header)
@@ -1,6 +1,7 @@
 import os
 from datetime import datetime
 
+import pytest
 from note_splitter import note
 
 
@@ -99,14 +100,14 @@ def test_create_id_with_time_and_title():
         assert char.isdigit()
 
 
-########################
-#  __create_file_name  #
-########################
+######################
+#  FileNameTemplate  #
+######################
 
 
 def test_create_14_digit_file_name():
-    file_name = note.__create_file_name(
-        ".md", r"%Y%M%D%h%m%s", r"%id", "", datetime.now()
+    file_name = note.FileNameTemplate(".md", r"%Y%M%D%h%m%s", r"%id").create(
+        "", datetime.now()
     )
     assert file_name.endswith(".md")
     assert len(file_name) == 17
@@ -115,8 +116,8 @@ def test_create_14_digit_file_name():
 
 
 def test_create_12_digit_text_file_name():
-    file_name = note.__create_file_name(
-        ".txt", r"%Y%M%D%h%m", r"%id", "", datetime.now()
+    file_name = note.FileNameTemplate(".txt", r"%Y%M%D%h%m", r"%id").create(
+        "", datetime.now()
     )
     assert len(file_name) == 16
     assert file_name.endswith(".txt")
@@ -125,24 +126,24 @@ def test_create_12_digit_text_file_name():
 
 
 def test_create_file_name_with_no_variables():
-    file_name = note.__create_file_name(
-        ".md", r"%Y%M%D%h%m%s", r"new file", "", datetime.now()
+    file_name = note.FileNameTemplate(".md", r"%Y%M%D%h%m%s", r"new file").create(
+        "", datetime.now()
     )
     assert file_name == "new file.md"
 
 
 def test_create_file_name_with_custom_format():
-    file_name = note.__create_file_name(
-        ".md", r"%Y%M%D%h%m%s", r"new_file %h:%m:%s", "", datetime.now()
-    )
+    file_name = note.FileNameTemplate(
+        ".md", r"%Y%M%D%h%m%s", r"new_file %h:%m:%s"
+    ).create("", datetime.now())
     assert file_name.startswith("new_file ")
     for char in file_name[10:-3]:
-        assert char.isdigit() or char == ":"
+        assert char.isdigit() or char == "-"
 
 
 def test_create_file_name_with_duplicate_variables():
-    file_name = note.__create_file_name(
-        ".markdown", r"%Y%M%D%h%m%s", r"%id %id", "", datetime.now()
+    file_name = note.FileNameTemplate(".markdown", r"%Y%M%D%h%m%s", r"%id %id").create(
+        "", datetime.now()
     )
     assert len(file_name) == 38
     assert file_name.endswith(".markdown")
@@ -150,19 +151,58 @@ def test_create_file_name_with_duplicate_variables():
 
 
 def test_create_file_name_from_title():
-    file_name = note.__create_file_name(
-        ".md", r"%Y%M%D%h%m%s", r"%title", "    my title        ", datetime.now()
+    file_name = note.FileNameTemplate(".md", r"%Y%M%D%h%m%s", r"%title").create(
+        "    my title        ", datetime.now()
     )
     assert file_name == "my title.md"
 
 
 def test_create_file_name_from_header():
-    file_name = note.__create_file_name(
-        ".md", r"%Y%M%D%h%m%s", r"%title", "first line\n# second line", datetime.now()
+    file_name = note.FileNameTemplate(".md", r"%Y%M%D%h%m%s", r"%title").create(
+        "first line\n# second line", datetime.now()
     )
     assert file_name == "second line.md"
 
 
+def test_template_matches_replacing_each_variable():
+    dt = datetime(2022, 3, 4, 5, 6, 7)
+    formats = [
+        r"%title",
+        r"%id %title",
+        r"%Y-%M-%D_%h:%m:%s",
+        r"%title%title",
+        r"100% %title",
+        r"%%Y",
+        r"%",
+    ]
+    contents = ["# a title", "# 50%Y of it", "first line\n## %M"]
+    for file_name_format in formats:
+        template = note.FileNameTemplate(".md", r"%Y%M%D%h%m%s", file_name_format)
+        for file_contents in contents:
+            file_id = note.create_file_id(r"%Y%M%D%h%m%s", file_contents, dt)
+            expected = note.create_file_id(file_name_format, file_contents, dt)
+            expected = expected.replace(r"%id", file_id) + ".md"
+            assert template.create(file_contents, dt) == note.validate_file_name(
+                expected
+            )
+
+
+###################
+#  file_contains  #
+###################
+
+
+@pytest.mark.parametrize("mmap_min_bytes", [1024 * 1024, 0])
+def test_file_contains(tmp_path, monkeypatch, mmap_min_bytes):
+    monkeypatch.setattr(note, "MMAP_MIN_BYTES", mmap_min_bytes)
+    file_path = tmp_path / "a.md"
+    file_path.write_bytes("# 标题 #split\r\nline".encode("utf8"))
+    assert note.file_contains(str(file_path), "#split")
+    assert note.file_contains(str(file_path), "标题")
+    assert not note.file_contains(str(file_path), "#spl1t")
+    assert note.file_contains(str(file_path), "#split\nline")
+
+
 #######################
 #  create_file_names  #
 #######################
@@ -214,6 +254,23 @@ def test_create_file_names_with_uuids():
     assert len(set(file_names)) == 3
 
 
+def test_create_file_names_with_known_titles():
+    file_names = note.create_file_names(
+        ".md", "", "%title", ["# one", "# two"], titles=["first", "second"]
+    )
+    assert file_names == ["first.md", "second.md"]
+
+
+def test_create_file_names_without_unused_variables(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("unused variable computed")
+
+    monkeypatch.setattr(note.uuid, "uuid4", fail)
+    monkeypatch.setattr(note, "get_title", fail)
+    file_names = note.create_file_names(".md", "%Y%M%D", "%id", ["# one", "# two"])
+    assert len(file_names) == 2
+
+
 ###############
 #  get_title  #
 ###############
@@ -361,10 +418,301 @@ def test_make_file_paths_absolute_with_two_paths():
     assert expected_result == note.make_file_paths_absolute(note_content, note_path)
 
 
-################################
-#  __change_all_links_to_file  #
-################################
+################
+#  move_files  #
+################
 
 
-def test___change_all_links_to_file():
-    pass
+def test_move_files_changes_links(tmp_path):
+    (tmp_path / "dest").mkdir()
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("b")
+    (tmp_path / "c.md").write_text("[a](a.md) [b](b.md) [a again](a.md)")
+    all_notes = note.create_notes([str(tmp_path / n) for n in ("a.md", "b.md", "c.md")])
+    note.move_files(
+        [str(tmp_path / "a.md"), str(tmp_path / "b.md")],
+        str(tmp_path / "dest"),
+        all_notes,
+        [".md"],
+    )
+    dest = (tmp_path / "dest").as_posix()
+    expected = f"[a]({dest}/a.md) [b]({dest}/b.md) [a again]({dest}/a.md)"
+    assert (tmp_path / "c.md").read_text() == expected
+    assert not (tmp_path / "a.md").exists()
+
+
+def test_move_files_makes_moved_note_links_absolute(tmp_path):
+    (tmp_path / "dest").mkdir()
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("[a](a.md)")
+    all_notes = note.create_notes([str(tmp_path / n) for n in ("a.md", "b.md")])
+    note.move_files(
+        [str(tmp_path / "b.md")], str(tmp_path / "dest"), all_notes, [".md"]
+    )
+    expected = f"[a]({tmp_path.as_posix()}/a.md)"
+    assert (tmp_path / "dest" / "b.md").read_text() == expected
+
+
+def test_move_files_between_linked_notes(tmp_path):
+    (tmp_path / "dest").mkdir()
+    (tmp_path / "a.md").write_text("[b](b.md)")
+    (tmp_path / "b.md").write_text("[a](a.md)")
+    all_notes = note.create_notes([str(tmp_path / n) for n in ("a.md", "b.md")])
+    note.move_files(
+        [str(tmp_path / "a.md"), str(tmp_path / "b.md")],
+        str(tmp_path / "dest"),
+        all_notes,
+        [".md"],
+    )
+    dest = (tmp_path / "dest").as_posix()
+    assert (tmp_path / "dest" / "a.md").read_text() == f"[b]({dest}/b.md)"
+    assert (tmp_path / "dest" / "b.md").read_text() == f"[a]({dest}/a.md)"
+
+
+###########################
+#  write_text_atomically  #
+###########################
+
+
+def test_write_text_atomically_leaves_other_files_alone(tmp_path):
+    (tmp_path / "a.md").write_text("old")
+    (tmp_path / "a.md.tmp").write_text("not temporary")
+    note.write_text_atomically(str(tmp_path / "a.md"), "new")
+    assert (tmp_path / "a.md").read_text() == "new"
+    assert (tmp_path / "a.md.tmp").read_text() == "not temporary"
+    assert sorted(os.listdir(tmp_path)) == ["a.md", "a.md.tmp"]
+
+
+def test_write_text_atomically_keeps_symbolic_links(tmp_path):
+    (tmp_path / "a.md").write_text("old")
+    try:
+        os.symlink(tmp_path / "a.md", tmp_path / "link.md")
+    except OSError:
+        pytest.skip("symbolic links are not supported")
+    note.write_text_atomically(str(tmp_path / "link.md"), "new")
+    assert os.path.islink(tmp_path / "link.md")
+    assert (tmp_path / "a.md").read_text() == "new"
+
+
+def test_write_text_atomically_deletes_the_temporary_file_after_errors(tmp_path):
+    (tmp_path / "a.md").write_text("old")
+    with pytest.raises(UnicodeEncodeError):
+        note.write_text_atomically(str(tmp_path / "a.md"), "\ud800")
+    assert os.listdir(tmp_path) == ["a.md"]
+    assert (tmp_path / "a.md").read_text() == "old"
+
+
+######################
+#  FileNameRegistry  #
+######################
+
+
+def test_registry_keeps_free_name(tmp_path):
+    registry = note.FileNameRegistry(str(tmp_path))
+    assert registry.reserve("a.md") == os.path.join(tmp_path, "a.md")
+
+
+def test_registry_matches_ensure_file_path_uniqueness(tmp_path):
+    for name in ("a.md", "a.1.md", "b.7.md"):
+        (tmp_path / name).write_text("")
+    registry = note.FileNameRegistry(str(tmp_path))
+    for name in ("a.md", "b.7.md", "c.md"):
+        expected = note.ensure_file_path_uniqueness(os.path.join(tmp_path, name))
+        assert registry.reserve(name) == expected
+
+
+def test_registry_remembers_reserved_names(tmp_path):
+    (tmp_path / "a.md").write_text("")
+    registry = note.FileNameRegistry(str(tmp_path))
+    names = [os.path.basename(registry.reserve("a.md")) for _ in range(4)]
+    assert names == ["a.1.md", "a.2.md", "a.3.md", "a.4.md"]
+    assert os.path.basename(registry.reserve("a.2.md")) == "a.5.md"
+
+
+def test_registry_create_file_retries_taken_names(tmp_path):
+    registry = note.FileNameRegistry(str(tmp_path))
+    (tmp_path / "a.md").write_text("created by another program")
+    file_path = registry.create_file("a.md", "new content")
+    assert file_path == os.path.join(tmp_path, "a.1.md")
+    assert (tmp_path / "a.md").read_text() == "created by another program"
+    with open(file_path, "r", encoding="utf8") as file:
+        assert file.read() == "new content"
+
+
+def test_move_files_only_writes_changed_notes(tmp_path):
+    (tmp_path / "dest").mkdir()
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("[a](a.md)")
+    (tmp_path / "c.md").write_text("no links")
+    os.utime(tmp_path / "c.md", ns=(0, 0))
+    all_notes = note.create_notes([str(tmp_path / n) for n in ("a.md", "b.md", "c.md")])
+    changes = note.move_files(
+        [str(tmp_path / "a.md")], str(tmp_path / "dest"), all_notes, [".md"]
+    )
+    assert list(changes) == [(tmp_path / "b.md").as_posix()]
+    assert os.stat(tmp_path / "c.md").st_mtime_ns == 0
+
+
+def test_move_files_dry_run(tmp_path):
+    (tmp_path / "dest").mkdir()
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("[a](a.md)")
+    all_notes = note.create_notes([str(tmp_path / n) for n in ("a.md", "b.md")])
+    link_index = note.LinkIndex(all_notes)
+    changes = note.move_files(
+        [str(tmp_path / "a.md")],
+        str(tmp_path / "dest"),
+        all_notes,
+        [".md"],
+        link_index,
+        dry_run=True,
+    )
+    new_a_path = (tmp_path / "dest" / "a.md").as_posix()
+    assert changes == {(tmp_path / "b.md").as_posix(): f"[a]({new_a_path})"}
+    assert (tmp_path / "a.md").exists()
+    assert (tmp_path / "b.md").read_text() == "[a](a.md)"
+    assert link_index.get_links_to(str(tmp_path / "a.md")) == {
+        (tmp_path / "b.md").as_posix(): {"a.md"}
+    }
+
+
+def test_move_files_moves_files_back_after_error(tmp_path):
+    (tmp_path / "dest").mkdir()
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("[a](a.md)")
+    all_notes = note.create_notes([str(tmp_path / n) for n in ("a.md", "b.md")])
+    with pytest.raises(OSError):
+        note.move_files(
+            [str(tmp_path / "a.md"), str(tmp_path / "missing.txt")],
+            str(tmp_path / "dest"),
+            all_notes,
+            [".md"],
+        )
+    assert (tmp_path / "a.md").exists()
+    assert not (tmp_path / "dest" / "a.md").exists()
+    assert (tmp_path / "b.md").read_text() == "[a](a.md)"
+
+
+def test_move_files_rejects_files_with_the_same_name(tmp_path):
+    (tmp_path / "dest").mkdir()
+    (tmp_path / "x").mkdir()
+    (tmp_path / "y").mkdir()
+    (tmp_path / "x" / "a.md").write_text("x")
+    (tmp_path / "y" / "a.md").write_text("y")
+    paths = [str(tmp_path / "x" / "a.md"), str(tmp_path / "y" / "a.md")]
+    with pytest.raises(ValueError):
+        note.move_files(
+            paths, str(tmp_path / "dest"), note.create_notes(paths), [".md"]
+        )
+    assert (tmp_path / "x" / "a.md").read_text() == "x"
+    assert (tmp_path / "y" / "a.md").read_text() == "y"
+    assert not os.listdir(tmp_path / "dest")
+
+
+###############
+#  PathCache  #
+###############
+
+
+def test_path_cache_remembers_files(tmp_path):
+    (tmp_path / "a.md").write_text("a")
+    path_cache = note.PathCache()
+    key = path_cache.get_key(str(tmp_path / "a.md"))
+    assert key == (os.stat(tmp_path / "a.md").st_dev, os.stat(tmp_path / "a.md").st_ino)
+    assert not path_cache.exists(str(tmp_path / "b.md"))
+    (tmp_path / "b.md").write_text("b")
+    assert not path_cache.exists(str(tmp_path / "b.md"))
+    path_cache.invalidate(str(tmp_path / "b.md"))
+    assert path_cache.exists(str(tmp_path / "b.md"))
+    assert len(path_cache) == 2
+
+
+def test_path_cache_is_invalidated_by_moves(tmp_path):
+    (tmp_path / "dest").mkdir()
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("[a](a.md)")
+    all_notes = note.create_notes([str(tmp_path / n) for n in ("a.md", "b.md")])
+    link_index = note.LinkIndex(all_notes)
+    note.move_files(
+        [str(tmp_path / "a.md")], str(tmp_path / "dest"), all_notes, [".md"], link_index
+    )
+    assert not link_index.path_cache.exists(str(tmp_path / "a.md"))
+    assert link_index.path_cache.exists(str(tmp_path / "dest" / "a.md"))
+
+
+###############
+#  LinkIndex  #
+###############
+
+
+def test_link_index_gets_links_to_file(tmp_path):
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("[a](a.md) [a](./a.md)")
+    (tmp_path / "c.md").write_text("[missing](missing.md)")
+    all_notes = note.create_notes([str(tmp_path / n) for n in ("a.md", "b.md", "c.md")])
+    link_index = note.LinkIndex(all_notes)
+    assert link_index.get_links_to(str(tmp_path / "a.md")) == {
+        (tmp_path / "b.md").as_posix(): {"a.md", "./a.md"}
+    }
+    assert link_index.get_links_to(str(tmp_path / "b.md")) == {}
+    (tmp_path / "dest").mkdir()
+    note.move_files(
+        [str(tmp_path / "a.md")], str(tmp_path / "dest"), all_notes, [".md"], link_index
+    )
+    new_a_path = (tmp_path / "dest" / "a.md").as_posix()
+    assert (tmp_path / "b.md").read_text() == f"[a]({new_a_path}) [a]({new_a_path})"
+
+
+def test_link_index_records_moves(tmp_path):
+    (tmp_path / "dest").mkdir()
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("[a](a.md)")
+    all_notes = note.create_notes([str(tmp_path / n) for n in ("a.md", "b.md")])
+    link_index = note.LinkIndex(all_notes)
+    note.move_files(
+        [str(tmp_path / "a.md")], str(tmp_path / "dest"), all_notes, [".md"], link_index
+    )
+    note.move_files(
+        [str(tmp_path / "b.md")], str(tmp_path / "dest"), all_notes, [".md"], link_index
+    )
+    new_a_path = (tmp_path / "dest" / "a.md").as_posix()
+    assert link_index.get_links_to(new_a_path) == {
+        (tmp_path / "dest" / "b.md").as_posix(): {new_a_path}
+    }
+    note.move_files([new_a_path], str(tmp_path), all_notes, [".md"], link_index)
+    expected = f"[a]({tmp_path.as_posix()}/a.md)"
+    assert (tmp_path / "dest" / "b.md").read_text() == expected
+
+
+def test_link_index_removes_notes(tmp_path):
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("[a](a.md)")
+    all_notes = note.create_notes([str(tmp_path / n) for n in ("a.md", "b.md")])
+    link_index = note.LinkIndex(all_notes)
+    link_index.remove_note(str(tmp_path / "b.md"))
+    assert link_index.get_links_to(str(tmp_path / "a.md")) == {}
+
+
+##########
+#  Note  #
+##########
+
+
+def test_note_reads_title_when_needed(tmp_path):
+    file_path = tmp_path / "a.md"
+    file_path.write_text("# first title\n")
+    note_ = note.Note(str(file_path))
+    file_path.write_text("# second title\n")
+    assert note_.title == "second title"
+    file_path.write_text("# third title\n")
+    assert note_.title == "second title"
+    assert note.Note(str(tmp_path / "missing.md"), title="given").title == "given"
+
+
+def test_note_reads_tags_and_title_at_once(tmp_path):
+    file_path = tmp_path / "a.md"
+    file_path.write_text("# title\n#first text #second #first\n")
+    note_ = note.Note(str(file_path))
+    assert note_.known_title is None
+    assert note_.tags == ["#first", "#second"]
+    assert note_.known_title == "title"
@@ -0,0 +1,57 @@
+import os
+
+from note_splitter.note import FileNameRegistry
+from note_splitter.output_writer import OutputWriter
+
+
+def test_create_file(tmp_path):
+    writer = OutputWriter(FileNameRegistry(str(tmp_path)))
+    file_path = writer.create_file("a.md", "content")
+    assert file_path == os.path.join(tmp_path, "a.md")
+    assert (tmp_path / "a.md").read_text() == "content"
+    assert os.listdir(tmp_path) == ["a.md"]
+    assert writer.files_written == 1
+    assert writer.bytes_written == len("content")
+
+
+def test_create_file_does_not_replace_files(tmp_path):
+    writer = OutputWriter(FileNameRegistry(str(tmp_path)))
+    (tmp_path / "a.md").write_text("created by another program")
+    file_path = writer.create_file("a.md", "new content")
+    assert file_path == os.path.join(tmp_path, "a.1.md")
+    assert (tmp_path / "a.md").read_text() == "created by another program"
+    assert (tmp_path / "a.1.md").read_text() == "new content"
+    assert sorted(os.listdir(tmp_path)) == ["a.1.md", "a.md"]
+
+
+def test_create_file_at_taken_path(tmp_path):
+    writer = OutputWriter(FileNameRegistry(str(tmp_path)))
+    file_path = writer.registry.reserve("a.md")
+    (tmp_path / "a.md").write_text("created by another program")
+    new_file_path = writer.create_file_at(file_path, "new content")
+    assert new_file_path == os.path.join(tmp_path, "a.1.md")
+    assert (tmp_path / "a.1.md").read_text() == "new content"
+
+
+def test_replace_file_with_sync(tmp_path):
+    writer = OutputWriter(FileNameRegistry(str(tmp_path)), sync=True)
+    file_path = writer.create_file("a.md", "old content")
+    writer.replace_file(file_path, "new content")
+    writer.close()
+    assert (tmp_path / "a.md").read_text() == "new content"
+    assert os.listdir(tmp_path) == ["a.md"]
+    assert writer.files_written == 2
+    assert "Wrote 2 files" in writer.summary()
+
+
+def test_dry_run_writes_nothing(tmp_path):
+    (tmp_path / "a.md").write_text("existing")
+    writer = OutputWriter(FileNameRegistry(str(tmp_path)), dry_run=True)
+    file_path = writer.create_file("a.md", "new content")
+    index_path = writer.create_file_at(writer.registry.reserve("b.md"), "index")
+    writer.close()
+    assert file_path == os.path.join(tmp_path, "a.1.md")
+    assert writer.planned_file_paths == [file_path, index_path]
+    assert writer.files_written == 2
+    assert writer.bytes_written == len("new content") + len("index")
+    assert os.listdir(tmp_path) == ["a.md"]
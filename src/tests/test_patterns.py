@@ -0,0 +1,79 @@
+import itertools
+import random
+import re
+
+import pytest
+from note_splitter import patterns
+
+
+###################
+#  table_divider  #
+###################
+
+
+def test_table_divider_matches_the_same_lines_as_before():
+    old_table_divider = re.compile(r"^\|?(?: *[-:]{3,} *\|?)+$")
+    for length in range(9):
+        for characters in itertools.product(" -:|x", repeat=length):
+            line = "".join(characters)
+            assert bool(patterns.table_divider.match(line)) == bool(
+                old_table_divider.match(line)
+            ), line
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "-" * 100_000 + "x",
+        ":" * 100_000 + "|x",
+        "--- " * 25_000 + "x",
+        "| --- " * 20_000 + "x",
+    ],
+    ids=["minuses", "colons", "spaced minuses", "cells"],
+)
+def test_table_divider_does_not_backtrack_catastrophically(line):
+    assert not patterns.table_divider.match(line)
+
+
+#######################
+#  file_path_in_link  #
+#######################
+
+
+def test_file_path_in_link_finds_the_same_paths_as_the_regex():
+    regex = re.compile(patterns.file_path_in_link.pattern)
+    parts = ["](", "(", ")", ")`", ".", "/", "\\", "|", "\n", " ", "a", "md"]
+    parts += ["https://", "www.", "mailto:", "[x](a.md)", ".md)", "é"]
+    rng = random.Random(0)
+    for _ in range(20_000):
+        text = "".join(rng.choices(parts, k=rng.randint(0, 16)))
+        assert patterns.file_path_in_link.findall(text) == regex.findall(text), text
+
+
+def test_file_path_in_link_finds_paths():
+    text = (
+        "[a](a.md) [b](folder/b.txt) [c](https://example.com/c.html)"
+        " [d](C:\\notes\\d.md) `[e](e.md)`"
+    )
+    assert [t[0] for t in patterns.file_path_in_link.findall(text)] == [
+        "a.md",
+        "folder/b.txt",
+        "C:\\notes\\d.md",
+    ]
+    assert patterns.file_path_in_link.findall("[a](folder/a.md)") == [
+        ("folder/a.md", "a.md", ".md")
+    ]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "](" * 50_000,
+        "](" + "a." * 50_000,
+        "](:." * 25_000,
+        "](a" * 30_000 + "\nb/c.md)",
+    ],
+    ids=["link starts", "periods", "link starts and periods", "line break"],
+)
+def test_file_path_in_link_does_not_backtrack_catastrophically(text):
+    patterns.file_path_in_link.findall(text)
@@ -0,0 +1,457 @@
+import os
+from textwrap import dedent
+
+import pytest
+from note_splitter import pipeline
+from note_splitter.journal import FolderLockedError
+from note_splitter.journal import JOURNAL_FILE_NAME
+from note_splitter.journal import LOCK_FILE_NAME
+from note_splitter.journal import SplitLock
+from note_splitter.manifest import MANIFEST_FILE_NAME
+from note_splitter.note import create_notes
+from note_splitter.plan import SplitPlan
+from note_splitter.split_cache import SplitCache
+
+
+def write_file(folder_path: str, file_name: str, content: str) -> str:
+    file_path = os.path.join(folder_path, file_name)
+    with open(file_path, "w", encoding="utf8") as file:
+        file.write(content)
+    return file_path
+
+
+SOURCE = dedent(
+    """\
+    # source
+    #split
+
+    ## first
+
+    first text
+
+    ## second
+
+    second text
+    """
+)
+
+
+#################
+#  split_files  #
+#################
+
+
+def test_split_files(tmp_path, split_config):
+    source_path = write_file(str(tmp_path), "source.md", SOURCE)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    notes = create_notes([source_path])
+    progress_values: list[int] = []
+    new_notes = pipeline.split_files(
+        notes,
+        split_config(destination_folder_path=str(destination)),
+        progress_values.append,
+    )
+    assert sorted(n.title for n in new_notes) == ["first", "second"]
+    assert len(os.listdir(destination)) == 2
+    assert progress_values == sorted(progress_values)
+    assert progress_values[-1] <= 100
+
+
+@pytest.mark.parametrize("io_concurrency", [1, 3])
+def test_split_files_reads_any_line_breaks(tmp_path, split_config, io_concurrency):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    config = split_config(
+        destination_folder_path=str(destination), io_concurrency=io_concurrency
+    )
+    source_path = tmp_path / "source.md"
+    contents = []
+    for line_break in ["\n", "\r\n", "\r"]:
+        source_path.write_bytes(SOURCE.replace("\n", line_break).encode("utf8"))
+        new_notes = pipeline.split_files(create_notes([str(source_path)]), config)
+        contents.append([read_file(n.path) for n in new_notes])
+    assert contents[1] == contents[0]
+    assert contents[2] == contents[0]
+
+
+def test_split_files_with_index_and_backlinks(tmp_path, split_config):
+    source_path = write_file(str(tmp_path), "source.md", SOURCE)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    config = split_config(
+        destination_folder_path=str(destination),
+        create_index_file=True,
+        create_backlinks=True,
+    )
+    new_notes = pipeline.split_files(create_notes([source_path]), config)
+    assert len(new_notes) == 3
+    index_note = new_notes[-1]
+    assert index_note.name.startswith("index - ")
+    with open(index_note.path, "r", encoding="utf8") as file:
+        index_content = file.read()
+    for new_note in new_notes[:-1]:
+        assert f"* [{new_note.title}]({new_note.path})" in index_content
+        with open(new_note.path, "r", encoding="utf8") as file:
+            content = file.read()
+        assert content.endswith(f"[Backlink: {index_note.title}]({index_note.path})\n")
+    assert len(os.listdir(destination)) == 3
+
+
+def test_split_files_with_backlinks_to_source(tmp_path, split_config):
+    source_path = write_file(str(tmp_path), "source.md", SOURCE)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    config = split_config(
+        destination_folder_path=str(destination), create_backlinks=True
+    )
+    new_notes = pipeline.split_files(create_notes([source_path]), config)
+    assert [n.title for n in new_notes] == ["first", "second"]
+    for new_note in new_notes:
+        with open(new_note.path, "r", encoding="utf8") as file:
+            content = file.read()
+        assert content.endswith(f"[Backlink: source]({source_path})\n")
+
+
+def test_split_files_async_matches_split_files(tmp_path, split_config):
+    source_paths = [
+        write_file(str(tmp_path), f"source{i}.md", SOURCE.replace("first", f"#{i}"))
+        for i in range(5)
+    ]
+    serial_destination = tmp_path / "serial"
+    serial_destination.mkdir()
+    concurrent_destination = tmp_path / "concurrent"
+    concurrent_destination.mkdir()
+    serial_notes = pipeline.split_files(
+        create_notes(source_paths),
+        split_config(
+            destination_folder_path=str(serial_destination), create_index_file=True
+        ),
+    )
+    concurrent_notes = pipeline.split_files(
+        create_notes(source_paths),
+        split_config(
+            destination_folder_path=str(concurrent_destination),
+            create_index_file=True,
+            io_concurrency=3,
+        ),
+    )
+    assert [n.title for n in concurrent_notes] == [n.title for n in serial_notes]
+    assert len(os.listdir(concurrent_destination)) == 15
+
+
+################
+#  plan_split  #
+################
+
+
+def test_plan_split_writes_nothing(tmp_path, split_config):
+    source_path = write_file(str(tmp_path), "source.md", SOURCE + "[a](a.md)\n")
+    write_file(str(tmp_path), "a.md", "a")
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    config = split_config(
+        destination_folder_path=str(destination),
+        create_index_file=True,
+        create_backlinks=True,
+    )
+    plan = pipeline.plan_split(create_notes([source_path]), config)
+    assert os.listdir(destination) == []
+    assert len(plan.file_paths) == 3
+    assert plan.file_paths[-1].startswith(os.path.join(destination, "index - "))
+    assert plan.sources[0].split_contents[1].startswith("# second")
+    assert plan.total_bytes > len(SOURCE)
+    assert plan.link_rewrite_count == 0  # The link is relative to the source folder.
+    assert plan.estimated_seconds > 0
+
+
+def test_execute_plan_matches_split_files(tmp_path, split_config):
+    source_path = write_file(str(tmp_path), "source.md", SOURCE)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    config = split_config(
+        destination_folder_path=str(destination),
+        create_index_file=True,
+        create_backlinks=True,
+    )
+    plan = pipeline.plan_split(create_notes([source_path]), config)
+    plan_path = str(tmp_path / "plan.json")
+    plan.save(plan_path)
+    new_notes = pipeline.execute_plan(SplitPlan.load(plan_path))
+    assert [n.path for n in new_notes] == plan.file_paths
+    assert sum(os.path.getsize(n.path) for n in new_notes) == plan.total_bytes
+    assert not os.path.exists(os.path.join(destination, JOURNAL_FILE_NAME))
+
+
+def test_execute_plan_resplits_changed_sources(tmp_path, split_config):
+    source_path = write_file(str(tmp_path), "source.md", SOURCE)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    plan = pipeline.plan_split(
+        create_notes([source_path]),
+        split_config(destination_folder_path=str(destination)),
+    )
+    write_file(str(tmp_path), "source.md", SOURCE + "\n## third\n")
+    new_notes = pipeline.execute_plan(plan)
+    assert [n.title for n in new_notes] == ["first", "second", "third"]
+
+
+def test_execute_plan_does_not_split_unchanged_sources(
+    tmp_path, monkeypatch, split_config
+):
+    source_path = write_file(str(tmp_path), "source.md", SOURCE)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    plan = pipeline.plan_split(
+        create_notes([source_path]),
+        split_config(destination_folder_path=str(destination)),
+    )
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the source file was split again")
+
+    monkeypatch.setattr(pipeline, "split_text", fail)
+    monkeypatch.setattr(pipeline, "create_file_names", fail)
+    new_notes = pipeline.execute_plan(plan)
+    assert [n.title for n in new_notes] == ["first", "second"]
+
+
+#############################
+#  find_notes_with_keyword  #
+#############################
+
+
+def test_find_notes_with_keyword(tmp_path):
+    write_file(str(tmp_path), "a.md", "# a\n#split\n")
+    write_file(str(tmp_path), "b.md", "# b\n")
+    notes = pipeline.get_notes_in_folder(str(tmp_path))
+    assert len(notes) == 2
+    chosen_notes = pipeline.find_notes_with_keyword("#split", notes)
+    assert [n.name for n in chosen_notes] == ["a.md"]
+
+
+def test_split_files_reuses_cached_results(tmp_path, monkeypatch, split_config):
+    source_path = write_file(str(tmp_path), "source.md", SOURCE)
+    cache = SplitCache(str(tmp_path / "cache"))
+    first_destination = tmp_path / "first"
+    first_destination.mkdir()
+    notes = create_notes([source_path])
+    first_notes = pipeline.split_files(
+        notes, split_config(destination_folder_path=str(first_destination)), cache=cache
+    )
+    assert len(cache) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("split_text should not be called")
+
+    monkeypatch.setattr(pipeline, "split_text", fail)
+    second_destination = tmp_path / "second"
+    second_destination.mkdir()
+    second_notes = pipeline.split_files(
+        notes,
+        split_config(destination_folder_path=str(second_destination)),
+        cache=cache,
+    )
+    assert [n.title for n in second_notes] == [n.title for n in first_notes]
+
+
+##################
+#  resplit_note  #
+##################
+
+
+def read_file(file_path: str) -> str:
+    with open(file_path, "r", encoding="utf8") as file:
+        return file.read()
+
+
+def test_incremental_split_reuses_files(tmp_path, split_config):
+    source_path = write_file(str(tmp_path), "source.md", SOURCE)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    config = split_config(
+        destination_folder_path=str(destination),
+        incremental_split=True,
+        create_index_file=True,
+        create_backlinks=True,
+    )
+    notes = create_notes([source_path])
+    first_notes = pipeline.split_files(notes, config)
+    assert len(first_notes) == 3
+    first_files = sorted(os.listdir(destination))
+    assert MANIFEST_FILE_NAME in first_files
+
+    assert pipeline.split_files(notes, config) == []
+    assert sorted(os.listdir(destination)) == first_files
+
+
+def test_incremental_split_updates_backlinks(tmp_path, split_config):
+    source_path = write_file(str(tmp_path), "source.md", SOURCE)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    config = split_config(
+        destination_folder_path=str(destination),
+        incremental_split=True,
+        create_backlinks=True,
+    )
+    notes = create_notes([source_path])
+    section_paths = [n.path for n in pipeline.split_files(notes, config)]
+    assert "[Backlink: source]" in read_file(section_paths[0])
+
+    config.create_index_file = True
+    new_notes = pipeline.split_files(notes, config)
+    assert [n.path for n in new_notes[:-1]] == section_paths
+    index_path = new_notes[-1].path
+    for section_path in section_paths:
+        assert f"[Backlink: index of source]({index_path})" in read_file(section_path)
+
+    config.create_backlinks = False
+    assert len(pipeline.split_files(notes, config)) == len(section_paths)
+    for section_path in section_paths:
+        assert "Backlink" not in read_file(section_path)
+
+
+def test_incremental_split_rewrites_changed_and_deletes_removed(tmp_path, split_config):
+    source_path = write_file(str(tmp_path), "source.md", SOURCE)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    config = split_config(
+        destination_folder_path=str(destination), incremental_split=True
+    )
+    first_notes = pipeline.split_files(create_notes([source_path]), config)
+    paths = {n.title: n.path for n in first_notes}
+
+    write_file(
+        str(tmp_path),
+        "source.md",
+        SOURCE.replace("## first\n\nfirst text\n\n", "").replace(
+            "second text", "changed text"
+        ),
+    )
+    second_notes = pipeline.split_files(create_notes([source_path]), config)
+    assert [n.path for n in second_notes] == [paths["second"]]
+    assert "changed text" in read_file(paths["second"])
+    assert not os.path.exists(paths["first"])
+
+
+def test_incremental_split_leaves_edited_files_alone(tmp_path, split_config):
+    source_path = write_file(str(tmp_path), "source.md", SOURCE)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    config = split_config(
+        destination_folder_path=str(destination), incremental_split=True
+    )
+    first_notes = pipeline.split_files(create_notes([source_path]), config)
+    edited_path = first_notes[0].path
+    with open(edited_path, "a", encoding="utf8") as file:
+        file.write("\nmy own edit\n")
+
+    write_file(str(tmp_path), "source.md", SOURCE.replace("first text", "new text"))
+    second_notes = pipeline.split_files(create_notes([source_path]), config)
+    assert len(second_notes) == 1
+    assert second_notes[0].path != edited_path
+    assert "my own edit" in read_file(edited_path)
+    assert "new text" in read_file(second_notes[0].path)
+
+
+#############
+#  journal  #
+#############
+
+
+def split_with_error(tmp_path, monkeypatch, split_config) -> tuple[list[str], str]:
+    source_paths = [
+        write_file(str(tmp_path), f"source{i}.md", SOURCE.replace("first", f"#{i}"))
+        for i in range(3)
+    ]
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    split_text = pipeline.split_text
+    calls = 0
+
+    def split_text_with_error(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise OSError("disk full")
+        return split_text(*args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "split_text", split_text_with_error)
+    config = split_config(
+        destination_folder_path=str(destination), create_index_file=True
+    )
+    with pytest.raises(OSError):
+        pipeline.split_files(create_notes(source_paths), config)
+    monkeypatch.setattr(pipeline, "split_text", split_text)
+    return source_paths, str(destination)
+
+
+def test_resume_unfinished_split(tmp_path, monkeypatch, split_config):
+    source_paths, destination = split_with_error(tmp_path, monkeypatch, split_config)
+    assert JOURNAL_FILE_NAME in os.listdir(destination)
+    assert len(os.listdir(destination)) == 7
+
+    new_notes = pipeline.split_files(
+        create_notes(source_paths),
+        split_config(destination_folder_path=destination, create_index_file=True),
+    )
+    assert len(new_notes) == 9
+    assert sorted(os.listdir(destination)) == sorted(n.name for n in new_notes)
+
+
+@pytest.mark.parametrize("io_concurrency", [1, 3])
+def test_resume_unfinished_split_after_a_finished_file_changed(
+    tmp_path, monkeypatch, split_config, io_concurrency
+):
+    source_paths, destination = split_with_error(tmp_path, monkeypatch, split_config)
+    write_file(str(tmp_path), "source0.md", SOURCE.replace("first", "changed"))
+    new_notes = pipeline.split_files(
+        create_notes(source_paths),
+        split_config(
+            destination_folder_path=destination,
+            create_index_file=True,
+            io_concurrency=io_concurrency,
+        ),
+    )
+    assert len(new_notes) == 9
+    assert sorted(os.listdir(destination)) == sorted(n.name for n in new_notes)
+    assert [n.title for n in new_notes][:3] == ["changed", "second", "index of source"]
+
+
+def test_resume_unfinished_split_async_keeps_the_order(
+    tmp_path, monkeypatch, split_config
+):
+    source_paths, destination = split_with_error(tmp_path, monkeypatch, split_config)
+    reordered_paths = [source_paths[2], source_paths[0], source_paths[1]]
+    new_notes = pipeline.split_files(
+        create_notes(reordered_paths),
+        split_config(
+            destination_folder_path=destination,
+            create_index_file=True,
+            io_concurrency=3,
+        ),
+    )
+    assert [n.title for n in new_notes][:3] == ["#2", "second", "index of source"]
+
+
+def test_leave_the_journal_of_a_running_split_alone(
+    tmp_path, monkeypatch, split_config
+):
+    source_paths, destination = split_with_error(tmp_path, monkeypatch, split_config)
+    file_names = sorted(os.listdir(destination))
+    config = split_config(destination_folder_path=destination, create_index_file=True)
+    with SplitLock(str(destination)):
+        with pytest.raises(FolderLockedError):
+            pipeline.split_files(create_notes(source_paths), config, resume=False)
+        file_names.append(LOCK_FILE_NAME)
+        assert sorted(os.listdir(destination)) == sorted(file_names)
+
+
+def test_roll_back_unfinished_split(tmp_path, monkeypatch, split_config):
+    source_paths, destination = split_with_error(tmp_path, monkeypatch, split_config)
+    config = split_config(destination_folder_path=destination, create_index_file=True)
+    new_notes = pipeline.split_files(
+        create_notes(source_paths[2:]), config, resume=False
+    )
+    assert sorted(os.listdir(destination)) == sorted(n.name for n in new_notes)
+    assert len(new_notes) == 3
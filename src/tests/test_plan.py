@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from note_splitter.plan import DEFAULT_BYTES_PER_SECOND
+from note_splitter.plan import estimate_seconds
+from note_splitter.plan import load_latest_trace
+from note_splitter.plan import PlannedSource
+from note_splitter.plan import SplitPlan
+
+
+def write_trace(folder_path, file_name: str, seconds: float, bytes_: int, files: int):
+    trace = {
+        "started_at": "",
+        "stages": {"save": {"seconds": seconds, "calls": files}},
+        "counters": {"bytes_written": bytes_, "files_written": files},
+    }
+    (folder_path / file_name).write_text(json.dumps(trace))
+
+
+def test_save_and_load(tmp_path):
+    plan = SplitPlan(
+        {"destination_folder_path": str(tmp_path)},
+        [PlannedSource("/a.md", "hash", ["# a\n", "# b\n"], ["a.md", "b.md"])],
+        ["/dest/a.md", "/dest/b.md"],
+        total_bytes=8,
+        link_rewrite_count=1,
+        estimated_seconds=0.5,
+    )
+    plan.save(str(tmp_path / "plan.json"))
+    assert SplitPlan.load(str(tmp_path / "plan.json")) == plan
+    assert "2 new files" in plan.summary()
+
+
+def test_estimate_without_traces(tmp_path):
+    seconds = estimate_seconds(1.0, DEFAULT_BYTES_PER_SECOND, 0, str(tmp_path))
+    assert seconds == 2.0
+
+
+def test_estimate_uses_latest_trace(tmp_path):
+    write_trace(tmp_path, "trace 2026-01-01 00-00-00.json", 100.0, 1000, 10)
+    write_trace(tmp_path, "trace 2026-01-02 00-00-00.json", 1.0, 1000, 10)
+    assert load_latest_trace(str(tmp_path))["stages"]["save"]["seconds"] == 1.0
+    assert estimate_seconds(0.0, 1000, 10, str(tmp_path)) == pytest.approx(1.0)
+    assert estimate_seconds(0.0, 2000, 20, str(tmp_path)) == pytest.approx(2.0)
+
+
+def test_load_latest_trace_without_folder(tmp_path):
+    assert load_latest_trace(str(tmp_path / "missing")) is None
@@ -0,0 +1,54 @@
+from note_splitter import pipeline
+from note_splitter import tokens
+from note_splitter.formatter_ import Formatter
+from note_splitter.lexer import Lexer
+from note_splitter.preview import format_preview
+from note_splitter.preview import SplitPreview
+from note_splitter.splitter import Splitter
+
+
+def split_text(text: str, config: pipeline.SplitConfig) -> list[str]:
+    return pipeline.split_text(
+        text,
+        Lexer(),
+        Splitter(),
+        Formatter(),
+        config.split_type,
+        config.split_attrs,
+        config.using_split_keyword,
+        config.remove_split_keyword,
+        config.split_keyword,
+        config.parse_blocks,
+        config.copy_global_tags,
+        config.copy_frontmatter,
+        config.move_footnotes,
+    )
+
+
+def test_preview_matches_split_text(split_config):
+    text = (
+        "# title #tag\n#split\n\n## first\n\n- item\n- item\n\n### sub\n\n"
+        "```\n## not a header\n```\n\n## second\n\n| a |\n| --- |\n"
+    )
+    changes = {"using_split_keyword": True, "copy_global_tags": True}
+    configs = [
+        split_config(**changes),
+        split_config(**changes, split_attrs={"level": 3}),
+        split_config(**changes, split_type=tokens.TextList, split_attrs={}),
+        split_config(**changes, parse_blocks=False),
+        split_config(**changes),
+    ]
+    preview = SplitPreview()
+    for config in configs:
+        assert preview(text, config) == split_text(text, config)
+    edited_text = text.replace("```\n## not", "## now a header\n## not")
+    assert preview(edited_text, configs[0]) == split_text(edited_text, configs[0])
+    assert preview.lexer.lexed_line_count == 1
+
+
+def test_format_preview():
+    assert format_preview([]) == "This file would not be split."
+    assert format_preview(["a", "b", "c"], max_sections=2) == (
+        "----- section 1 of 3 -----\na\n----- section 2 of 3 -----\nb\n"
+        "----- and 1 more sections -----"
+    )
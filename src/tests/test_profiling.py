@@ -0,0 +1,53 @@
+import os
+import pstats
+
+import pytest
+from note_splitter import profiling
+
+
+def busy_work() -> int:
+    return sum(len(str(i)) for i in range(20_000))
+
+
+def test_profile_run_does_nothing_when_disabled(tmp_path):
+    assert not profiling.enabled()
+    with profiling.profile_run("split"):
+        busy_work()
+    assert os.listdir(tmp_path) == []
+
+
+def test_profiler_saves_cprofile_and_memory_reports(tmp_path):
+    profiler = profiling.enable_profiling(str(tmp_path))
+    try:
+        assert profiling.enabled()
+        with profiling.profile_run("split"):
+            busy_work()
+    finally:
+        assert profiling.disable_profiling() is profiler
+    assert len(profiler.report_paths) == 2
+    prof_path, memory_path = profiler.report_paths
+    assert prof_path.endswith(".prof")
+    function_names = {key[2] for key in pstats.Stats(prof_path).stats}  # type: ignore
+    assert "busy_work" in function_names
+    with open(memory_path, "r", encoding="utf8") as file:
+        assert file.read().startswith("peak traced memory: ")
+
+
+def test_profiler_sampling(tmp_path):
+    profiler = profiling.Profiler(str(tmp_path), 0.001, trace_memory=False)
+    with profiler.run("split"):
+        for _ in range(20):
+            busy_work()
+    assert len(profiler.report_paths) == 1
+    assert profiler.report_paths[0].endswith(" samples.txt")
+    with open(profiler.report_paths[0], "r", encoding="utf8") as file:
+        lines = file.read().splitlines()
+    assert lines
+    assert any("busy_work" in line for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) >= 1
+
+
+def test_profiler_rejects_invalid_interval(tmp_path):
+    with pytest.raises(ValueError):
+        profiling.Profiler(str(tmp_path), 0)
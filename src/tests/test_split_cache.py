@@ -0,0 +1,102 @@
+import os
+
+from note_splitter import patterns
+from note_splitter import split_cache
+from note_splitter import tokens
+
+
+def create_key(content: str, **kwargs) -> str:
+    arguments = {
+        "split_type": tokens.Header,
+        "split_attrs": {"level": 2},
+        "using_split_keyword": True,
+        "remove_split_keyword": False,
+        "split_keyword": "#split",
+        "parse_blocks": True,
+        "copy_global_tags": True,
+        "copy_frontmatter": True,
+        "move_footnotes": True,
+    }
+    arguments.update(kwargs)
+    return split_cache.create_key(content, **arguments)
+
+
+################
+#  create_key  #
+################
+
+
+def test_same_arguments_create_same_key():
+    assert create_key("# a") == create_key("# a")
+
+
+def test_content_changes_key():
+    assert create_key("# a") != create_key("# b")
+
+
+def test_settings_change_key():
+    key = create_key("# a")
+    assert key != create_key("# a", split_attrs={"level": 3})
+    assert key != create_key("# a", split_type=tokens.HorizontalRule)
+    assert key != create_key("# a", copy_global_tags=False)
+
+
+def test_patterns_change_key(monkeypatch):
+    key = create_key("# a")
+    monkeypatch.setattr(patterns, "header", patterns.re.compile(r"^#{1,6} .+"))
+    assert key != create_key("# a")
+
+
+################
+#  SplitCache  #
+################
+
+
+def test_get_missing_result(tmp_path):
+    cache = split_cache.SplitCache(str(tmp_path))
+    assert cache.get(create_key("# a")) is None
+
+
+def test_put_and_get_across_instances(tmp_path):
+    key = create_key("# a")
+    split_cache.SplitCache(str(tmp_path)).put(key, ["# a\n", "## b\n"])
+    cache = split_cache.SplitCache(str(tmp_path))
+    assert len(cache) == 1
+    assert cache.get(key) == ["# a\n", "## b\n"]
+
+
+def test_least_recently_used_result_is_evicted(tmp_path):
+    cache = split_cache.SplitCache(str(tmp_path), max_bytes=40)
+    cache.put("a", ["a" * 10])
+    cache.put("b", ["b" * 10])
+    assert cache.get("a") is not None
+    cache.put("c", ["c" * 10])
+    assert cache.get("b") is None
+    assert cache.get("a") == ["a" * 10]
+    assert cache.get("c") == ["c" * 10]
+    assert cache.total_bytes <= 40
+    assert sorted(os.listdir(tmp_path)) == ["a.json", "c.json"]
+
+
+def test_result_larger_than_cache_is_not_saved(tmp_path):
+    cache = split_cache.SplitCache(str(tmp_path), max_bytes=10)
+    cache.put("a", ["a" * 100])
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_corrupt_result_is_a_miss(tmp_path):
+    cache = split_cache.SplitCache(str(tmp_path))
+    cache.put("a", ["text"])
+    with open(os.path.join(tmp_path, "a.json"), "w", encoding="utf8") as file:
+        file.write("{not json")
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_clear(tmp_path):
+    cache = split_cache.SplitCache(str(tmp_path))
+    cache.put("a", ["text"])
+    cache.clear()
+    assert len(cache) == 0
+    assert os.listdir(tmp_path) == []
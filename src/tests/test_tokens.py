@@ -1,5 +1,7 @@
-from abc import ABC
+import re
 
+import pytest
+from note_splitter import patterns
 from note_splitter import tokens
 
 
@@ -15,21 +17,48 @@ def test__get_indentation_level():
     assert 16 == tokens._get_indentation_level("                ")
 
 
-#####################
-#  __is_token_type  #
-#####################
+#######################
+#  TokenTypeRegistry  #
+#######################
 
 
-def test___is_token_type():
-    assert tokens.__is_token_type(tokens.Blockquote)
+def test_registry_lookups():
+    type_id = tokens.registry.get_id(tokens.CodeFence)
+    assert tokens.registry.get_type_by_id(type_id) is tokens.CodeFence
+    assert tokens.registry.get_name(tokens.CodeFence) == "code fence"
+    assert tokens.registry.get_type("code fence") is tokens.CodeFence
+    with pytest.raises(ValueError):
+        tokens.registry.get_type("invalid")
 
 
-def test___is_token_type_with_string():
-    assert not tokens.__is_token_type("this isn't even a type")
+def test_registry_types_are_in_alphabetical_order():
+    names = [t.__name__ for t in tokens.registry.types]
+    assert names == sorted(names)
+    assert tokens.registry.names[names.index("CodeFence")] == "code fence"
 
 
-def test___is_token_type_with_type_that_is_not_a_token_type():
-    assert not tokens.__is_token_type(ABC)
+def test_registry_patterns_are_looked_up_by_name(monkeypatch):
+    replacement = re.compile(r"^@@@$")
+    monkeypatch.setattr(patterns, "code_fence", replacement)
+    bindings = dict(tokens.registry.get_patterns())
+    assert bindings[tokens.CodeFence] is replacement
+    assert tokens.Text not in bindings
+
+
+def test_register_token_type():
+    class Admonition(tokens.Line):
+        def __init__(self, line: str):
+            self._content = line
+
+    registry = tokens.TokenTypeRegistry()
+    registry.register(tokens.Text)
+    registry.register(Admonition, pattern=re.compile(r"^!!! "))
+    assert registry.types == [Admonition, tokens.Text]
+    assert registry.get_type("admonition") is Admonition
+    assert registry.get_id(Admonition) == 1
+    assert [t for t, _ in registry.get_patterns()] == [Admonition]
+    with pytest.raises(ValueError):
+        registry.register(tokens.Header, name="admonition")
 
 
 #########################
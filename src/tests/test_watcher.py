@@ -0,0 +1,105 @@
+import os
+
+from note_splitter.journal import SplitLock
+from note_splitter.watcher import KeywordWatcher
+from note_splitter.watcher import split_watched_files
+from note_splitter.watcher import watch
+
+
+def write_file(folder_path, file_name: str, content: str) -> str:
+    (folder_path / file_name).write_text(content)
+    return os.path.normpath(str(folder_path / file_name))
+
+
+def test_splits_files_that_gain_the_keyword(tmp_path):
+    existing = write_file(tmp_path, "existing.md", "no keyword")
+    watcher = KeywordWatcher(str(tmp_path), [".md"], "#split", debounce_seconds=1.0)
+    watcher.scan(now=0.0)
+    assert watcher.take_files_to_split(now=5.0) == []
+    write_file(tmp_path, "existing.md", "now with #split")
+    new = write_file(tmp_path, "new.md", "#split")
+    write_file(tmp_path, "new.txt", "#split")
+    watcher.scan(now=10.0)
+    assert watcher.pending_count == 2
+    assert watcher.take_files_to_split(now=10.5) == []
+    assert watcher.take_files_to_split(now=11.0) == [existing, new]
+    write_file(tmp_path, "existing.md", "still with #split")
+    watcher.scan(now=20.0)
+    assert watcher.take_files_to_split(now=30.0) == []
+
+
+def test_debounces_bursts_of_changes(tmp_path):
+    watcher = KeywordWatcher(str(tmp_path), [".md"], "#split", debounce_seconds=1.0)
+    file_path = write_file(tmp_path, "a.md", "#split draft")
+    watcher.scan(now=0.0)
+    write_file(tmp_path, "a.md", "#split draft, longer")
+    watcher.scan(now=0.8)
+    assert watcher.take_files_to_split(now=1.5) == []
+    assert watcher.take_files_to_split(now=1.8) == [file_path]
+
+
+def test_resplits_changed_files(tmp_path):
+    watcher = KeywordWatcher(
+        str(tmp_path), [".md"], "#split", debounce_seconds=0.0, resplit_changed=True
+    )
+    file_path = write_file(tmp_path, "a.md", "#split")
+    watcher.scan(now=0.0)
+    assert watcher.take_files_to_split(now=0.0) == [file_path]
+    write_file(tmp_path, "a.md", "#split changed")
+    watcher.scan(now=1.0)
+    assert watcher.take_files_to_split(now=1.0) == [file_path]
+
+
+def test_ignores_files_written_by_splits(tmp_path):
+    watcher = KeywordWatcher(str(tmp_path), [".md"], "#split", debounce_seconds=0.0)
+    new_file_path = write_file(tmp_path, "section.md", "#split section")
+    watcher.ignore([new_file_path, str(tmp_path.parent / "elsewhere.md")])
+    watcher.scan(now=0.0)
+    assert watcher.pending_count == 0
+    os.remove(new_file_path)
+    watcher.scan(now=1.0)
+    assert watcher.take_files_to_split(now=1.0) == []
+
+
+def test_retries_files_while_the_destination_is_locked(tmp_path, split_config):
+    source = tmp_path / "source"
+    source.mkdir()
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    config = split_config(
+        using_split_keyword=True,
+        source_folder_path=str(source),
+        destination_folder_path=str(destination),
+    )
+    watcher = KeywordWatcher(str(source), [".md"], "#split", debounce_seconds=1.0)
+    watcher.scan(now=0.0)
+    file_path = write_file(source, "a.md", "# a\n#split\n\n## first\n\n## second\n")
+    watcher.scan(now=0.0)
+    with SplitLock(str(destination)):
+        assert split_watched_files(watcher, config, now=1.0) == []
+    assert os.listdir(destination) == []
+    assert watcher.take_files_to_split(now=1.5) == []
+    assert watcher.take_files_to_split(now=2.0) == [file_path]
+
+
+def test_watch(tmp_path, split_config):
+    source = tmp_path / "source"
+    source.mkdir()
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    config = split_config(
+        using_split_keyword=True,
+        source_folder_path=str(source),
+        destination_folder_path=str(destination),
+    )
+    scan_count = 0
+
+    def should_stop() -> bool:
+        nonlocal scan_count
+        scan_count += 1
+        if scan_count == 2:
+            write_file(source, "a.md", "# a\n#split\n\n## first\n\n## second\n")
+        return scan_count > 4
+
+    watch(config, [".md"], 0.0, 0.0, should_stop=should_stop)
+    assert len(os.listdir(destination)) == 2